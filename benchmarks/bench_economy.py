@@ -0,0 +1,192 @@
+"""Benchmark EconomySystem + command handler dengan akun sintetis (tanpa koneksi Discord)
+
+Jalankan: python benchmarks/bench_economy.py [--sizes 1000,100000,1000000] [--ops 2000]
+                                             [--backend json|sqlite] [--output hasil.json]
+Laporan JSON dicetak ke stdout, atau ditulis ke --output agar bisa dibandingkan antar versi.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INVOKED_FROM = os.getcwd()  # --output relatif terhadap folder pemanggil, bukan folder sementara
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi dari cwd saat import
+import bot_shop
+
+BASE_USER_ID = 100000000000000000
+
+class FakeUser:
+    """Pengganti discord.Member secukupnya untuk command handler"""
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"bench{user_id - BASE_USER_ID}"
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.avatar = None
+        self.default_avatar = type("Avatar", (), {"url": "https://cdn.discordapp.com/embed/avatars/0.png"})()
+
+class FakeContext:
+    """Pengganti commands.Context: send() hanya dicatat, tanpa jaringan"""
+
+    def __init__(self, user_id):
+        self.author = FakeUser(user_id)
+        self.guild = None
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+def timed(func, repeat):
+    """Rata-rata waktu (detik) `func()` dijalankan `repeat` kali"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+async def timed_async(factory, repeat):
+    """Rata-rata waktu (detik) `await factory(i)` dijalankan berurutan"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        await factory(i)
+    return (time.perf_counter() - start) / repeat
+
+async def ops_per_sec(factory, count, concurrent):
+    """Throughput mutasi: berurutan (1 batch per mutasi) atau bersamaan (group commit)"""
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*[factory(i) for i in range(count)])
+    else:
+        for i in range(count):
+            await factory(i)
+    return count / (time.perf_counter() - start)
+
+def populate(economy, accounts, tx_per_account):
+    """Isi EconomySystem dengan akun sintetis, semua ditandai dirty"""
+    now = int(time.time())
+    for i in range(accounts):
+        user_id = BASE_USER_ID + i
+        economy._touch("economy", user_id)
+        economy._touch("inventory", user_id)
+        account = bot_shop.Account(
+            balance=random.randint(1000, 100000),
+            xp=random.randint(0, 99),
+            level=random.randint(1, 30),
+            daily_streak=random.randint(0, 6),
+            last_daily=now - random.randint(0, 3 * 86400),
+            transactions=[bot_shop.Transaction("income", 100, "Daily Reward", now) for _ in range(tx_per_account)]
+        )
+        economy.data[user_id] = account
+        economy.inventory_data[user_id] = bot_shop.Inventory(
+            {"Koin Emas": random.randint(1, 5)}, {"Koin Emas": 2}, {"common": 2}, 100
+        )
+        economy._update_rank(user_id, account)
+
+def storage_size():
+    """Total ukuran file data ekonomi di cwd (bytes)"""
+    paths = [bot_shop.SQLITE_FILE, bot_shop.SQLITE_FILE + "-wal", bot_shop.JOURNAL_FILE]
+    if os.path.isdir(bot_shop.SHARD_DIR):
+        paths += [os.path.join(bot_shop.SHARD_DIR, name) for name in os.listdir(bot_shop.SHARD_DIR)]
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+async def bench_size(accounts, ops, tx_per_account):
+    """Semua pengukuran untuk satu ukuran data"""
+    os.chdir(tempfile.mkdtemp())
+    result = {"accounts": accounts}
+
+    economy = bot_shop.EconomySystem()
+    start = time.perf_counter()
+    populate(economy, accounts, tx_per_account)
+    result["populate_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    economy._force_save()
+    result["force_save_s"] = time.perf_counter() - start
+    result["storage_bytes"] = storage_size()
+    economy.storage.close()
+
+    start = time.perf_counter()
+    economy = bot_shop.EconomySystem()
+    result["cold_start_s"] = time.perf_counter() - start
+    bot_shop.economies.partitions[bot_shop.economies.default_guild_id] = economy  # FakeContext tanpa guild -> partisi default
+
+    def user(i):
+        return BASE_USER_ID + random.randrange(accounts)
+
+    result["add_money_seq_ops"] = await ops_per_sec(lambda i: economy.add_money(user(i), 10, "Bench"), ops, False)
+    result["add_money_concurrent_ops"] = await ops_per_sec(lambda i: economy.add_money(user(i), 10, "Bench"), ops, True)
+    result["transfer_concurrent_ops"] = await ops_per_sec(lambda i: economy.transfer_money(user(i), user(i), 1), ops, True)
+    result["add_xp_concurrent_ops"] = await ops_per_sec(lambda i: economy.add_xp(user(i), 10), ops, True)
+
+    result["leaderboard_top10_ms"] = timed(lambda: economy.get_top_wealth(10), 200) * 1000
+    result["wealth_rank_ms"] = timed(lambda: economy.get_wealth_rank(user(0)), 200) * 1000
+    result["get_inventory_ms"] = timed(lambda: economy.get_inventory(user(0)), 200) * 1000
+
+    cached_users = {}
+
+    async def rich_leaderboard(i):
+        # Nama top 10 dimasukkan ke cache user agar rich_leaderboard tidak memanggil API
+        for user_id, _ in economy.get_top_wealth(10):
+            if user_id not in cached_users:
+                cached_users[user_id] = bot_shop.bot._connection.store_user(
+                    {"id": user_id, "username": f"bench{user_id}", "discriminator": "0", "avatar": None}
+                )
+        await bot_shop.rich_leaderboard.callback(FakeContext(user(i)))
+
+    commands = {
+        "work_command": lambda i: bot_shop.work_command.callback(FakeContext(user(i))),
+        "gacha_command": lambda i: bot_shop.gacha_command.callback(FakeContext(user(i)), "normal", 10),
+        "collect_rewards": lambda i: bot_shop.collect_rewards.callback(FakeContext(BASE_USER_ID + i % accounts)),
+        "rich_leaderboard": rich_leaderboard,
+        "show_inventory": lambda i: bot_shop.show_inventory.callback(FakeContext(user(i)))
+    }
+    repeat = min(ops, 500)
+    for name, factory in commands.items():
+        result[f"cmd_{name}_ms"] = await timed_async(factory, repeat) * 1000
+
+    await economy.drain()
+    await economy.save()
+    economy.storage.close()
+    return result
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Jumlah akun, dipisah koma")
+    parser.add_argument("--ops", type=int, default=2000, help="Mutasi per pengukuran throughput")
+    parser.add_argument("--tx", type=int, default=5, help="Transaksi hot window per akun sintetis")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default=bot_shop.ECONOMY_BACKEND)
+    parser.add_argument("--output", help="File laporan JSON (default: cetak ke stdout)")
+    args = parser.parse_args()
+    bot_shop.ECONOMY_BACKEND = args.backend
+    random.seed(0)
+
+    results = []
+    for accounts in (int(size) for size in args.sizes.split(",")):
+        print(f"⏱️ {accounts} akun ({args.backend})...")
+        result = await bench_size(accounts, args.ops, args.tx)
+        print(json.dumps(result, indent=2))
+        results.append(result)
+
+    report = {
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "ops": args.ops,
+        "results": results
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+        return
+    output = os.path.join(INVOKED_FROM, args.output)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Hasil ditulis ke {output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Benchmark memori: bytes per akun, dict JSON lama (v1) vs record Account/Inventory (v2)
+
+Jalankan: python benchmarks/bench_memory.py [jumlah_akun] [transaksi_per_akun]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi dari cwd saat import
+import bot_shop
+
+def legacy_files(accounts, tx_per_account, gacha_per_account=3):
+    """Isi file economy + inventory format lama (v1, seperti ditulis bot versi awal) untuk `accounts` user"""
+    timestamp = datetime.now().isoformat()
+    economy = {}
+    inventory = {}
+    for i in range(accounts):
+        user_id = str(100000000000000000 + i)
+        economy[user_id] = {
+            "balance": 1000 + i,
+            "bank": 0,
+            "xp": i % 100,
+            "level": 1 + i % 20,
+            "total_earned": i,
+            "total_spent": 0,
+            "daily_streak": i % 7,
+            "last_daily": timestamp,
+            "achievements": [],
+            "transactions": [
+                {"type": "income", "amount": 100, "reason": "Daily Reward", "timestamp": timestamp}
+                for _ in range(tx_per_account)
+            ],
+            "last_collect": timestamp
+        }
+        inventory[user_id] = {
+            "items": {"Koin Emas": 1},
+            "gacha_items": [
+                {"name": "Koin Emas", "rarity": "common", "value": 50, "timestamp": timestamp}
+                for _ in range(gacha_per_account)
+            ],
+            "badges": []
+        }
+    return json.dumps(economy), json.dumps(inventory)
+
+def measure(build):
+    """Memori (bytes) yang masih dipakai hasil `build()`"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+def as_records(economy_text, inventory_text):
+    """Layout baru: {user_id int: Account}, {user_id int: Inventory}"""
+    economy = {int(k): bot_shop.Account.from_dict(v) for k, v in json.loads(economy_text).items()}
+    inventory = {int(k): bot_shop.Inventory.from_dict(v) for k, v in json.loads(inventory_text).items()}
+    return economy, inventory
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tx_per_account = int(sys.argv[2]) if len(sys.argv) > 2 else bot_shop.TX_HOT_LIMIT
+    economy_text, inventory_text = legacy_files(accounts, tx_per_account)
+
+    before, _ = measure(lambda: (json.loads(economy_text), json.loads(inventory_text)))
+    after, _ = measure(lambda: as_records(economy_text, inventory_text))
+
+    print(f"Akun: {accounts}, transaksi per akun: {tx_per_account}")
+    print(f"Dict v1 : {before / accounts:10.0f} bytes/akun ({before / 1024 / 1024:.1f} MB)")
+    print(f"Record v2: {after / accounts:10.0f} bytes/akun ({after / 1024 / 1024:.1f} MB)")
+    print(f"Hemat    : {(1 - after / before) * 100:9.1f}%")
+
+if __name__ == "__main__":
+    main()
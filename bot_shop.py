@@ -3,27 +3,25 @@ import random
 import json
 import asyncio
 import os
-from datetime import datetime, timedelta
-from discord.ext import commands, tasks
+import sys
+import time
+from datetime import datetime
+from discord.ext import commands
 import aiohttp
+from aiohttp import web
 import math
+import sqlite3
+import struct
+import mmap
+import zlib
+import cProfile
+import pstats
+import typing
+from collections import OrderedDict, namedtuple
+from sortedcontainers import SortedList
 
 TOKEN = os.getenv("TOKEN")
 
-from flask import Flask
-from threading import Thread
-
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return "Bot Online 24 Jam"
-
-def run():
-    app.run(host='0.0.0.0', port=10000)
-
-Thread(target=run).start()
-
 PREFIX = '.'
 
 # ========== INTENTS ==========
@@ -31,17 +29,127 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(
-    command_prefix=PREFIX, 
-    intents=intents, 
-    help_command=None,
-    case_insensitive=True
-)
+# ========== SHARDING ==========
+BOT_SHARDED = os.getenv("BOT_SHARDED", "0") == "1"  # AutoShardedBot (opt-in)
+BOT_SHARD_COUNT = int(os.getenv("BOT_SHARD_COUNT", "0")) or None  # Total shard semua proses, None = dari Discord
+BOT_SHARD_IDS = os.getenv("BOT_SHARD_IDS")  # Shard yang dijalankan proses ini, mis. "0-3" atau "4,5"
+SHARD_STATS_INTERVAL = 10  # Detik antar sampel laju event per shard
+
+def parse_shard_ids(text):
+    """"0-3,6" -> [0, 1, 2, 3, 6]; None jika tidak diatur (semua shard)"""
+    if not text:
+        return None
+    shard_ids = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(shard_ids))
+
+if BOT_SHARDED:
+    shard_ids = parse_shard_ids(BOT_SHARD_IDS)
+    if shard_ids is not None and BOT_SHARD_COUNT is None:
+        raise RuntimeError("BOT_SHARD_IDS butuh BOT_SHARD_COUNT (total shard semua proses)")
+    bot = commands.AutoShardedBot(
+        command_prefix=PREFIX,
+        intents=intents,
+        help_command=None,
+        case_insensitive=True,
+        shard_count=BOT_SHARD_COUNT,
+        shard_ids=shard_ids
+    )
+else:
+    bot = commands.Bot(
+        command_prefix=PREFIX, 
+        intents=intents, 
+        help_command=None,
+        case_insensitive=True
+    )
 
 # ========== FILE PATHS ==========
 ECONOMY_FILE = "economy_data.json"
 GACHA_FILE = "gacha_data.json"
 INVENTORY_FILE = "inventory_data.json"
+JOURNAL_FILE = "economy_journal.log"
+TX_ARCHIVE_DIR = "tx_archive"
+SHARD_DIR = "economy_shards"
+MANIFEST_FILE = os.path.join(SHARD_DIR, "manifest.json")
+SQLITE_FILE = "economy.db"
+# Tiap proses shard punya file cooldown sendiri (bucket-nya hanya ada di proses itu)
+COOLDOWN_FILE = f"cooldowns.{BOT_SHARD_IDS.replace(' ', '').replace(',', '_')}.bin" if BOT_SHARD_IDS else "cooldowns.bin"
+GUILD_DATA_DIR = "guilds"  # Data ekonomi per guild: guilds/<guild_id>/
+LEDGER_DIR = "ledger"  # Event saldo immutable + checkpoint
+JOURNAL_SEQ_KEY = "_journal_seq"  # Seq journal di snapshot format lama (3 file utuh)
+JOURNAL_COMPACT_EVERY = 5000  # Compaction setelah sekian record journal
+
+# Store yang diubah oleh setiap operasi journal
+JOURNAL_OPS = {
+    "add": ("economy",),
+    "add_bulk": ("economy",),
+    "remove": ("economy",),
+    "transfer": ("economy",),
+    "xp": ("economy",),
+    "xp_bulk": ("economy",),
+    "set": ("economy",),
+    "reset": ("economy",),
+    "item": ("inventory",),
+    "gacha": ("inventory",),
+    "gacha_pull": ("economy", "inventory")
+}
+
+# ========== STORAGE CONFIG ==========
+ECONOMY_BACKEND = os.getenv("ECONOMY_BACKEND", "json")  # "json" atau "sqlite"
+HOT_CACHE_SIZE = int(os.getenv("ECONOMY_CACHE_SIZE", "5000"))  # Baris user di RAM (sqlite)
+SHARD_COUNT = int(os.getenv("ECONOMY_SHARDS", "64"))  # Maksimal file shard per store per partisi (json)
+SHARD_TARGET_ACCOUNTS = 20000  # Akun per shard sebelum jumlah shard partisi digandakan
+LEDGER_BATCH_MAX = 256  # Maksimal mutasi per batch group commit
+LEDGER_CHECKPOINT_EVERY = 50000  # Event antar checkpoint saldo (batas replay `.audit`)
+LEDGER_CHECKPOINT_KEEP = int(os.getenv("LEDGER_CHECKPOINT_KEEP", "48"))  # Checkpoint terakhir yang disimpan per partisi (`.audit` sebelum yang tertua tidak tersedia)
+
+ECONOMY_DEFAULT_GUILD = os.getenv("ECONOMY_DEFAULT_GUILD")  # Guild pemilik data global lama (wajib jika data lama ada)
+DEFAULT_GUILD_ID = int(ECONOMY_DEFAULT_GUILD) if ECONOMY_DEFAULT_GUILD else None  # Partisi data global lama + DM (None = partisi 0)
+
+# ========== PROFILING CONFIG ==========
+PROFILE_DIR = "profiles"  # Tempat file .pstats hasil `.profile dump`
+PROFILE_TOP_N = 15  # Jumlah fungsi/command di ringkasan
+
+# ========== WEB SERVER CONFIG ==========
+WEB_PORT = int(os.getenv("PORT", "10000"))  # Keep-alive + health check
+LOOP_LAG_INTERVAL = 0.5  # Interval pengukuran lag event loop (detik)
+LOOP_LAG_UNHEALTHY_MS = 1000  # /healthz 503 jika lag event loop melebihi ini
+
+# ========== LAYANAN EKONOMI CONFIG ==========
+ECONOMY_SOCKET = os.getenv("ECONOMY_SOCKET")  # Unix socket layanan ekonomi; kosong = ekonomi di proses bot
+ECONOMY_SOCKET_PATH = ECONOMY_SOCKET or "economy.sock"  # Path yang dibuka `--economy-service`
+
+if BOT_SHARD_IDS and not ECONOMY_SOCKET:
+    # Beberapa proses shard tanpa layanan ekonomi akan menulis file guilds/* yang sama
+    raise RuntimeError("BOT_SHARD_IDS butuh ECONOMY_SOCKET (jalankan `--economy-service` sebagai satu-satunya penulis data)")
+
+# ========== PENGIRIMAN PESAN CONFIG ==========
+SEND_RATE = 5  # Pesan per channel per SEND_PER detik (batas pesan channel Discord)
+SEND_PER = 5.0
+MESSAGE_MAX_CHARS = 2000  # Batas konten 1 pesan Discord
+MESSAGE_MAX_EMBEDS = 10
+MESSAGE_MAX_EMBED_CHARS = 6000  # Total karakter semua embed dalam 1 pesan
+
+# ========== NAMA USER CONFIG ==========
+NAME_CACHE_SIZE = 10000  # Nama hasil fetch REST yang disimpan (LRU)
+NAME_CACHE_TTL = 3600  # Detik sebelum nama hasil fetch dianggap basi
+NAME_FETCH_CONCURRENCY = 5  # Maksimal fetch_user bersamaan
+
+# ========== RIWAYAT TRANSAKSI ==========
+TX_HOT_LIMIT = 50  # Transaksi terbaru yang disimpan di data user
+TX_ARCHIVE_BATCH = 25  # Arsipkan setelah hot window lebih dari TX_HOT_LIMIT + batch
+HISTORY_PAGE_SIZE = 10
+
+# ========== DAILY ==========
+DAILY_STREAK_EXPIRY_DAYS = 2  # Streak hangus jika tidak klaim lebih dari 2 hari
+
+# ========== COOLDOWN CONFIG ==========
+COOLDOWN_PERSIST_MIN = 60  # Cooldown >= sekian detik disimpan ke disk (bertahan restart)
+COOLDOWN_WHEEL_TICK = 10  # Detik per slot timing wheel
+COOLDOWN_WHEEL_SLOTS = 512  # Jumlah slot (satu putaran ~85 menit)
+COOLDOWN_SAVE_DELAY = 10  # Debounce save file cooldown (detik)
 
 # ========== GAME VARIABLES ==========
 rps_stats = {}  # {user_id: {wins, losses, draws}}
@@ -52,35 +160,1490 @@ daily_rewards = {}  # {user_id: last_daily_claim}
 work_cooldowns = {}  # {user_id: last_work_time}
 crime_cooldowns = {}  # {user_id: last_crime_time}
 
-# ========== EKONOMI VIRTUAL ==========
-class EconomySystem:
-    def __init__(self):
+# ========== RECORD DATA USER ==========
+RECORD_VERSION = 2  # v1: dict polos + timestamp ISO, v2: field "v" + timestamp epoch (detik)
+
+def to_epoch(value):
+    """Ubah timestamp (epoch atau string ISO format lama) jadi epoch detik"""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+class Transaction(namedtuple("Transaction", "type amount detail timestamp")):
+    """Satu transaksi; detail = alasan, atau user_id lawan untuk transfer"""
+    __slots__ = ()
+    
+    @classmethod
+    def from_json(cls, raw):
+        """Baca transaksi v2 (list) atau v1 (dict dengan key reason/to/from)"""
+        if isinstance(raw, list):
+            return cls(*raw)
+        if raw["type"] == "transfer_out":
+            detail = int(raw["to"])
+        elif raw["type"] == "transfer_in":
+            detail = int(raw["from"])
+        else:
+            detail = raw["reason"]
+        return cls(raw["type"], raw["amount"], detail, to_epoch(raw["timestamp"]))
+
+class Account:
+    """Data ekonomi satu user (__slots__, tanpa dict per objek)"""
+    
+    __slots__ = (
+        "balance", "bank", "xp", "level", "total_earned", "total_spent",
+        "daily_streak", "last_daily", "last_collect", "achievements",
+        "transactions", "tx_archived"
+    )
+    TIMESTAMP_FIELDS = ("last_daily", "last_collect")
+    
+    def __init__(self, balance=1000, bank=0, xp=0, level=1, total_earned=0, total_spent=0,
+                 daily_streak=0, last_daily=None, last_collect=None, achievements=None,
+                 transactions=None, tx_archived=0):
+        self.balance = balance  # Saldo awal 1000
+        self.bank = bank
+        self.xp = xp
+        self.level = level
+        self.total_earned = total_earned
+        self.total_spent = total_spent
+        self.daily_streak = daily_streak
+        self.last_daily = last_daily  # Epoch detik
+        self.last_collect = last_collect  # Epoch detik
+        self.achievements = achievements if achievements is not None else []
+        self.transactions = transactions if transactions is not None else []  # Hot window [Transaction]
+        self.tx_archived = tx_archived  # Jumlah transaksi yang sudah dipindah ke arsip
+    
+    @property
+    def wealth(self):
+        return self.balance + self.bank
+    
+    def copy(self):
+        """Salinan untuk rollback mutasi (list ikut disalin, Transaction immutable)"""
+        clone = Account.__new__(Account)
+        clone.restore(self)
+        clone.achievements = list(self.achievements)
+        clone.transactions = list(self.transactions)
+        return clone
+    
+    def restore(self, saved):
+        """Kembalikan semua field dari salinan `saved` (objek tetap sama)"""
+        for field in self.__slots__:
+            setattr(self, field, getattr(saved, field))
+    
+    def update(self, fields):
+        """Ubah beberapa field sekaligus (timestamp ISO lama diubah ke epoch)"""
+        for field, value in fields.items():
+            if field in self.TIMESTAMP_FIELDS:
+                value = to_epoch(value)
+            setattr(self, field, value)
+    
+    def to_dict(self):
+        """Serialisasi ke layout JSON (versi terbaru)"""
+        return {
+            "v": RECORD_VERSION,
+            "balance": self.balance,
+            "bank": self.bank,
+            "xp": self.xp,
+            "level": self.level,
+            "total_earned": self.total_earned,
+            "total_spent": self.total_spent,
+            "daily_streak": self.daily_streak,
+            "last_daily": self.last_daily,
+            "achievements": self.achievements,
+            "transactions": self.transactions,
+            "tx_archived": self.tx_archived,
+            "last_collect": self.last_collect
+        }
+    
+    @classmethod
+    def from_dict(cls, raw):
+        """Baca layout JSON v1 (timestamp ISO) maupun v2"""
+        if raw.get("v", 1) >= 2:
+            transactions = [Transaction(*t) for t in raw["transactions"]]
+        else:
+            transactions = [Transaction.from_json(t) for t in raw["transactions"]]
+        return cls(
+            raw["balance"], raw["bank"], raw["xp"], raw["level"],
+            raw["total_earned"], raw["total_spent"], raw["daily_streak"],
+            to_epoch(raw["last_daily"]), to_epoch(raw.get("last_collect")),
+            raw["achievements"], transactions, raw.get("tx_archived", 0)
+        )
+
+class Inventory:
+    """Inventory satu user, item gacha disimpan sebagai counter"""
+    
+    __slots__ = ("items", "gacha_items", "gacha_rarity", "gacha_value", "badges")
+    
+    def __init__(self, items=None, gacha_items=None, gacha_rarity=None, gacha_value=0, badges=None):
+        self.items = items if items is not None else {}  # {nama: jumlah}
+        self.gacha_items = gacha_items if gacha_items is not None else {}  # {nama: jumlah}
+        self.gacha_rarity = gacha_rarity if gacha_rarity is not None else {}  # {rarity: jumlah}
+        self.gacha_value = gacha_value
+        self.badges = badges if badges is not None else []
+    
+    def add_gacha_items(self, items):
+        """Tambah [(nama, rarity, nilai)] ke counter gacha"""
+        for name, rarity, value in items:
+            self.gacha_items[name] = self.gacha_items.get(name, 0) + 1
+            self.gacha_rarity[rarity] = self.gacha_rarity.get(rarity, 0) + 1
+            self.gacha_value += value
+    
+    def copy(self):
+        """Salinan untuk rollback mutasi"""
+        return Inventory(dict(self.items), dict(self.gacha_items), dict(self.gacha_rarity), self.gacha_value, list(self.badges))
+    
+    def restore(self, saved):
+        """Kembalikan semua field dari salinan `saved` (objek tetap sama)"""
+        for field in self.__slots__:
+            setattr(self, field, getattr(saved, field))
+    
+    def to_dict(self):
+        """Serialisasi ke layout JSON (versi terbaru)"""
+        return {
+            "v": RECORD_VERSION,
+            "items": self.items,
+            "gacha": {"items": self.gacha_items, "rarity": self.gacha_rarity, "value": self.gacha_value},
+            "badges": self.badges
+        }
+    
+    @classmethod
+    def from_dict(cls, raw):
+        """Baca layout JSON, termasuk format lama (1 dict per tarikan gacha)"""
+        if "gacha_items" in raw:
+            inventory = cls(raw["items"], badges=raw["badges"])
+            inventory.add_gacha_items((item["name"], item["rarity"], item["value"]) for item in raw["gacha_items"])
+            return inventory
+        gacha = raw["gacha"]
+        return cls(raw["items"], gacha["items"], gacha["rarity"], gacha["value"], raw["badges"])
+
+# ========== STORAGE EKONOMI ==========
+def atomic_write(path, text):
+    """Tulis file secara atomik: file sementara + fsync + rename (str atau bytes)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(text, bytes) else 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class SnapshotShard:
+    """File shard biner (di-mmap): record length-prefixed + index offset terurut user_id"""
+    
+    MAGIC = b"ESB1"
+    HEADER = struct.Struct("<4sIQ")  # magic, jumlah record, offset index
+    LENGTH = struct.Struct("<I")  # Prefix panjang tiap record
+    INDEX_ENTRY = struct.Struct("<QQIq")  # user_id, offset payload, panjang payload, total wealth
+    INDEX_KEY = struct.Struct("<Q")
+    
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._index_offset = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path}: bukan snapshot biner")
+    
+    def get(self, user_id):
+        """Payload JSON (bytes) milik user lewat binary search di index, None jika tidak ada"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = self._index_offset + mid * self.INDEX_ENTRY.size
+            (key,) = self.INDEX_KEY.unpack_from(self._map, position)
+            if key < user_id:
+                lo = mid + 1
+            elif key > user_id:
+                hi = mid
+            else:
+                _, offset, length, _ = self.INDEX_ENTRY.unpack_from(self._map, position)
+                return self._map[offset:offset + length]
+        return None
+    
+    def entries(self):
+        """Iterasi (user_id, offset, panjang, wealth) langsung dari index, tanpa decode record"""
+        return self.INDEX_ENTRY.iter_unpack(self._map[self._index_offset:self._index_offset + self.count * self.INDEX_ENTRY.size])
+    
+    def close(self):
+        self._map.close()
+    
+    @classmethod
+    def build(cls, old, updates, select=None):
+        """Bytes shard baru: record lama yang tidak berubah disalin apa adanya + {user_id: (payload, wealth)}
+        
+        `old` bisa satu shard atau daftar shard (saat jumlah shard berubah); `select` = (jumlah shard,
+        nomor shard) menyaring record lama yang pindah ke shard ini.
+        """
+        records = {}
+        for shard in (old if isinstance(old, list) else [old] if old is not None else []):
+            for user_id, offset, length, wealth in shard.entries():
+                if user_id not in updates and (select is None or user_id % select[0] == select[1]):
+                    records[user_id] = (shard._map[offset:offset + length], wealth)
+        records.update(updates)
+        
+        parts = [b""]
+        index = []
+        offset = cls.HEADER.size
+        for user_id in sorted(records):
+            payload, wealth = records[user_id]
+            parts.append(cls.LENGTH.pack(len(payload)))
+            parts.append(payload)
+            index.append(cls.INDEX_ENTRY.pack(user_id, offset + cls.LENGTH.size, len(payload), wealth))
+            offset += cls.LENGTH.size + len(payload)
+        parts[0] = cls.HEADER.pack(cls.MAGIC, len(index), offset)
+        return b"".join(parts + index)
+
+class LazyRecords:
+    """{user_id: record} yang menghidrasi record dari shard mmap saat pertama kali disentuh"""
+    
+    def __init__(self, shards, shard_of, record_type):
+        self._shards = shards  # {shard: SnapshotShard}, dipakai bersama storage (diganti setelah save)
+        self._shard_of = shard_of
+        self._record_type = record_type
+        self.loaded = {}  # Record yang sudah dihidrasi atau baru dibuat
+        self._new = set()  # User yang belum ada di shard saat dibuat
+    
+    def _payload(self, user_id):
+        shard = self._shards.get(self._shard_of(user_id))
+        return shard.get(user_id) if shard is not None else None
+    
+    def get(self, user_id, default=None):
+        record = self.loaded.get(user_id)
+        if record is None:
+            payload = self._payload(user_id)
+            if payload is None:
+                return default
+            record = self.loaded[user_id] = self._record_type.from_dict(json.loads(payload))
+        return record
+    
+    def __getitem__(self, user_id):
+        record = self.get(user_id)
+        if record is None:
+            raise KeyError(user_id)
+        return record
+    
+    def __contains__(self, user_id):
+        return user_id in self.loaded or self._payload(user_id) is not None
+    
+    def __setitem__(self, user_id, record):
+        if user_id not in self:
+            self._new.add(user_id)
+        self.loaded[user_id] = record
+    
+    def pop(self, user_id, default=None):
+        """Buang record yang dibuat mutasi gagal (hanya record baru, belum ada di shard)"""
+        self._new.discard(user_id)
+        return self.loaded.pop(user_id, default)
+    
+    def __len__(self):
+        self._new = {user_id for user_id in self._new if self._payload(user_id) is None}
+        return sum(shard.count for shard in self._shards.values()) + len(self._new)
+    
+    def items(self):
+        """Semua (user_id, record); yang belum dihidrasi di-decode tanpa disimpan"""
+        yield from self.loaded.items()
+        for shard in self._shards.values():
+            for user_id, offset, length, _ in shard.entries():
+                if user_id not in self.loaded:
+                    yield user_id, self._record_type.from_dict(json.loads(shard._map[offset:offset + length]))
+    
+    def preload(self, raw_data):
+        """Isi dari {user_id_str: dict} format JSON lama (migrasi)"""
+        for user_id_str, raw in raw_data.items():
+            self[int(user_id_str)] = self._record_type.from_dict(raw)
+
+class JsonStorage:
+    """Backend file: snapshot biner per shard (di-mmap, hidrasi per user) + journal JSON append-only"""
+    
+    JOURNALED = True  # Batch mutasi durable setelah append()
+    
+    def __init__(self, root="."):
+        self.root = root  # Folder data partisi (guild)
+        self._shard_dir = os.path.join(root, SHARD_DIR)
+        self._manifest_path = os.path.join(root, MANIFEST_FILE)
+        self._journal_path = os.path.join(root, JOURNAL_FILE)
         self.data = {}
         self.gacha_data = {}
         self.inventory_data = {}
-        self._save_timer = None
-        self._pending_save = False
-        self.load_data()
+        self._manifest = None  # Daftar file shard yang aktif + seq snapshot
+        self._shard_count = 1  # Partisi baru mulai 1 shard, bertambah lewat manifest
+        self._shards = {"economy": {}, "inventory": {}}  # {shard: SnapshotShard} yang sedang di-mmap
+        self._swap = None  # Shard hasil save terakhir, dipasang di event loop lewat trim_cache()
+        self._full_rewrite = False  # True setelah migrasi dari file lama
+        self._gacha_text = None  # Isi file gacha yang terakhir ditulis
+        self._journal_seq = 0  # Nomor urut record journal terakhir
+        self._journal_count = 0  # Jumlah record sejak compaction terakhir
+        self._journal_file = None
     
-    def load_data(self):
-        """Load semua data dari file"""
+    def _shard_of(self, user_id):
+        """Nomor shard untuk user_id"""
+        return int(user_id) % self._shard_count
+    
+    def _read_json(self, path, default=None):
         try:
-            with open(ECONOMY_FILE, 'r') as f:
-                self.data = json.load(f)
+            with open(path, 'r') as f:
+                return json.load(f)
         except FileNotFoundError:
-            self.data = {}
+            return default
+    
+    def load(self, pinned):
+        """Buka snapshot, return (data, gacha, inventory, record journal yang perlu di-replay)
+        
+        Snapshot biner hanya di-mmap; record user di-decode saat pertama disentuh, jadi
+        waktu startup tidak bergantung pada jumlah akun.
+        """
+        raw = {"economy": {}, "inventory": {}}
+        self._manifest = self._read_json(self._manifest_path)
+        if self._manifest is None:
+            snapshot_seqs = self._load_legacy(raw)
+        else:
+            self._shard_count = self._manifest["shards"]
+            for store, files in self._manifest["files"].items():
+                for shard, filename in files.items():
+                    path = os.path.join(self._shard_dir, filename)
+                    if self._manifest.get("format") == "bin":
+                        self._shards[store][int(shard)] = SnapshotShard(path)
+                    else:
+                        raw[store].update(self._read_json(path))  # Shard JSON lama, ditulis ulang jadi biner
+            self._full_rewrite = self._manifest.get("format") != "bin"
+            self.gacha_data = self._read_json(os.path.join(self._shard_dir, self._manifest["gacha"]), {})
+            self._gacha_text = json.dumps(self.gacha_data, separators=(",", ":"))
+            self._remove_orphan_files()
+            snapshot_seqs = {"economy": self._manifest["seq"], "inventory": self._manifest["seq"]}
         
+        self.data = LazyRecords(self._shards["economy"], self._shard_of, Account)
+        self.inventory_data = LazyRecords(self._shards["inventory"], self._shard_of, Inventory)
+        self.data.preload(raw["economy"])
+        self.inventory_data.preload(raw["inventory"])
+        
+        self._journal_seq = max(snapshot_seqs.values())
+        return self.data, self.gacha_data, self.inventory_data, self._read_journal(snapshot_seqs)
+    
+    def _load_legacy(self, raw):
+        """Load format lama (3 file JSON utuh), ditulis ulang sebagai shard di save pertama"""
+        economy = self._read_json(os.path.join(self.root, ECONOMY_FILE))
+        inventory = self._read_json(os.path.join(self.root, INVENTORY_FILE))
+        raw["economy"] = economy or {}
+        self.gacha_data = self._read_json(os.path.join(self.root, GACHA_FILE)) or {}
+        raw["inventory"] = inventory or {}
+        self._full_rewrite = economy is not None or inventory is not None
+        
+        self.gacha_data.pop(JOURNAL_SEQ_KEY, None)
+        return {
+            "economy": raw["economy"].pop(JOURNAL_SEQ_KEY, 0),
+            "inventory": raw["inventory"].pop(JOURNAL_SEQ_KEY, 0)
+        }
+    
+    def _remove_orphan_files(self):
+        """Hapus file shard sisa save yang gagal (tidak tercatat di manifest)"""
+        active = {self._manifest["gacha"], os.path.basename(MANIFEST_FILE)}
+        for files in self._manifest["files"].values():
+            active.update(files.values())
+        for filename in os.listdir(self._shard_dir):
+            if filename not in active:
+                os.remove(os.path.join(self._shard_dir, filename))
+    
+    def _journal_segments(self):
+        """Daftar segmen journal lama (hasil rotasi) urut dari yang terlama"""
+        prefix = f"{JOURNAL_FILE}."
+        segments = [name for name in os.listdir(self.root) if name.startswith(prefix) and name[len(prefix):].isdigit()]
+        return [os.path.join(self.root, name) for name in sorted(segments, key=lambda name: int(name[len(prefix):]))]
+    
+    def _read_journal(self, snapshot_seqs):
+        """Baca record journal yang belum masuk snapshot"""
+        records = []
+        self._journal_count = 0
+        for path in self._journal_segments() + [self._journal_path]:
+            try:
+                with open(path, 'r+b') as f:
+                    end = 0  # Akhir baris utuh terakhir
+                    for line in f:
+                        try:
+                            record = json.loads(line) if line.endswith(b"\n") else None
+                        except json.JSONDecodeError:
+                            record = None
+                        if record is None:
+                            # Baris terakhir terpotong saat crash: dibuang agar append berikutnya
+                            # tidak tersambung ke sisa baris itu
+                            f.truncate(end)
+                            break
+                        end += len(line)
+                        self._journal_seq = max(self._journal_seq, record["s"])
+                        self._journal_count += 1
+                        if any(record["s"] > snapshot_seqs[store] for store in JOURNAL_OPS[record["op"]]):
+                            records.append(record)
+            except FileNotFoundError:
+                pass
+        return records
+    
+    def iter_wealth(self):
+        """Iterasi (user_id, total_wealth) semua akun: record terhidrasi + kolom wealth di index shard"""
+        for user_id, account in self.data.loaded.items():
+            yield user_id, account.wealth
+        for shard in self._shards["economy"].values():
+            for user_id, _, _, wealth in shard.entries():
+                if user_id not in self.data.loaded:
+                    yield user_id, wealth
+    
+    def iter_balance(self):
+        """Iterasi (user_id, saldo) semua akun (record yang belum dihidrasi di-decode sekali)"""
+        for user_id, account in self.data.items():
+            yield user_id, account.balance
+    
+    def account_count(self):
+        return len(self.data)
+    
+    def append(self, records):
+        """Tulis satu batch record ke journal (1 write + fsync), return True jika perlu compaction"""
+        lines = []
+        for record in records:
+            self._journal_seq += 1
+            record["s"] = self._journal_seq
+            lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+        if self._journal_file is None:
+            self._journal_file = open(self._journal_path, 'a')
+        size = os.fstat(self._journal_file.fileno()).st_size
         try:
-            with open(GACHA_FILE, 'r') as f:
-                self.gacha_data = json.load(f)
+            self._journal_file.write("".join(lines))
+            self._journal_file.flush()
+            os.fsync(self._journal_file.fileno())
+        except Exception:
+            # Batch gagal tidak boleh ikut ter-replay saat start berikutnya
+            self._journal_seq -= len(records)
+            self._discard_journal_tail(size)
+            raise
+        
+        self._journal_count += len(records)
+        return self._journal_count >= JOURNAL_COMPACT_EVERY
+    
+    def _discard_journal_tail(self, size):
+        """Potong journal kembali ke `size` bytes setelah tulisan batch gagal"""
+        journal_file, self._journal_file = self._journal_file, None
+        try:
+            journal_file.close()
+        except OSError:
+            pass  # Sisa buffer yang gagal di-flush ikut dipotong di bawah
+        with open(self._journal_path, 'r+b') as f:
+            f.truncate(size)
+    
+    def _target_shard_count(self, accounts):
+        """Jumlah shard untuk `accounts` akun: digandakan sampai <= SHARD_TARGET_ACCOUNTS per shard"""
+        count = self._shard_count
+        while count < SHARD_COUNT and accounts > count * SHARD_TARGET_ACCOUNTS:
+            count *= 2
+        return min(count, max(SHARD_COUNT, self._shard_count))
+    
+    def snapshot(self, dirty):
+        """Snapshot murah di event loop: encode user dirty, salin shard dirty, rotasi journal"""
+        shard_count = self._target_shard_count(len(self.data))
+        reshard = shard_count != self._shard_count  # Semua shard ditulis ulang dengan pembagian baru
+        dirty_shards = {}
+        for store, data in (("economy", self.data), ("inventory", self.inventory_data)):
+            # Migrasi: semua record (sudah ada di RAM) ditulis ulang sebagai shard biner
+            user_ids = list(data.loaded) if self._full_rewrite else dirty[store]
+            updates = {shard: {} for shard in range(shard_count)} if self._full_rewrite or reshard else {}
+            for user_id in user_ids:
+                record = data.loaded[user_id]
+                payload = json.dumps(record.to_dict(), separators=(",", ":")).encode()
+                wealth = record.wealth if store == "economy" else 0
+                updates.setdefault(user_id % shard_count, {})[user_id] = (payload, wealth)
+            # Record lama yang tidak berubah disalin dari shard mmap di worker thread
+            if self._full_rewrite:
+                dirty_shards[store] = {shard: (None, records) for shard, records in updates.items()}
+            elif reshard:
+                old_shards = list(self._shards[store].values())
+                dirty_shards[store] = {shard: (old_shards, records, (shard_count, shard)) for shard, records in updates.items()}
+            else:
+                dirty_shards[store] = {shard: (self._shards[store].get(shard), records) for shard, records in updates.items()}
+        
+        gacha_text = json.dumps(self.gacha_data, separators=(",", ":"))
+        manifest = self._manifest or {"seq": 0, "shards": self._shard_count, "files": {"economy": {}, "inventory": {}}, "gacha": None}
+        gacha_changed = gacha_text != self._gacha_text
+        if not any(dirty_shards.values()) and not gacha_changed:
+            return None  # Tidak ada yang berubah, tidak perlu menulis apa pun
+        
+        # Record baru masuk ke journal baru, segmen lama dihapus setelah snapshot tertulis
+        if self._journal_file:
+            self._journal_file.close()
+            self._journal_file = None
+        if os.path.exists(self._journal_path):
+            os.replace(self._journal_path, f"{self._journal_path}.{self._journal_seq}")
+        self._journal_count = 0
+        
+        seq = self._journal_seq
+        new_manifest = {
+            "seq": seq,
+            "format": "bin",
+            "shards": shard_count,
+            "files": {store: dict(files) for store, files in manifest["files"].items()},
+            "gacha": manifest["gacha"]
+        }
+        files = []
+        obsolete = []
+        placed = []  # (store, shard, filename) yang di-mmap ulang setelah save
+        for store, shards in dirty_shards.items():
+            for shard, encoded in shards.items():
+                filename = f"{store}_{shard:03d}.{seq}.bin"
+                old_filename = new_manifest["files"][store].get(str(shard))
+                if old_filename and old_filename != filename:
+                    obsolete.append(old_filename)
+                new_manifest["files"][store][str(shard)] = filename
+                files.append((filename, encoded))
+                placed.append((store, shard, filename))
+        if gacha_changed:
+            new_manifest["gacha"] = f"gacha.{seq}.json"
+            if manifest["gacha"] and manifest["gacha"] != new_manifest["gacha"]:
+                obsolete.append(manifest["gacha"])
+            files.append((new_manifest["gacha"], gacha_text))
+        
+        return {
+            "manifest": new_manifest,
+            "files": files,
+            "obsolete": obsolete,
+            "placed": placed,
+            "gacha_text": gacha_text,
+            "segments": self._journal_segments()
+        }
+    
+    def write(self, snapshot):
+        """Tulis shard dirty + manifest (aman dijalankan di worker thread), return bytes"""
+        os.makedirs(self._shard_dir, exist_ok=True)
+        written = 0
+        for filename, encoded in snapshot["files"]:
+            if isinstance(encoded, tuple):
+                encoded = SnapshotShard.build(*encoded)
+            atomic_write(os.path.join(self._shard_dir, filename), encoded)
+            written += len(encoded)
+        
+        # Manifest diganti atomik: snapshot lama tetap utuh sampai titik ini
+        manifest_text = json.dumps(snapshot["manifest"])
+        atomic_write(self._manifest_path, manifest_text)
+        written += len(manifest_text)
+        self._manifest = snapshot["manifest"]
+        self._gacha_text = snapshot["gacha_text"]
+        # Shard lama masih bisa dibaca event loop: pemasangan shard baru dan
+        # penghapusan file lama menunggu trim_cache() di event loop
+        self._swap = snapshot
+        
+        for segment in snapshot["segments"]:
+            os.remove(segment)
+        if self._full_rewrite:
+            self._full_rewrite = False
+            for path in (os.path.join(self.root, name) for name in (ECONOMY_FILE, GACHA_FILE, INVENTORY_FILE)):
+                if os.path.exists(path):
+                    os.replace(path, f"{path}.migrated")
+        return written
+    
+    def trim_cache(self):
+        """Pasang shard mmap hasil save terakhir lalu hapus file lama (di event loop)"""
+        snapshot, self._swap = self._swap, None
+        if snapshot is None:
+            return
+        # Pembagian shard baru berlaku bersamaan dengan dipasangnya shard hasil save
+        self._shard_count = snapshot["manifest"]["shards"]
+        for store, shard, filename in snapshot["placed"]:
+            old = self._shards[store].get(shard)
+            self._shards[store][shard] = SnapshotShard(os.path.join(self._shard_dir, filename))
+            if old is not None:
+                old.close()
+        for filename in snapshot["obsolete"]:
+            os.remove(os.path.join(self._shard_dir, filename))
+    
+    def close(self):
+        """Tutup file journal dan semua shard mmap"""
+        if self._journal_file:
+            self._journal_file.close()
+            self._journal_file = None
+        for shards in self._shards.values():
+            for shard in shards.values():
+                shard.close()
+            shards.clear()
+
+class HotRowCache:
+    """Cache LRU untuk baris SQLite, baris dirty ditahan sampai tersimpan"""
+    
+    def __init__(self, loader, capacity, pinned):
+        self._rows = OrderedDict()
+        self._loader = loader  # Fungsi baca 1 baris dari database
+        self._capacity = capacity
+        self._pinned = pinned  # Set user_id dirty/sedang disimpan (tidak boleh di-evict)
+    
+    def _fetch(self, key):
+        """Ambil baris dari cache, atau dari database jika belum ada"""
+        if key in self._rows:
+            self._rows.move_to_end(key)
+            return self._rows[key]
+        row = self._loader(key)
+        if row is not None:
+            self._rows[key] = row
+            self.trim()
+        return row
+    
+    def __contains__(self, key):
+        return self._fetch(key) is not None
+    
+    def __getitem__(self, key):
+        row = self._fetch(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+    
+    def __setitem__(self, key, value):
+        self._rows[key] = value
+        self._rows.move_to_end(key)
+        self.trim()
+    
+    def get(self, key, default=None):
+        row = self._fetch(key)
+        return default if row is None else row
+    
+    def pop(self, key, default=None):
+        """Buang baris dari cache (baris baru dari mutasi gagal, belum ada di database)"""
+        return self._rows.pop(key, default)
+    
+    def peek(self, key):
+        """Ambil baris dari cache saja tanpa baca database"""
+        return self._rows.get(key)
+    
+    def trim(self):
+        """Evict baris paling lama yang tidak dirty sampai muat kapasitas"""
+        if len(self._rows) <= self._capacity:
+            return
+        for key in list(self._rows)[:-1]:
+            if len(self._rows) <= self._capacity:
+                break
+            if not any(key in user_ids for user_ids in self._pinned):
+                del self._rows[key]
+
+class SqliteStorage:
+    """Backend SQLite (WAL): update per baris user, cache baris terbatas di RAM"""
+    
+    JOURNALED = False  # Batch mutasi durable setelah save() (baris dirty ditulis)
+    
+    def __init__(self, path=SQLITE_FILE, cache_size=HOT_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.conn = None  # Koneksi baca (event loop)
+        self._writer = None  # Koneksi tulis (worker thread save)
+        self._gacha_text = None  # Isi gacha_data yang terakhir ditulis
+        self.data = None
+        self.gacha_data = {}
+        self.inventory_data = None
+    
+    def load(self, pinned):
+        """Buka database (migrasi dari JSON jika perlu), return cache baris"""
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                user_id INTEGER PRIMARY KEY,
+                balance INTEGER NOT NULL,
+                bank INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS inventories (
+                user_id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        
+        if self._get_meta("migrated_from_json") is None:
+            self._migrate_from_json()
+        
+        self._gacha_text = self._get_meta("gacha_data") or "{}"
+        self.gacha_data = json.loads(self._gacha_text)
+        self._writer = sqlite3.connect(self.path, check_same_thread=False)
+        self._writer.execute("PRAGMA synchronous=FULL")  # WAL di-fsync setiap commit: batch mutasi durable setelah save
+        self.data = HotRowCache(self._load_account, self.cache_size, pinned["economy"])
+        self.inventory_data = HotRowCache(self._load_inventory, self.cache_size, pinned["inventory"])
+        return self.data, self.gacha_data, self.inventory_data, []
+    
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _migrate_from_json(self):
+        """Migrasi satu kali dari file JSON (snapshot + journal) ke SQLite"""
+        root = os.path.dirname(self.path) or "."
+        legacy = EconomySystem(JsonStorage(root), root=root)
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO accounts (user_id, balance, bank, data) VALUES (?, ?, ?, ?)",
+                    ((user_id, account.balance, account.bank, json.dumps(account.to_dict())) for user_id, account in legacy.data.items())
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO inventories (user_id, data) VALUES (?, ?)",
+                    ((user_id, json.dumps(inventory.to_dict())) for user_id, inventory in legacy.inventory_data.items())
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('gacha_data', ?)",
+                    (json.dumps(legacy.gacha_data),)
+                )
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)", (datetime.now().isoformat(),))
+            print(f"✅ Migrasi JSON -> SQLite: {len(legacy.data)} akun")
+        finally:
+            legacy.storage.close()  # Shard mmap dibaca selama migrasi
+    
+    def _load_account(self, user_id):
+        row = self.conn.execute("SELECT data FROM accounts WHERE user_id = ?", (user_id,)).fetchone()
+        return Account.from_dict(json.loads(row[0])) if row else None
+    
+    def _load_inventory(self, user_id):
+        row = self.conn.execute("SELECT data FROM inventories WHERE user_id = ?", (user_id,)).fetchone()
+        return Inventory.from_dict(json.loads(row[0])) if row else None
+    
+    def iter_wealth(self):
+        """Iterasi (user_id, total_wealth) semua akun langsung dari database"""
+        yield from self.conn.execute("SELECT user_id, balance + bank FROM accounts")
+    
+    def iter_balance(self):
+        """Iterasi (user_id, saldo) semua akun langsung dari database"""
+        yield from self.conn.execute("SELECT user_id, balance FROM accounts")
+    
+    def account_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+    
+    def append(self, records):
+        """Tidak ada journal terpisah, baris dirty ditulis lewat save per batch"""
+        return False
+    
+    def snapshot(self, dirty):
+        """Encode hanya baris user yang berubah (di event loop)"""
+        gacha_text = json.dumps(self.gacha_data)
+        if not any(dirty.values()) and gacha_text == self._gacha_text:
+            return None  # Tidak ada yang berubah
+        
+        accounts = [(user_id, self.data.peek(user_id)) for user_id in dirty["economy"]]
+        inventories = [(user_id, self.inventory_data.peek(user_id)) for user_id in dirty["inventory"]]
+        return {
+            "accounts": [
+                (user_id, account.balance, account.bank, json.dumps(account.to_dict()))
+                for user_id, account in accounts if account is not None
+            ],
+            "inventories": [
+                (user_id, json.dumps(inventory.to_dict()))
+                for user_id, inventory in inventories if inventory is not None
+            ],
+            "gacha": gacha_text if gacha_text != self._gacha_text else None
+        }
+    
+    def write(self, snapshot):
+        """Tulis baris dalam satu transaksi (aman dijalankan di worker thread), return bytes"""
+        with self._writer:
+            if snapshot["accounts"]:
+                self._writer.executemany(
+                    "INSERT OR REPLACE INTO accounts (user_id, balance, bank, data) VALUES (?, ?, ?, ?)",
+                    snapshot["accounts"]
+                )
+            if snapshot["inventories"]:
+                self._writer.executemany(
+                    "INSERT OR REPLACE INTO inventories (user_id, data) VALUES (?, ?)",
+                    snapshot["inventories"]
+                )
+            if snapshot["gacha"] is not None:
+                self._writer.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('gacha_data', ?)",
+                    (snapshot["gacha"],)
+                )
+                self._gacha_text = snapshot["gacha"]
+        return (
+            sum(len(row[3]) for row in snapshot["accounts"]) +
+            sum(len(row[1]) for row in snapshot["inventories"]) +
+            len(snapshot["gacha"] or "")
+        )
+    
+    def trim_cache(self):
+        """Evict baris yang sudah tersimpan jika cache melebihi kapasitas"""
+        self.data.trim()
+        self.inventory_data.trim()
+    
+    def close(self):
+        """Tutup koneksi database"""
+        for conn in (self.conn, self._writer):
+            if conn:
+                conn.close()
+        self.conn = None
+        self._writer = None
+
+def create_storage(root="."):
+    """Buat backend storage sesuai ECONOMY_BACKEND di folder `root`"""
+    if ECONOMY_BACKEND == "sqlite":
+        return SqliteStorage(os.path.join(root, SQLITE_FILE))
+    return JsonStorage(root)
+
+# ========== ARSIP TRANSAKSI ==========
+class TransactionArchive:
+    """Arsip transaksi lama per user: segmen zlib append-only + index offset"""
+    
+    INDEX_ENTRY = struct.Struct("<QII")  # offset, panjang segmen (bytes), jumlah transaksi
+    
+    def __init__(self, directory=TX_ARCHIVE_DIR):
+        self.directory = directory
+    
+    def _paths(self, user_id):
+        """Path (file segmen, file index) milik user"""
+        folder = os.path.join(self.directory, f"{int(user_id) % 256:02x}")
+        return os.path.join(folder, f"{user_id}.log"), os.path.join(folder, f"{user_id}.idx")
+    
+    def _read_index(self, user_id):
+        """Baca index segmen user: [(offset, panjang, jumlah)]"""
+        try:
+            with open(self._paths(user_id)[1], 'rb') as f:
+                raw = f.read()
         except FileNotFoundError:
-            self.gacha_data = {}
-            
+            return []
+        usable = len(raw) - len(raw) % self.INDEX_ENTRY.size  # Abaikan entry terpotong
+        return list(self.INDEX_ENTRY.iter_unpack(raw[:usable]))
+    
+    def append(self, user_id, start, transactions):
+        """Tambah satu segmen; `start` = jumlah transaksi yang sudah diarsip sebelumnya"""
+        index = self._read_index(user_id)
+        if sum(count for _, _, count in index) > start:
+            return  # Sudah diarsip sebelum crash, terulang saat replay journal
+        
+        data_path, index_path = self._paths(user_id)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        segment = zlib.compress(json.dumps(transactions, separators=(",", ":")).encode())
+        with open(data_path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(segment)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(index_path, 'ab') as f:
+            f.truncate(len(index) * self.INDEX_ENTRY.size)  # Entry terpotong dari tulisan yang gagal
+            f.write(self.INDEX_ENTRY.pack(offset, len(segment), len(transactions)))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def read(self, user_id, skip, limit, index=None):
+        """Baca transaksi arsip urut terbaru dulu, hanya segmen yang dibutuhkan (`index` = hasil _read_index)"""
+        result = []
+        if index is None:
+            index = self._read_index(user_id)
+        if not index:
+            return result
+        
+        with open(self._paths(user_id)[0], 'rb') as f:
+            for offset, length, count in reversed(index):
+                if skip >= count:
+                    skip -= count
+                    continue
+                f.seek(offset)
+                transactions = json.loads(zlib.decompress(f.read(length)))[::-1]
+                result += [Transaction.from_json(raw) for raw in transactions[skip:skip + limit - len(result)]]
+                skip = 0
+                if len(result) >= limit:
+                    break
+        return result
+
+# ========== LEDGER EVENT ==========
+LEDGER_KINDS = ("commit", "income", "expense", "transfer_in", "transfer_out", "open", "reset", "adjust")
+LEDGER_KIND_CODES = {kind: code for code, kind in enumerate(LEDGER_KINDS)}
+LEDGER_DEBIT_KINDS = ("expense", "transfer_out")  # Tipe transaksi yang mengurangi saldo
+
+class EventLedger:
+    """Event saldo immutable per partisi: log biner append-only + checkpoint saldo berkala
+    
+    Saldo di Account adalah materialized view dari ledger ini. Saldo di titik waktu mana pun
+    direkonstruksi dari checkpoint terdekat + replay event sesudahnya (maks LEDGER_CHECKPOINT_EVERY).
+    """
+    
+    EVENT = struct.Struct("<qQqB")  # timestamp, user_id (seq journal untuk commit), delta saldo, kind
+    CHECKPOINT_MAGIC = b"ELC1"
+    CHECKPOINT_HEADER = struct.Struct("<4sQqI")  # magic, jumlah event yang dilipat, timestamp, jumlah user
+    CHECKPOINT_ENTRY = struct.Struct("<Qq")  # user_id, saldo (urut user_id)
+    CHECKPOINT_KEY = struct.Struct("<Q")
+    READ_CHUNK = 4096  # Event per pembacaan saat replay
+    
+    def __init__(self, directory=LEDGER_DIR):
+        self.directory = directory
+        self._events_path = os.path.join(directory, "events.bin")
+        self._file = None
+        self.count = 0  # Jumlah event durable (termasuk penanda commit)
+        self.journal_seq = 0  # Seq journal terakhir yang event-nya sudah ada di ledger
+        self.is_new = not (os.path.isdir(directory) and self._checkpoints())
+        if not self.is_new:
+            self._recover()
+    
+    def _checkpoint_path(self, index):
+        return os.path.join(self.directory, f"checkpoint_{index:012d}.bin")
+    
+    def _recover(self):
+        """Buang event setelah penanda commit terakhir (tulisan batch terpotong saat crash)"""
+        with open(self._events_path, 'r+b') as f:
+            count = f.seek(0, os.SEEK_END) // self.EVENT.size
+            while count:
+                f.seek((count - 1) * self.EVENT.size)
+                _, user_id, _, kind = self.EVENT.unpack(f.read(self.EVENT.size))
+                if kind == LEDGER_KIND_CODES["commit"]:
+                    self.journal_seq = user_id
+                    break
+                count -= 1
+            f.truncate(count * self.EVENT.size)
+        self.count = count
+    
+    def genesis(self, balances):
+        """Checkpoint awal dari saldo yang sudah ada sebelum ledger dibuat"""
+        os.makedirs(self.directory, exist_ok=True)
+        open(self._events_path, 'wb').close()  # Sisa genesis yang gagal dibuang
+        self._write_checkpoint(0, int(time.time()), dict(balances))
+        self.is_new = False
+    
+    def append(self, events, journal_seq=0):
+        """Tulis event satu batch + penanda commit (1 write + fsync), return True jika checkpoint jatuh tempo"""
+        if self._file is None:
+            self._file = open(self._events_path, 'ab')
+        journal_seq = max(self.journal_seq, journal_seq)
+        timestamp = events[-1][0] if events else int(time.time())
+        data = b"".join(self.EVENT.pack(*event) for event in events)
+        data += self.EVENT.pack(timestamp, journal_seq, 0, LEDGER_KIND_CODES["commit"])
+        try:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception:
+            self._discard_tail()
+            raise
+        
+        self.journal_seq = journal_seq
+        before = self.count
+        self.count += len(events) + 1
+        return self.count // LEDGER_CHECKPOINT_EVERY > before // LEDGER_CHECKPOINT_EVERY
+    
+    def _discard_tail(self):
+        """Potong tulisan batch yang gagal agar tidak ikut ter-commit oleh penanda batch berikutnya"""
+        events_file, self._file = self._file, None
+        try:
+            events_file.close()
+        except OSError:
+            pass
+        with open(self._events_path, 'r+b') as f:
+            f.truncate(self.count * self.EVENT.size)
+    
+    def _events(self, start, end):
+        """Iterasi event index [start, end) dibaca per chunk"""
+        with open(self._events_path, 'rb') as f:
+            f.seek(start * self.EVENT.size)
+            while start < end:
+                chunk = f.read(min(end - start, self.READ_CHUNK) * self.EVENT.size)
+                if not chunk:
+                    break
+                start += len(chunk) // self.EVENT.size
+                yield from self.EVENT.iter_unpack(chunk)
+    
+    def _checkpoints(self):
+        """[(jumlah event, timestamp, path)] semua checkpoint, urut"""
+        result = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith("checkpoint_") and name.endswith(".bin")):
+                continue
+            path = os.path.join(self.directory, name)
+            with open(path, 'rb') as f:
+                magic, index, timestamp, _ = self.CHECKPOINT_HEADER.unpack(f.read(self.CHECKPOINT_HEADER.size))
+            if magic == self.CHECKPOINT_MAGIC:
+                result.append((index, timestamp, path))
+        return sorted(result)
+    
+    def _write_checkpoint(self, index, timestamp, balances):
+        header = self.CHECKPOINT_HEADER.pack(self.CHECKPOINT_MAGIC, index, timestamp, len(balances))
+        atomic_write(self._checkpoint_path(index), header + b"".join(
+            self.CHECKPOINT_ENTRY.pack(user_id, balances[user_id]) for user_id in sorted(balances)
+        ))
+    
+    def _read_checkpoint(self, path):
+        """{user_id: saldo} satu checkpoint"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return dict(self.CHECKPOINT_ENTRY.iter_unpack(raw[self.CHECKPOINT_HEADER.size:]))
+    
+    def _checkpoint_balances(self, path, user_ids):
+        """{user_id: saldo} di checkpoint lewat binary search (None jika belum punya akun)"""
+        result = {}
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _, _, _, count = self.CHECKPOINT_HEADER.unpack_from(data, 0)
+            for user_id in user_ids:
+                result[user_id] = None
+                lo, hi = 0, count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    position = self.CHECKPOINT_HEADER.size + mid * self.CHECKPOINT_ENTRY.size
+                    (key,) = self.CHECKPOINT_KEY.unpack_from(data, position)
+                    if key < user_id:
+                        lo = mid + 1
+                    elif key > user_id:
+                        hi = mid
+                    else:
+                        result[user_id] = self.CHECKPOINT_ENTRY.unpack_from(data, position)[1]
+                        break
+        return result
+    
+    def recent_balances(self):
+        """{user_id: saldo menurut ledger} untuk user yang punya event sejak checkpoint terakhir"""
+        index, _, path = self._checkpoints()[-1]
+        deltas = {}
+        for _, user_id, delta, kind in self._events(index, self.count):
+            if kind != LEDGER_KIND_CODES["commit"]:
+                deltas[user_id] = deltas.get(user_id, 0) + delta
+        base = self._checkpoint_balances(path, deltas)
+        return {user_id: (base[user_id] or 0) + delta for user_id, delta in deltas.items()}
+    
+    def checkpoint(self):
+        """Lipat event sejak checkpoint terakhir jadi checkpoint baru (dijalankan di worker thread)"""
+        index, timestamp, path = self._checkpoints()[-1]
+        end = self.count
+        if end <= index:
+            return False
+        balances = self._read_checkpoint(path)
+        for timestamp, user_id, delta, kind in self._events(index, end):
+            if kind != LEDGER_KIND_CODES["commit"]:
+                balances[user_id] = balances.get(user_id, 0) + delta
+        self._write_checkpoint(end, timestamp, balances)
+        self._prune_checkpoints()
+        return True
+    
+    def _prune_checkpoints(self):
+        """Hapus checkpoint di luar LEDGER_CHECKPOINT_KEEP terakhir (yang terbaru selalu disimpan)
+        
+        Event sebelum checkpoint tertua tetap ada di events.bin (index event absolut), tapi
+        saldo sebelum checkpoint tertua tidak bisa direkonstruksi lagi lewat `balance_at`.
+        """
+        for _, _, path in self._checkpoints()[:-max(LEDGER_CHECKPOINT_KEEP, 1)]:
+            os.remove(path)
+    
+    def balance_at(self, user_id, timestamp):
+        """Saldo user pada `timestamp`: checkpoint terdekat sebelumnya + replay event sesudahnya
+        
+        Return None jika `timestamp` sebelum checkpoint tertua yang disimpan, "balance" None jika user belum punya akun.
+        """
+        checkpoints = [checkpoint for checkpoint in self._checkpoints() if checkpoint[1] <= timestamp]
+        if not checkpoints:
+            return None
+        index, checkpoint_time, path = checkpoints[-1]
         try:
-            with open(INVENTORY_FILE, 'r') as f:
-                self.inventory_data = json.load(f)
+            balance = self._checkpoint_balances(path, [user_id])[user_id]
         except FileNotFoundError:
-            self.inventory_data = {}
+            return None  # Baru saja dipangkas oleh checkpoint di worker thread lain
+        replayed = 0
+        for event_time, event_user, delta, kind in self._events(index, self.count):
+            if event_time > timestamp:
+                break
+            replayed += 1
+            if event_user == user_id and kind != LEDGER_KIND_CODES["commit"]:
+                balance = (balance or 0) + delta
+        return {"balance": balance, "checkpoint_time": checkpoint_time, "replayed": replayed}
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# ========== CACHE EMBED ==========
+class EmbedCache:
+    """Embed statis dibangun sekali, dibangun ulang hanya setelah di-invalidate"""
+    
+    def __init__(self):
+        self._embeds = {}
+    
+    def get(self, name, builder):
+        """Ambil embed dari cache, panggil `builder()` jika belum ada"""
+        embed = self._embeds.get(name)
+        if embed is None:
+            embed = self._embeds[name] = builder()
+        return embed
+    
+    def invalidate(self, *names):
+        """Buang embed tertentu (atau semua jika tanpa nama) setelah config berubah"""
+        for name in names or list(self._embeds):
+            self._embeds.pop(name, None)
+
+EMBED_CACHE = EmbedCache()
+
+# ========== GACHA POOL ==========
+GACHA_POOLS = {
+    "normal": [
+        {"name": "Koin Emas", "rarity": "common", "value": 50, "weight": 40},
+        {"name": "Permata Hijau", "rarity": "common", "value": 100, "weight": 30},
+        {"name": "Permata Biru", "rarity": "uncommon", "value": 250, "weight": 15},
+        {"name": "Permata Ungu", "rarity": "rare", "value": 500, "weight": 10},
+        {"name": "Permata Emas", "rarity": "epic", "value": 1000, "weight": 4},
+        {"name": "Kristal Legenda", "rarity": "legendary", "value": 5000, "weight": 1}
+    ],
+    "premium": [
+        {"name": "Sayap Malaikat", "rarity": "epic", "value": 2000, "weight": 20},
+        {"name": "Pedang Cahaya", "rarity": "epic", "value": 3000, "weight": 15},
+        {"name": "Mahkota Raja", "rarity": "legendary", "value": 10000, "weight": 10},
+        {"name": "Naga Api", "rarity": "mythic", "value": 50000, "weight": 5},
+        {"name": "Phoenix Abadi", "rarity": "mythic", "value": 75000, "weight": 5},
+        {"name": "Titan Essence", "rarity": "divine", "value": 150000, "weight": 1}
+    ]
+}
+GACHA_COSTS = {"normal": 100, "premium": 500}
+GACHA_MAX_PULLS = 10  # Maksimal tarikan dalam satu command
+GACHA_LOG_FILE = os.getenv("GACHA_LOG_FILE")  # Log per tarikan (opsional), kosong = nonaktif
+
+class GachaPool:
+    """Pool gacha yang dikompilasi jadi alias table (Walker/Vose), sampling O(1)"""
+    
+    def __init__(self, items):
+        self.items = items
+        n = len(items)
+        total_weight = sum(item["weight"] for item in items)
+        scaled = [item["weight"] * n / total_weight for item in items]
+        
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._prob[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # Sisa (akibat pembulatan float) peluangnya dianggap 1
+    
+    def sample(self):
+        """Ambil satu item sesuai bobot"""
+        i = random.randrange(len(self.items))
+        return self.items[i] if random.random() < self._prob[i] else self.items[self._alias[i]]
+    
+    def sample_many(self, count):
+        """Ambil `count` item sekaligus"""
+        return [self.sample() for _ in range(count)]
+
+# Dikompilasi sekali saat start, bukan setiap command
+COMPILED_GACHA_POOLS = {gacha_type: GachaPool(items) for gacha_type, items in GACHA_POOLS.items()}
+
+def update_gacha_config(pools=None, costs=None):
+    """Ganti pool/harga gacha saat runtime: kompilasi ulang alias table dan embed gachainfo"""
+    if pools is not None:
+        GACHA_POOLS.clear()
+        GACHA_POOLS.update(pools)
+        COMPILED_GACHA_POOLS.clear()
+        COMPILED_GACHA_POOLS.update({gacha_type: GachaPool(items) for gacha_type, items in pools.items()})
+    if costs is not None:
+        GACHA_COSTS.clear()
+        GACHA_COSTS.update(costs)
+    EMBED_CACHE.invalidate("gachainfo")
+
+# ========== METRICS ==========
+class Metric:
+    """Dasar metric Prometheus: nilai per kombinasi label"""
+    
+    TYPE = None
+    
+    def __init__(self, name, help_text, labels=(), func=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}  # {(nilai label, ...): nilai}
+        self._func = func  # Jika ada, nilai dibaca saat scrape ({nilai label: nilai} jika ada label)
+    
+    def _key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+    
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labels, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{label}="{value}"' for label, value in pairs) + "}"
+    
+    def samples(self):
+        """[(nama, label, nilai)] untuk dirender"""
+        if self._func is not None:
+            if not self.labels:
+                return [(self.name, "", self._func())]
+            return [
+                (self.name, self._format_labels(tuple(map(str, key if isinstance(key, tuple) else (key,)))), value)
+                for key, value in self._func().items()
+            ]
+        return [(self.name, self._format_labels(key), value) for key, value in self._values.items()]
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+        lines += [f"{name}{labels} {value}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """Nilai yang hanya bertambah"""
+    
+    TYPE = "counter"
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Nilai sesaat (di-set, atau dibaca lewat fungsi saat scrape)"""
+    
+    TYPE = "gauge"
+    
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    """Distribusi nilai dalam bucket kumulatif"""
+    
+    TYPE = "histogram"
+    
+    def __init__(self, name, help_text, labels=(), buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+    
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        counts = self._values.get(key)
+        if counts is None:
+            counts = self._values[key] = [0] * len(self.buckets) + [0, 0]  # bucket..., count, sum
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += 1
+        counts[-1] += value
+    
+    def samples(self):
+        result = []
+        for key, counts in self._values.items():
+            for bound, count in zip(self.buckets, counts):
+                result.append((f"{self.name}_bucket", self._format_labels(key, ("le", bound)), count))
+            result.append((f"{self.name}_bucket", self._format_labels(key, ("le", "+Inf")), counts[-2]))
+            result.append((f"{self.name}_count", self._format_labels(key), counts[-2]))
+            result.append((f"{self.name}_sum", self._format_labels(key), counts[-1]))
+        return result
+
+class MetricsRegistry:
+    """Kumpulan metric, dirender dalam format teks Prometheus"""
+    
+    def __init__(self):
+        self.metrics = []
+    
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+METRICS = MetricsRegistry()
+COMMAND_INVOCATIONS = METRICS.register(Counter("bot_command_invocations_total", "Jumlah command dijalankan", ("command",)))
+COMMAND_LATENCY = METRICS.register(Histogram("bot_command_duration_seconds", "Lama eksekusi command", ("command",)))
+COMMAND_COOLDOWN_REJECTIONS = METRICS.register(Counter("bot_command_cooldown_rejections_total", "Command ditolak karena cooldown", ("command",)))
+SAVE_DURATION = METRICS.register(Histogram("economy_save_duration_seconds", "Lama snapshot + tulis data ekonomi (total)"))
+SAVE_LOOP_STALL = METRICS.register(Histogram(
+    "economy_save_loop_stall_seconds", "Lama event loop tertahan saat snapshot save",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+))
+SAVE_BYTES = METRICS.register(Counter("economy_save_bytes_total", "Total bytes yang ditulis saat save"))
+SAVE_RESULTS = METRICS.register(Counter("economy_saves_total", "Hasil save data ekonomi", ("result",)))
+TX_LIST_SIZE = METRICS.register(Histogram(
+    "economy_transaction_list_size", "Panjang hot window transaksi user setelah dicatat",
+    buckets=(1, 5, 10, 25, 50, TX_HOT_LIMIT + TX_ARCHIVE_BATCH)
+))
+
+# ========== PROFILING ==========
+class CommandProfiler:
+    """cProfile on-demand + waktu per command, saat nonaktif hanya cek 1 flag"""
+    
+    def __init__(self):
+        self.active = False
+        self.started_at = None
+        self.timings = {}  # {nama command: [jumlah, total detik, maks detik]}
+        self._profile = None
+    
+    def start(self):
+        """Mulai sesi profiling baru (data sesi sebelumnya dibuang)"""
+        if self.active:
+            return False
+        self._profile = cProfile.Profile()
+        self.timings = {}
+        self.started_at = time.time()
+        self._profile.enable()
+        self.active = True
+        return True
+    
+    def stop(self):
+        """Hentikan profiling, data tetap ada untuk dump"""
+        if not self.active:
+            return False
+        self._profile.disable()
+        self.active = False
+        return True
+    
+    def record(self, name, seconds):
+        """Catat satu eksekusi command/save"""
+        entry = self.timings.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+    
+    def top_functions(self, limit=PROFILE_TOP_N, path=None):
+        """[(cumulative, total, calls, fungsi)] urut waktu kumulatif terbesar, dari file dump jika ada"""
+        if path is not None:
+            stats = pstats.Stats(path).stats
+        else:
+            stats = pstats.Stats(self._profile).stats  # create_stats() menonaktifkan profiler
+            if self.active:
+                self._profile.enable()
+        rows = [
+            (cumulative, total, calls, f"{func} ({os.path.basename(filename)}:{line})")
+            for (filename, line, func), (_, calls, total, cumulative, _) in stats.items()
+        ]
+        return sorted(rows, reverse=True)[:limit]
+    
+    def top_commands(self, limit=PROFILE_TOP_N):
+        """[(nama, jumlah, total detik, maks detik)] urut total waktu terbesar"""
+        rows = [(name, count, total, worst) for name, (count, total, worst) in self.timings.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+    
+    def dump(self):
+        """Tulis data profiling ke file .pstats, return path (None jika belum pernah start)"""
+        if self._profile is None:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"profile_{int(time.time())}.pstats")
+        self._profile.dump_stats(path)  # dump_stats menonaktifkan profiler
+        if self.active:
+            self._profile.enable()
+        return path
+
+PROFILER = CommandProfiler()
+
+# ========== EKONOMI VIRTUAL ==========
+class MutationRejected(Exception):
+    """Mutasi ditolak saat diterapkan oleh writer (saldo/item tidak cukup)"""
+
+class EconomySystem:
+    def __init__(self, storage=None, tx_archive=None, root=".", event_ledger=None):
+        self.storage = storage or create_storage(root)
+        self.tx_archive = tx_archive or TransactionArchive(os.path.join(root, TX_ARCHIVE_DIR))
+        self.event_ledger = event_ledger or EventLedger(os.path.join(root, LEDGER_DIR))
+        self._pending_events = []  # Event saldo yang belum ditulis ke ledger
+        self._unpublished = []  # Event batch yang sudah commit tapi gagal masuk ledger (diulang)
+        self._pending_archive = []  # (user_id, start, [Transaction]) menunggu batch-nya commit
+        self._unarchived = []  # Segmen batch yang sudah commit tapi belum tertulis ke arsip (sedang ditulis / diulang)
+        self._events_muted = False  # Replay journal yang event-nya sudah ada di ledger
+        self._event_clock = 0  # Timestamp event terakhir (event di ledger tidak pernah mundur)
+        self._checkpoint_task = None
+        self.data = {}
+        self.gacha_data = {}
+        self.inventory_data = {}
+        self._save_timer = None
+        self._pending_save = False
+        self._dirty = {"economy": set(), "inventory": set()}  # User yang berubah sejak save terakhir
+        self._saving = {"economy": set(), "inventory": set()}  # User yang sedang ditulis worker thread
+        self._save_lock = asyncio.Lock()
+        self._journal_lock = asyncio.Lock()  # Snapshot tidak boleh menyela batch yang belum ter-journal
+        self._ledger_queue = asyncio.Queue()  # (record, future) menunggu writer
+        self._ledger_task = None
+        self.ledger_stats = {
+            "batches": 0,
+            "records": 0,
+            "rejected": 0,
+            "max_batch": 0,
+            "last_commit_ms": 0.0  # Lama apply + journal (write + fsync) batch terakhir
+        }
+        self.save_stats = {
+            "saves": 0,
+            "skipped": 0,
+            "errors": 0,
+            "last_stall_ms": 0.0,  # Lama event loop tertahan saat snapshot
+            "max_stall_ms": 0.0,
+            "last_write_ms": 0.0,  # Lama serialisasi + tulis di worker thread
+            "last_bytes": 0,
+            "last_save_time": None
+        }
+        self._wealth = None  # {user_id: total_wealth} posisi terakhir di index (dibangun saat pertama dipakai)
+        self._rank_index = SortedList()  # [(-total_wealth, user_id)]
+        self.load_data()
+    
+    def load_data(self):
+        """Load semua data dari storage lalu replay journal"""
+        pinned = {store: (self._dirty[store], self._saving[store]) for store in self._dirty}
+        self.data, self.gacha_data, self.inventory_data, records = self.storage.load(pinned)
+        
+        self._wealth = None  # Index peringkat dibangun saat leaderboard pertama kali diminta
+        ledger = self.event_ledger
+        for record in records:
+            self._events_muted = ledger.is_new or record.get("s", 0) <= ledger.journal_seq
+            self._apply(record)
+        self._events_muted = False
+        for segment in self._take_archive():
+            self.tx_archive.append(*segment)  # Idempoten: segmen yang sudah ada dilewati
+        
+        if ledger.is_new:
+            ledger.genesis(self._iter_balance())
+        else:
+            if self._pending_events:
+                # Journal sudah durable tapi event-nya belum sempat masuk ledger sebelum crash
+                ledger.append(self._take_events(), max(record.get("s", 0) for record in records))
+            self._verify_ledger()
+    
+    def _verify_ledger(self):
+        """Cocokkan ledger dengan saldo tersimpan untuk user yang berubah sejak checkpoint terakhir
+        
+        Selisih dicatat sebagai event "adjust" agar `.audit` berikutnya kembali sesuai saldo nyata.
+        """
+        for user_id, balance in self.event_ledger.recent_balances().items():
+            account = self.data.get(user_id)
+            actual = account.balance if account is not None else 0
+            if actual != balance:
+                self._emit(user_id, "adjust", actual - balance)
+        if self._pending_events:
+            print(f"⚠️ Ledger tidak cocok dengan saldo tersimpan untuk {len(self._pending_events)} user, event koreksi ditambahkan")
+            self.event_ledger.append(self._take_events(), self.event_ledger.journal_seq)
+    
+    def _rebuild_rank_index(self):
+        """Bangun ulang index peringkat kekayaan dari seluruh data"""
+        self._wealth = dict(self.storage.iter_wealth())
+        for user_id in self._dirty["economy"] | self._saving["economy"]:
+            self._wealth[user_id] = self.data[user_id].wealth  # Baris yang belum tersimpan
+        self._rank_index = SortedList((-wealth, user_id) for user_id, wealth in self._wealth.items())
+    
+    def _iter_balance(self):
+        """Saldo semua akun saat ini (untuk checkpoint genesis ledger)"""
+        balances = dict(self.storage.iter_balance())
+        for user_id in self._dirty["economy"] | self._saving["economy"]:
+            balances[user_id] = self.data[user_id].balance  # Baris yang belum tersimpan
+        return balances.items()
+    
+    def _ensure_rank_index(self):
+        if self._wealth is None:
+            self._rebuild_rank_index()
+    
+    def _update_rank(self, user_id, account):
+        """Perbarui posisi user di index peringkat (O(log n))"""
+        if self._wealth is None:
+            return  # Belum dibangun, nanti dibaca langsung dari data
+        wealth = account.wealth
+        old_wealth = self._wealth.get(user_id)
+        if old_wealth == wealth:
+            return
+        if old_wealth is not None:
+            self._rank_index.remove((-old_wealth, user_id))
+        self._wealth[user_id] = wealth
+        self._rank_index.add((-wealth, user_id))
+    
+    def _drop_rank(self, user_id):
+        """Keluarkan user dari index peringkat (akun dibatalkan)"""
+        if self._wealth is None or user_id not in self._wealth:
+            return
+        self._rank_index.remove((-self._wealth.pop(user_id), user_id))
+    
+    def get_top_wealth(self, limit=10):
+        """Dapatkan [(user_id, total_wealth)] teratas tanpa scan semua akun"""
+        self._ensure_rank_index()
+        return [(user_id, -neg_wealth) for neg_wealth, user_id in self._rank_index.islice(0, limit)]
+    
+    def get_wealth_rank(self, user_id):
+        """Dapatkan peringkat kekayaan user (1 = terkaya)"""
+        wealth = self.get_user_data(user_id).wealth
+        self._ensure_rank_index()
+        return self._rank_index.bisect_left((-wealth, int(user_id))) + 1
     
     def schedule_save(self):
         """Jadwalkan save data (debounced)"""
@@ -92,190 +1655,1440 @@ class EconomySystem:
         """Delay save untuk mengurangi I/O"""
         await asyncio.sleep(10)  # Tunggu 10 detik sebelum save
         self._pending_save = False
-        self._force_save()
+        await self.save()
+    
+    def _take_snapshot(self):
+        """Ambil snapshot konsisten di event loop dan ukur lama loop tertahan"""
+        start = time.perf_counter()
+        for store, user_ids in self._dirty.items():
+            self._saving[store] |= user_ids
+            user_ids.clear()
+        snapshot = self.storage.snapshot(self._saving)
+        
+        stall_ms = (time.perf_counter() - start) * 1000
+        SAVE_LOOP_STALL.observe(stall_ms / 1000)
+        self.save_stats["last_stall_ms"] = stall_ms
+        self.save_stats["max_stall_ms"] = max(self.save_stats["max_stall_ms"], stall_ms)
+        return snapshot
+    
+    def _finish_save(self, written, write_start):
+        """Catat hasil save yang berhasil"""
+        for user_ids in self._saving.values():
+            user_ids.clear()
+        self.storage.trim_cache()
+        self.save_stats["saves"] += 1
+        self.save_stats["last_write_ms"] = (time.perf_counter() - write_start) * 1000
+        self.save_stats["last_bytes"] = written
+        self.save_stats["last_save_time"] = time.time()
+        SAVE_DURATION.observe((self.save_stats["last_stall_ms"] + self.save_stats["last_write_ms"]) / 1000)
+        if PROFILER.active:
+            PROFILER.record("economy.save", (self.save_stats["last_stall_ms"] + self.save_stats["last_write_ms"]) / 1000)
+        SAVE_BYTES.inc(written)
+        SAVE_RESULTS.inc(result="ok")
+    
+    def _skip_save(self):
+        """Tidak ada store yang berubah, tidak ada file yang ditulis"""
+        for user_ids in self._saving.values():
+            user_ids.clear()
+        self.save_stats["skipped"] += 1
+        SAVE_RESULTS.inc(result="skipped")
+    
+    def _abort_save(self, error):
+        """Save gagal: kembalikan user ke dirty agar ditulis di save berikutnya"""
+        for store, user_ids in self._saving.items():
+            self._dirty[store] |= user_ids
+            user_ids.clear()
+        self.save_stats["errors"] += 1
+        SAVE_RESULTS.inc(result="error")
+        print(f"❌ Gagal save data: {error}")
+    
+    async def save(self):
+        """Save data: snapshot di event loop, serialisasi + tulis di worker thread"""
+        async with self._save_lock:
+            async with self._journal_lock:
+                snapshot = self._take_snapshot()
+            if snapshot is None:
+                self._skip_save()
+                return True
+            write_start = time.perf_counter()
+            try:
+                written = await asyncio.to_thread(self.storage.write, snapshot)
+            except Exception as e:
+                self._abort_save(e)
+                return False
+            self._finish_save(written, write_start)
+            return True
+    
+    def _force_save(self):
+        """Save data langsung di thread ini (digunakan saat event loop sudah berhenti)"""
+        if self._unpublished or self._unarchived:
+            self._write_published(self._unpublished, self._unarchived, 0)
+            self._unpublished, self._unarchived = [], []
+        snapshot = self._take_snapshot()
+        if snapshot is None:
+            self._skip_save()
+            return True
+        write_start = time.perf_counter()
+        try:
+            written = self.storage.write(snapshot)
+        except Exception as e:
+            self._abort_save(e)
+            return False
+        self._finish_save(written, write_start)
+        return True
+    
+    def _touch(self, store, user_id):
+        """Tandai data user di store tertentu sudah berubah"""
+        self._dirty[store].add(user_id)
+    
+    async def _submit(self, record):
+        """Kirim mutasi ke writer, tunggu sampai batch-nya durable lalu return hasilnya"""
+        if self._ledger_task is None or self._ledger_task.done():
+            self._ledger_task = asyncio.create_task(self._ledger_writer())
+        future = asyncio.get_running_loop().create_future()
+        await self._ledger_queue.put((record, future))
+        return await future
+    
+    async def _ledger_writer(self):
+        """Satu-satunya task penulis: ambil semua mutasi yang antre sebagai satu batch"""
+        while True:
+            batch = [await self._ledger_queue.get()]
+            while len(batch) < LEDGER_BATCH_MAX and not self._ledger_queue.empty():
+                batch.append(self._ledger_queue.get_nowait())
+            try:
+                await self._commit_batch(batch)
+            except Exception as e:
+                # Writer tetap hidup; pemanggil yang belum dijawab tidak boleh menunggu selamanya
+                print(f"❌ Batch mutasi gagal: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._ledger_queue.task_done()
+    
+    async def _commit_batch(self, batch):
+        """Terapkan batch, commit sekali (journal 1 write + fsync, atau save SQLite), lalu resolve future pemanggil
+        
+        Commit gagal = semua record batch dibatalkan di memori dan event-nya dibuang, jadi pemanggil
+        yang menerima error tidak pernah melihat mutasinya muncul lagi setelah save atau restart.
+        """
+        start = time.perf_counter()
+        applied = []
+        undo = {}  # {(store, user_id): salinan sebelum batch, None jika record belum ada}
+        async with self._journal_lock:
+            for record, future in batch:
+                record_undo = {}
+                marks = len(self._pending_events), len(self._pending_archive)
+                try:
+                    record_undo = self._capture(record)
+                    result = self._apply(record)
+                except Exception as e:
+                    self._rollback(record_undo)
+                    del self._pending_events[marks[0]:]
+                    del self._pending_archive[marks[1]:]
+                    self.ledger_stats["rejected"] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                for key, saved in record_undo.items():
+                    undo.setdefault(key, saved)
+                applied.append((record, future, result))
+            if not applied:
+                return
+            
+            records = [record for record, _, _ in applied]
+            events, archive = self._take_events(), self._take_archive()
+            needs_save = False
+            if self.storage.JOURNALED:
+                try:
+                    needs_save = await asyncio.to_thread(self.storage.append, records)
+                except Exception as e:
+                    self._fail_batch(applied, undo, e)
+                    return
+        
+        if not self.storage.JOURNALED:
+            # SQLite: batch durable setelah baris dirty tertulis dalam satu transaksi
+            try:
+                if not await self.save():
+                    raise RuntimeError("Batch tidak tersimpan ke database")
+            except Exception as e:
+                self._fail_batch(applied, undo, e)
+                return
+        
+        # Sudah durable: mulai di sini pemanggil selalu menerima hasilnya
+        self.ledger_stats["batches"] += 1
+        self.ledger_stats["records"] += len(records)
+        self.ledger_stats["max_batch"] = max(self.ledger_stats["max_batch"], len(batch))
+        self.ledger_stats["last_commit_ms"] = (time.perf_counter() - start) * 1000
+        for _, future, result in applied:
+            if not future.done():
+                future.set_result(result)
+        
+        if needs_save:
+            self.schedule_save()
+        journal_seq = max(record.get("s", 0) for record in records)
+        if await self._publish(events, archive, journal_seq):
+            self._schedule_checkpoint()
+    
+    def _fail_batch(self, applied, undo, error):
+        """Commit gagal: batalkan record batch di memori, buang event + segmen arsipnya, gagalkan future pemanggil"""
+        print(f"❌ Gagal commit batch: {error}")
+        self._rollback(undo)
+        for _, future, _ in applied:
+            if not future.done():
+                future.set_exception(error)
+    
+    def _affected(self, record):
+        """[(store, user_id)] yang diubah `record`"""
+        op = record["op"]
+        if op == "transfer":
+            return [("economy", int(record["from"])), ("economy", int(record["to"]))]
+        if "us" in record:
+            return [("economy", user_id) for user_id in record["us"]]
+        return [(store, int(record["u"])) for store in JOURNAL_OPS[op]]
+    
+    def _capture(self, record):
+        """Salinan record yang akan diubah `record` sebelum diterapkan (untuk rollback)"""
+        undo = {}
+        for store, user_id in self._affected(record):
+            current = (self.data if store == "economy" else self.inventory_data).get(user_id)
+            undo.setdefault((store, user_id), None if current is None else current.copy())
+        return undo
+    
+    def _rollback(self, undo):
+        """Kembalikan record ke salinan `_capture`; record yang baru dibuat dibuang lagi"""
+        for (store, user_id), saved in undo.items():
+            records = self.data if store == "economy" else self.inventory_data
+            if saved is None:
+                records.pop(user_id, None)
+                self._dirty[store].discard(user_id)
+                if store == "economy":
+                    self._drop_rank(user_id)
+                continue
+            current = records.get(user_id)
+            if current is None:
+                current = records[user_id] = saved
+            else:
+                current.restore(saved)
+            if store == "economy":
+                self._update_rank(user_id, current)
+    
+    async def _publish(self, events, archive, journal_seq):
+        """Tulis segmen arsip + event ledger batch yang sudah commit, return True jika checkpoint jatuh tempo
+        
+        Batch sudah durable, jadi kegagalan di sini tidak menggagalkan pemanggil: sisanya disimpan
+        dan diulang bersama batch berikutnya (replay journal saat start juga memulihkannya).
+        """
+        events = self._unpublished + events
+        self._unarchived = archive = self._unarchived + archive  # Tetap terbaca get_transactions selama ditulis
+        if not events and not archive:
+            return False
+        try:
+            checkpoint_due = await asyncio.to_thread(self._write_published, events, archive, journal_seq)
+        except Exception as e:
+            print(f"⚠️ Gagal menulis arsip/ledger, diulang di batch berikutnya: {e}")
+            self._unpublished = events
+            return False
+        self._unpublished, self._unarchived = [], []
+        return checkpoint_due
+    
+    def _write_published(self, events, archive, journal_seq):
+        """Worker thread: segmen arsip dulu (idempoten saat diulang), lalu event ledger"""
+        for segment in archive:
+            self.tx_archive.append(*segment)
+        if not events:
+            return False
+        # Penanda commit menyimpan seq journal agar replay saat start tidak menggandakan event
+        return self.event_ledger.append(events, journal_seq)
+    
+    def _emit(self, user_id, kind, delta):
+        """Catat event saldo, ditulis ke ledger bersama batch berikutnya"""
+        if self._events_muted:
+            return
+        self._event_clock = max(self._event_clock, int(time.time()))
+        self._pending_events.append((self._event_clock, user_id, delta, LEDGER_KIND_CODES[kind]))
+    
+    def _take_events(self):
+        events, self._pending_events = self._pending_events, []
+        return events
+    
+    def _take_archive(self):
+        archive, self._pending_archive = self._pending_archive, []
+        return archive
+    
+    def _schedule_checkpoint(self):
+        """Buat checkpoint saldo di background (satu per waktu)"""
+        if self._checkpoint_task is None or self._checkpoint_task.done():
+            self._checkpoint_task = asyncio.create_task(self._checkpoint())
+    
+    async def _checkpoint(self):
+        try:
+            await asyncio.to_thread(self.event_ledger.checkpoint)
+        except Exception as e:
+            print(f"❌ Gagal membuat checkpoint ledger: {e}")
+    
+    async def drain(self):
+        """Tunggu semua mutasi yang antre selesai di-commit"""
+        await self._ledger_queue.join()
+        if self._unpublished or self._unarchived:
+            async with self._journal_lock:
+                await self._publish([], [], 0)
+    
+    def _apply(self, record):
+        """Terapkan satu record mutasi ke data in-memory"""
+        op = record["op"]
+        
+        # Tandai dirty sebelum baris diambil agar tidak ter-evict dari cache
+        # (journal format lama menyimpan user_id sebagai string dan timestamp ISO)
+        for store, user_id in self._affected(record):
+            self._touch(store, user_id)
+        if op == "transfer":
+            from_id, to_id = int(record["from"]), int(record["to"])
+        elif "us" in record:
+            user_ids = record["us"]  # Mutasi bulk: satu record untuk banyak user
+        else:
+            user_id = int(record["u"])
+        
+        if op == "add":
+            return self._credit(user_id, record["a"], record["r"], to_epoch(record["t"]))
+        
+        if op == "add_bulk":
+            timestamp = to_epoch(record["t"])
+            return {user_id: self._credit(user_id, record["a"], record["r"], timestamp) for user_id in user_ids}
+        
+        if op == "remove":
+            account = self._account(user_id)
+            if account.balance < record["a"]:
+                raise MutationRejected("Saldo tidak cukup")
+            account.balance -= record["a"]
+            account.total_spent += record["a"]
+            self._record_transaction(user_id, account, Transaction("expense", record["a"], record["r"], to_epoch(record["t"])))
+            self._update_rank(user_id, account)
+            return account.balance
+        
+        if op == "transfer":
+            from_user = self._account(from_id)
+            to_user = self._account(to_id)
+            if from_user.balance < record["a"]:
+                raise MutationRejected("Saldo tidak cukup")
+            from_user.balance -= record["a"]
+            to_user.balance += record["a"]
+            from_user.total_spent += record["a"]
+            to_user.total_earned += record["a"]
+            timestamp = to_epoch(record["t"])
+            self._record_transaction(from_id, from_user, Transaction("transfer_out", record["a"], to_id, timestamp))
+            self._record_transaction(to_id, to_user, Transaction("transfer_in", record["a"], from_id, timestamp))
+            self._update_rank(from_id, from_user)
+            self._update_rank(to_id, to_user)
+            return from_user.balance
+        
+        if op == "xp":
+            return self._gain_xp(user_id, record["a"], to_epoch(record.get("t")))
+        
+        if op == "xp_bulk":
+            timestamp = to_epoch(record.get("t"))
+            return {user_id: self._gain_xp(user_id, record["a"], timestamp) for user_id in user_ids}
+        
+        if op == "set":
+            self._account(user_id).update(record["f"])
+            return None
+        
+        if op == "reset":
+            # Arsip transaksi lama tetap ada, lanjutkan penomorannya
+            old_account = self._account(user_id)
+            account = self._new_user_data(user_id)
+            account.tx_archived = old_account.tx_archived
+            self._emit(user_id, "reset", account.balance - old_account.balance)
+            return old_account.balance
+        
+        if op == "item":
+            items = self._inventory(user_id).items
+            if items.get(record["i"], 0) + record["q"] < 0:
+                raise MutationRejected("Item tidak cukup")
+            items[record["i"]] = items.get(record["i"], 0) + record["q"]
+            if items[record["i"]] <= 0:
+                del items[record["i"]]
+            return items.get(record["i"], 0)
+        
+        if op == "gacha_pull":
+            account = self._account(user_id)
+            if account.balance < record["c"]:
+                raise MutationRejected("Saldo tidak cukup")
+            self._inventory(user_id).add_gacha_items(record["i"])
+            total_value = sum(value for _, _, value in record["i"])
+            timestamp = to_epoch(record["t"])
+            
+            # Item otomatis dijual: biaya dan nilai item dicatat dalam satu mutasi
+            account.balance += total_value - record["c"]
+            account.total_spent += record["c"]
+            account.total_earned += total_value
+            self._record_transaction(user_id, account, Transaction("expense", record["c"], f"Gacha {record['g']} x{len(record['i'])}", timestamp))
+            self._record_transaction(user_id, account, Transaction("income", total_value, f"Gacha Item Value x{len(record['i'])}", timestamp))
+            self._update_rank(user_id, account)
+            return account.balance
+        
+        if op == "gacha":
+            self._inventory(user_id).add_gacha_items([(record["n"], record["r"], record["v"])])
+            return None
+        
+        raise ValueError(f"Operasi journal tidak dikenal: {op}")
+    
+    def _credit(self, user_id, amount, reason, timestamp):
+        """Tambah saldo + catat transaksi income, return saldo baru"""
+        account = self._account(user_id)
+        account.balance += amount
+        account.total_earned += amount
+        self._record_transaction(user_id, account, Transaction("income", amount, reason, timestamp))
+        self._update_rank(user_id, account)
+        return account.balance
+    
+    def _gain_xp(self, user_id, amount, timestamp=None):
+        """Tambah XP, naikkan level + bonus koin (dicatat sebagai transaksi), return jumlah level up"""
+        account = self._account(user_id)
+        account.xp += amount
+        
+        # Check level up
+        required_xp = account.level * 100
+        level_ups = 0
+        
+        while account.xp >= required_xp:
+            account.xp -= required_xp
+            account.level += 1
+            level_ups += 1
+            required_xp = account.level * 100
+            
+            # Beri bonus level up
+            bonus = account.level * 100
+            account.balance += bonus
+            account.total_earned += bonus
+            self._record_transaction(user_id, account, Transaction("income", bonus, f"Level Up Bonus (Level {account.level})", timestamp or int(time.time())))
+        
+        if level_ups:
+            self._update_rank(user_id, account)
+        return level_ups
+    
+    def _record_transaction(self, user_id, account, transaction):
+        """Catat transaksi di hot window, transaksi lama ditulis ke arsip setelah batch-nya commit"""
+        self._emit(user_id, transaction.type, -transaction.amount if transaction.type in LEDGER_DEBIT_KINDS else transaction.amount)
+        transactions = account.transactions
+        transactions.append(transaction)
+        TX_LIST_SIZE.observe(len(transactions))
+        if len(transactions) < TX_HOT_LIMIT + TX_ARCHIVE_BATCH:
+            return
+        
+        excess = len(transactions) - TX_HOT_LIMIT
+        start = account.tx_archived
+        self._pending_archive.append((user_id, start, transactions[:excess]))
+        del transactions[:excess]
+        account.tx_archived = start + excess
+    
+    def get_transactions(self, user_id, skip=0, limit=HISTORY_PAGE_SIZE):
+        """Dapatkan transaksi urut terbaru dulu, return (transaksi, total)"""
+        account = self.get_user_data(user_id)
+        recent = account.transactions[::-1]
+        total = len(recent) + account.tx_archived
+        
+        result = recent[skip:skip + limit]
+        if len(result) < limit:
+            # Segmen yang belum tertulis ke file arsip adalah bagian arsip yang terbaru
+            index = self.tx_archive._read_index(user_id)
+            on_disk = sum(count for _, _, count in index)
+            pending = [
+                transaction for owner, start, segment in self._unarchived + self._pending_archive
+                if owner == int(user_id) and start >= on_disk for transaction in segment
+            ][::-1]
+            archive_skip = max(skip - len(recent), 0)
+            result += pending[archive_skip:archive_skip + limit - len(result)]
+            if len(result) < limit:
+                result += self.tx_archive.read(user_id, max(archive_skip - len(pending), 0), limit - len(result), index)
+        return result, total
+    
+    def _new_user_data(self, user_id):
+        """Buat data awal user (juga dipakai saat reset)"""
+        self._touch("economy", user_id)
+        account = self.data[user_id] = Account()
+        self._update_rank(user_id, account)
+        return account
+    
+    def _account(self, user_id):
+        """Akun user untuk writer; dibuat (event "open") jika belum ada, ikut journal lewat record mutasinya"""
+        account = self.data.get(user_id)
+        if account is None:
+            account = self._new_user_data(user_id)
+            self._emit(user_id, "open", account.balance)
+        return account
+    
+    def get_user_data(self, user_id):
+        """Dapatkan data user; user yang belum punya akun dapat data awal sementara (tidak disimpan)"""
+        account = self.data.get(int(user_id))
+        return account if account is not None else Account()
+    
+    def _inventory(self, user_id):
+        """Inventory user untuk writer; dibuat jika belum ada, ikut journal lewat record mutasinya"""
+        inventory = self.inventory_data.get(user_id)
+        if inventory is None:
+            inventory = self.inventory_data[user_id] = Inventory()
+        return inventory
+    
+    def get_inventory(self, user_id):
+        """Dapatkan inventory user; user yang belum punya inventory dapat inventory kosong sementara (tidak disimpan)"""
+        inventory = self.inventory_data.get(int(user_id))
+        return inventory if inventory is not None else Inventory()
+    
+    async def add_money(self, user_id, amount, reason="Tidak diketahui"):
+        """Tambahkan uang ke user, return saldo baru"""
+        return await self._submit({
+            "op": "add",
+            "u": int(user_id),
+            "a": amount,
+            "r": reason,
+            "t": int(time.time())
+        })
+    
+    async def remove_money(self, user_id, amount, reason="Tidak diketahui"):
+        """Kurangi uang dari user"""
+        if self.get_user_data(user_id).balance < amount:
+            return False
+        
+        # Saldo dicek ulang oleh writer, mutasi lain bisa masuk lebih dulu
+        try:
+            await self._submit({
+                "op": "remove",
+                "u": int(user_id),
+                "a": amount,
+                "r": reason,
+                "t": int(time.time())
+            })
+        except MutationRejected:
+            return False
+        return True
+    
+    async def transfer_money(self, from_id, to_id, amount):
+        """Transfer uang antar user"""
+        if self.get_user_data(from_id).balance < amount:
+            return False, "Saldo tidak cukup"
+        
+        try:
+            await self._submit({
+                "op": "transfer",
+                "from": int(from_id),
+                "to": int(to_id),
+                "a": amount,
+                "t": int(time.time())
+            })
+        except MutationRejected as e:
+            return False, str(e)
+        return True, "Transfer berhasil"
+    
+    async def add_xp(self, user_id, xp_amount):
+        """Tambahkan XP ke user, return jumlah level up"""
+        return await self._submit({"op": "xp", "u": int(user_id), "a": xp_amount, "t": int(time.time())})
+    
+    async def add_money_bulk(self, user_ids, amount, reason="Tidak diketahui"):
+        """Tambahkan uang ke banyak user dalam satu mutasi, return {user_id: saldo baru}"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        if not user_ids:
+            return {}
+        return await self._submit({
+            "op": "add_bulk",
+            "us": user_ids,
+            "a": amount,
+            "r": reason,
+            "t": int(time.time())
+        })
+    
+    async def add_xp_bulk(self, user_ids, xp_amount):
+        """Tambahkan XP ke banyak user dalam satu mutasi, return {user_id: jumlah level up}"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        if not user_ids:
+            return {}
+        return await self._submit({"op": "xp_bulk", "us": user_ids, "a": xp_amount, "t": int(time.time())})
+    
+    async def balance_at(self, user_id, timestamp):
+        """Rekonstruksi saldo user pada `timestamp` dari ledger event (None jika sebelum ledger dibuat)"""
+        return await asyncio.to_thread(self.event_ledger.balance_at, int(user_id), int(timestamp))
+    
+    def get_daily_streak(self, user_id, now=None):
+        """Dapatkan daily streak, streak hangus dihitung 0 saat dibaca (tanpa scan harian)"""
+        account = self.get_user_data(user_id)
+        if account.daily_streak and account.last_daily:
+            if ((now or time.time()) - account.last_daily) // 86400 > DAILY_STREAK_EXPIRY_DAYS:
+                return 0  # Nilai tersimpan ditimpa saat daily berikutnya
+        return account.daily_streak
+    
+    async def update_user(self, user_id, **fields):
+        """Ubah field data user (last_daily, daily_streak, dll)"""
+        await self._submit({"op": "set", "u": int(user_id), "f": fields})
+    
+    async def reset_user(self, user_id):
+        """Reset ekonomi user ke kondisi awal, return saldo lama (None jika tidak ada)"""
+        if self.data.get(int(user_id)) is None:
+            return None
+        return await self._submit({"op": "reset", "u": int(user_id)})
+    
+    async def add_to_inventory(self, user_id, item_name, quantity=1):
+        """Tambahkan item ke inventory (quantity negatif untuk mengurangi), None jika item tidak cukup"""
+        try:
+            return await self._submit({"op": "item", "u": int(user_id), "i": item_name, "q": quantity})
+        except MutationRejected:
+            return None
+    
+    async def add_gacha_item(self, user_id, item_data):
+        """Tambahkan item gacha ke inventory"""
+        await self._submit({
+            "op": "gacha",
+            "u": int(user_id),
+            "n": item_data["name"],
+            "r": item_data["rarity"],
+            "v": item_data["value"],
+            "t": int(time.time())
+        })
+        self._log_gacha_pulls(user_id, [item_data])
+    
+    def _log_gacha_pulls(self, user_id, items):
+        """Catat setiap tarikan ke log append-only (opsional, lewat GACHA_LOG_FILE)"""
+        if not GACHA_LOG_FILE:
+            return
+        timestamp = int(time.time())
+        with open(GACHA_LOG_FILE, 'a') as f:
+            for item in items:
+                f.write(json.dumps([int(user_id), item["name"], item["rarity"], item["value"], timestamp], separators=(",", ":")) + "\n")
+    
+    async def gacha_pull(self, user_id, gacha_type, count=1):
+        """Tarik gacha `count` kali sebagai satu mutasi, return (items, saldo baru) atau None jika saldo kurang"""
+        cost = GACHA_COSTS[gacha_type] * count
+        if self.get_user_data(user_id).balance < cost:
+            return None
+        
+        items = COMPILED_GACHA_POOLS[gacha_type].sample_many(count)
+        try:
+            new_balance = await self._submit({
+                "op": "gacha_pull",
+                "u": int(user_id),
+                "g": gacha_type,
+                "c": cost,
+                "i": [[item["name"], item["rarity"], item["value"]] for item in items],
+                "t": int(time.time())
+            })
+        except MutationRejected:
+            return None
+        self._log_gacha_pulls(user_id, items)
+        return items, new_balance
+    
+    def get_gacha_pool(self, gacha_type="normal"):
+        """Dapatkan pool gacha berdasarkan tipe"""
+        return GACHA_POOLS.get(gacha_type, GACHA_POOLS["normal"])
+
+class GuildEconomies:
+    """Partisi ekonomi per guild: storage, journal, arsip transaksi dan index peringkat sendiri"""
+    
+    # File/folder data global sebelum ada partisi guild
+    LEGACY_FILES = (ECONOMY_FILE, GACHA_FILE, INVENTORY_FILE, JOURNAL_FILE, SHARD_DIR,
+                    SQLITE_FILE, f"{SQLITE_FILE}-wal", f"{SQLITE_FILE}-shm", TX_ARCHIVE_DIR)
+    
+    def __init__(self, directory=GUILD_DATA_DIR, default_guild_id=DEFAULT_GUILD_ID):
+        self.directory = directory
+        self.owner_configured = default_guild_id is not None  # Guild pemilik data global lama sudah ditentukan
+        self.default_guild_id = int(default_guild_id or 0)
+        self.partitions = {}  # {guild_id: EconomySystem}, dibuka saat pertama dipakai
+    
+    def get(self, guild_id=None):
+        """EconomySystem milik guild (DM memakai guild default)"""
+        guild_id = int(guild_id) if guild_id else self.default_guild_id
+        partition = self.partitions.get(guild_id)
+        if partition is None:
+            root = os.path.join(self.directory, str(guild_id))
+            os.makedirs(root, exist_ok=True)
+            partition = self.partitions[guild_id] = EconomySystem(root=root)
+        return partition
+    
+    def for_ctx(self, ctx):
+        return self.get(ctx.guild.id if ctx.guild else None)
+    
+    def _legacy_files(self):
+        """File/folder data global lama yang masih ada di folder kerja"""
+        prefix = f"{JOURNAL_FILE}."
+        segments = [name for name in os.listdir(".") if name.startswith(prefix) and name[len(prefix):].isdigit()]
+        return [name for name in (*self.LEGACY_FILES, *segments) if os.path.exists(name)]
+    
+    def migrate_legacy(self):
+        """Saat startup: pindahkan data global lama ke folder guild default (sekali, hanya rename)
+        
+        Tanpa guild default (ECONOMY_DEFAULT_GUILD) data lama akan masuk partisi DM dan user
+        di guild-nya terlihat seperti akun baru, jadi startup dihentikan.
+        """
+        legacy = self._legacy_files()
+        if not legacy:
+            return
+        if not self.owner_configured:
+            raise RuntimeError(
+                f"Data ekonomi global lama ditemukan ({', '.join(legacy)}). "
+                "Set ECONOMY_DEFAULT_GUILD ke ID guild pemilik data ini sebelum start."
+            )
+        if self.default_guild_id in self.partitions:
+            raise RuntimeError(f"Partisi guild {self.default_guild_id} sudah dibuka sebelum migrasi data lama")
+        
+        root = os.path.join(self.directory, str(self.default_guild_id))
+        os.makedirs(root, exist_ok=True)
+        moved = []
+        for name in legacy:
+            target = os.path.join(root, name)
+            if not os.path.exists(target):
+                os.replace(name, target)
+                moved.append(name)
+        if moved:
+            print(f"✅ Data ekonomi global dipindah ke guild {self.default_guild_id}: {', '.join(moved)}")
+    
+    def values(self):
+        return list(self.partitions.values())
+    
+    async def drain(self):
+        """Tunggu mutasi yang antre di semua partisi"""
+        for partition in self.values():
+            await partition.drain()
+    
+    async def save(self):
+        for partition in self.values():
+            await partition.save()
+    
+    def _force_save(self):
+        for partition in self.values():
+            partition._force_save()
+
+# Inisialisasi sistem ekonomi (partisi per guild)
+economies = GuildEconomies()
+
+# ========== LAYANAN EKONOMI (IPC) ==========
+# Frame: header <payload bytes, request id, status> + payload JSON ringkas.
+# Request: [guild_id, method, args, kwargs]; response: hasil method (status 0) atau [jenis error, pesan].
+# Client boleh mengirim banyak request tanpa menunggu (pipelining); response dicocokkan lewat request id.
+SERVICE_FRAME = struct.Struct("<IIB")
+SERVICE_OK = 0
+SERVICE_ERROR = 1
+
+# Method EconomySystem yang bisa dipanggil lewat layanan -> decoder hasil di sisi client
+SERVICE_METHODS = {
+    "get_user_data": Account.from_dict,
+    "get_inventory": Inventory.from_dict,
+    "get_daily_streak": None,
+    "get_transactions": lambda result: ([Transaction(*transaction) for transaction in result[0]], result[1]),
+    "get_top_wealth": lambda result: [tuple(entry) for entry in result],
+    "get_wealth_rank": None,
+    "balance_at": None,
+    "add_money": None,
+    "add_money_bulk": lambda result: {int(user_id): balance for user_id, balance in result.items()},
+    "remove_money": None,
+    "transfer_money": tuple,
+    "add_xp": None,
+    "add_xp_bulk": lambda result: {int(user_id): level_ups for user_id, level_ups in result.items()},
+    "update_user": None,
+    "reset_user": None,
+    "add_to_inventory": None,
+    "add_gacha_item": None,
+    "gacha_pull": lambda result: None if result is None else tuple(result)
+}
+
+class EconomyServiceError(Exception):
+    """Error dari layanan ekonomi (koneksi putus atau method gagal di server)"""
+
+def encode_service_value(value):
+    """Record ekonomi -> dict untuk JSON (namedtuple Transaction otomatis jadi list)"""
+    if isinstance(value, (Account, Inventory)):
+        return value.to_dict()
+    raise TypeError(f"Tidak bisa dikirim lewat layanan: {type(value).__name__}")
+
+def encode_frame(request_id, status, payload):
+    body = json.dumps(payload, separators=(",", ":"), default=encode_service_value).encode()
+    return SERVICE_FRAME.pack(len(body), request_id, status) + body
+
+async def read_frame(reader):
+    """(request id, status, payload) berikutnya, None jika koneksi ditutup"""
+    try:
+        header = await reader.readexactly(SERVICE_FRAME.size)
+        length, request_id, status = SERVICE_FRAME.unpack(header)
+        body = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+    return request_id, status, json.loads(body)
+
+class EconomyService:
+    """Proses ekonomi tunggal (single-writer) yang dipakai beberapa proses bot lewat Unix socket"""
+    
+    def __init__(self, path=ECONOMY_SOCKET_PATH, registry=None):
+        self.path = path
+        self.registry = registry or economies
+        self.server = None
+        self.stats = {"connections": 0, "requests": 0, "errors": 0}
+    
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Socket sisa proses sebelumnya
+        self.server = await asyncio.start_unix_server(self._handle_connection, path=self.path)
+        print(f"✅ Layanan ekonomi: {self.path}")
+    
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.registry.drain()
+        await self.registry.save()
+    
+    async def _handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        pending = set()
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                # Tiap request jalan sebagai task sendiri: request yang di-pipeline ikut group commit yang sama
+                task = asyncio.create_task(self._handle_request(writer, *frame))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+    
+    async def _handle_request(self, writer, request_id, status, payload):
+        self.stats["requests"] += 1
+        guild_id, method, args, kwargs = payload
+        try:
+            if method not in SERVICE_METHODS:
+                raise EconomyServiceError(f"Method tidak dikenal: {method}")
+            result = getattr(self.registry.get(guild_id), method)(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            frame = encode_frame(request_id, SERVICE_OK, result)
+        except Exception as e:
+            self.stats["errors"] += 1
+            frame = encode_frame(request_id, SERVICE_ERROR, [type(e).__name__, str(e)])
+        if not writer.is_closing():
+            writer.write(frame)  # Satu write per frame, tidak bercampur dengan response lain
+
+class EconomyClient:
+    """Client layanan ekonomi: request di-pipeline di satu koneksi Unix socket"""
+    
+    def __init__(self, path=ECONOMY_SOCKET_PATH):
+        self.path = path
+        self._writer = None
+        self._reader_task = None
+        self._connection = None  # Future koneksi, ditunggu bersama oleh semua request
+        self._pending = {}  # {request id: future}
+        self._next_id = 0
+    
+    async def _open(self):
+        reader, self._writer = await asyncio.open_unix_connection(self.path)
+        self._reader_task = asyncio.create_task(self._read_responses(reader, self._writer))
+    
+    def _disconnect(self, writer):
+        """Tandai koneksi `writer` mati: request berikutnya membuka koneksi baru (layanan restart)"""
+        writer.close()
+        if self._writer is writer:
+            self._connection = None
+    
+    def _connected(self):
+        """Future koneksi aktif; buka ulang jika belum ada, gagal, atau sudah ditutup"""
+        connection = self._connection
+        if connection is None or (connection.done() and (connection.exception() or self._writer.is_closing())):
+            connection = self._connection = asyncio.ensure_future(self._open())
+        return connection
+    
+    async def _read_responses(self, reader, writer):
+        """Cocokkan response dengan request yang menunggu, gagalkan semuanya jika koneksi putus"""
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                request_id, status, payload = frame
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if status == SERVICE_OK:
+                    future.set_result(payload)
+                elif payload[0] == "MutationRejected":
+                    future.set_exception(MutationRejected(payload[1]))
+                else:
+                    future.set_exception(EconomyServiceError(f"{payload[0]}: {payload[1]}"))
+        finally:
+            self._disconnect(writer)
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(EconomyServiceError("Koneksi layanan ekonomi terputus"))
+    
+    async def call(self, guild_id, method, *args, **kwargs):
+        """Panggil method EconomySystem milik guild di proses layanan"""
+        frame_args = [guild_id, method, args, kwargs]
+        for attempt in range(2):
+            await self._connected()
+            writer = self._writer
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            request_id = self._next_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            try:
+                writer.write(encode_frame(request_id, SERVICE_OK, frame_args))
+                await writer.drain()
+                break
+            except ConnectionError:
+                # Koneksi lama putus sebelum request terkirim: aman diulang sekali di koneksi baru
+                self._pending.pop(request_id, None)
+                self._disconnect(writer)
+                if attempt:
+                    raise
+        result = await future
+        decoder = SERVICE_METHODS[method]
+        return result if decoder is None else decoder(result)
+    
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+class LocalEconomyBackend:
+    """Backend tanpa IPC: method dipanggil langsung pada partisi di proses ini"""
+    
+    def __init__(self, registry):
+        self.registry = registry
+    
+    async def call(self, guild_id, method, *args, **kwargs):
+        result = getattr(self.registry.get(guild_id), method)(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+class EconomyHandle:
+    """API EconomySystem satu guild untuk command; semua method async, lokal maupun lewat layanan"""
+    
+    def __init__(self, backend, guild_id):
+        self._backend = backend
+        self._guild_id = guild_id
+
+def _handle_method(name):
+    async def method(self, *args, **kwargs):
+        return await self._backend.call(self._guild_id, name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(EconomySystem, name).__doc__
+    return method
+
+for _name in SERVICE_METHODS:
+    setattr(EconomyHandle, _name, _handle_method(_name))
+
+economy_backend = EconomyClient(ECONOMY_SOCKET) if ECONOMY_SOCKET else LocalEconomyBackend(economies)
+
+def economy_for(ctx):
+    """Ekonomi guild tempat command dipanggil (DM -> partisi default)"""
+    return EconomyHandle(economy_backend, ctx.guild.id if ctx.guild else None)
+
+async def run_economy_service(path=ECONOMY_SOCKET_PATH):
+    """Jalankan layanan ekonomi saja (tanpa koneksi Discord) sampai dihentikan"""
+    economies.migrate_legacy()
+    service = EconomyService(path)
+    await service.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+# ========== SHARD MONITOR ==========
+class ShardMonitor:
+    """Latency dan laju event gateway per shard (selisih nomor urut event websocket)"""
+    
+    def __init__(self, interval=SHARD_STATS_INTERVAL):
+        self.interval = interval
+        self.event_rates = {}  # {shard_id: event per detik}
+        self._last = {}  # {shard_id: (sequence, waktu sampel)}
+    
+    def _websockets(self):
+        if isinstance(bot, commands.AutoShardedBot):
+            return {shard_id: info._parent.ws for shard_id, info in bot.shards.items()}
+        return {bot.shard_id or 0: bot.ws}
+    
+    def sample(self):
+        now = time.monotonic()
+        for shard_id, ws in self._websockets().items():
+            sequence = getattr(ws, "sequence", None) or 0
+            previous = self._last.get(shard_id)
+            if previous is not None and sequence >= previous[0]:
+                self.event_rates[shard_id] = (sequence - previous[0]) / (now - previous[1])
+            self._last[shard_id] = (sequence, now)  # Sequence mulai dari 0 lagi setelah sesi baru
+    
+    def latencies(self):
+        """{shard_id: latency detik} (NaN jika shard belum terhubung)"""
+        if isinstance(bot, commands.AutoShardedBot):
+            return dict(bot.latencies)
+        return {bot.shard_id or 0: bot.latency}
+    
+    def snapshot(self):
+        return [
+            {
+                "shard": shard_id,
+                "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+                "events_per_sec": round(self.event_rates.get(shard_id, 0.0), 2)
+            }
+            for shard_id, latency in sorted(self.latencies().items())
+        ]
+    
+    async def run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+SHARDS = ShardMonitor()
+METRICS.register(Gauge("discord_shard_latency_seconds", "Latency heartbeat per shard", ("shard",), func=lambda: {
+    shard_id: latency if math.isfinite(latency) else "NaN" for shard_id, latency in SHARDS.latencies().items()
+}))
+METRICS.register(Gauge("discord_shard_events_per_second", "Laju event gateway per shard", ("shard",), func=lambda: SHARDS.event_rates))
+
+# ========== WEB SERVER (KEEP-ALIVE + HEALTH) ==========
+loop_lag_ms = 0.0  # Lag event loop terakhir yang terukur
+web_runner = None
+
+async def monitor_loop_lag():
+    """Ukur seberapa terlambat event loop membangunkan sleep"""
+    global loop_lag_ms
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag_ms = max(0.0, (time.perf_counter() - start - LOOP_LAG_INTERVAL) * 1000)
+
+async def handle_home(request):
+    return web.Response(text="Bot Online 24 Jam")
+
+async def handle_healthz(request):
+    """Status bot: latency gateway, lag event loop, waktu sejak save terakhir"""
+    partitions = economies.values()
+    last_save = max((partition.save_stats["last_save_time"] or 0 for partition in partitions), default=0)
+    latency = bot.latency
+    healthy = bot.is_ready() and loop_lag_ms < LOOP_LAG_UNHEALTHY_MS
+    return web.json_response({
+        "status": "ok" if healthy else "unhealthy",
+        "ready": bot.is_ready(),
+        "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+        "loop_lag_ms": round(loop_lag_ms, 1),
+        "seconds_since_save": round(time.time() - last_save, 1) if last_save else None,
+        "pending_save": any(partition._pending_save for partition in partitions),
+        "ledger_queue": sum(partition._ledger_queue.qsize() for partition in partitions),
+        "guild_partitions": len(partitions),
+        "shards": SHARDS.snapshot(),
+        "send_queue": SENDER.queue_depth,
+        "send_throttle_seconds": round(SENDER.stats["throttle_seconds"], 1)
+    }, status=200 if healthy else 503)
+
+METRICS.register(Gauge("discord_gateway_latency_seconds", "Latency heartbeat gateway", func=lambda: bot.latency if math.isfinite(bot.latency) else "NaN"))
+METRICS.register(Gauge("bot_event_loop_lag_seconds", "Lag event loop terakhir", func=lambda: loop_lag_ms / 1000))
+METRICS.register(Gauge("economy_pending_save", "Partisi guild dengan save yang terjadwal", func=lambda: sum(p._pending_save for p in economies.values())))
+METRICS.register(Gauge("economy_dirty_users", "User yang berubah sejak save terakhir", func=lambda: sum(len(p._dirty["economy"]) for p in economies.values())))
+METRICS.register(Gauge("economy_accounts", "Jumlah akun ekonomi (partisi yang terbuka)", func=lambda: sum(p.storage.account_count() for p in economies.values())))
+METRICS.register(Gauge("economy_ledger_queue_depth", "Mutasi yang menunggu writer", func=lambda: sum(p._ledger_queue.qsize() for p in economies.values())))
+METRICS.register(Gauge("economy_save_loop_stall_max_seconds", "Stall event loop terlama saat snapshot save", func=lambda: max((p.save_stats["max_stall_ms"] for p in economies.values()), default=0) / 1000))
+METRICS.register(Gauge("economy_guild_partitions", "Partisi guild yang terbuka", func=lambda: len(economies.partitions)))
+
+async def handle_metrics(request):
+    """Metrics dalam format teks Prometheus"""
+    return web.Response(text=METRICS.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def start_web_server():
+    """Jalankan server aiohttp di event loop bot (tanpa thread terpisah)"""
+    global web_runner
+    app = web.Application()
+    app.router.add_get('/', handle_home)
+    app.router.add_get('/healthz', handle_healthz)
+    app.router.add_get('/metrics', handle_metrics)
+    web_runner = web.AppRunner(app, access_log=None)
+    await web_runner.setup()
+    await web.TCPSite(web_runner, '0.0.0.0', WEB_PORT).start()
+    asyncio.create_task(monitor_loop_lag())
+    asyncio.create_task(SHARDS.run())
+    print(f'✅ Web server: port {WEB_PORT} (/healthz, /metrics)')
+
+# ========== PENGIRIMAN PESAN ==========
+class ChannelSender:
+    """Pacing kirim pesan per channel (token bucket GCRA) agar tidak kena 429"""
+    
+    def __init__(self, rate=SEND_RATE, per=SEND_PER):
+        self._interval = per / rate  # Jarak rata-rata antar pesan
+        self._burst = per - self._interval  # Toleransi burst (rate pesan langsung terkirim)
+        self._next_time = {}  # {channel_id: waktu teoritis pesan berikutnya (monotonic)}
+        self.queue_depth = 0  # Pesan yang sedang menunggu giliran
+        self.stats = {"sent": 0, "throttled": 0, "throttle_seconds": 0.0}
+    
+    def _reserve(self, channel_id):
+        """Pesan slot kirim, return lama tunggu (detik)"""
+        now = time.monotonic()
+        next_time = max(self._next_time.get(channel_id, now), now)
+        self._next_time[channel_id] = next_time + self._interval
+        if len(self._next_time) > 1000:
+            # Buang channel yang bucket-nya sudah penuh lagi
+            self._next_time = {key: value for key, value in self._next_time.items() if value > now}
+        return max(0.0, next_time - self._burst - now)
+    
+    async def send(self, channel_id, send_func):
+        """Tunggu giliran channel lalu jalankan `send_func()`"""
+        wait = self._reserve(channel_id)
+        if wait > 0:
+            self.queue_depth += 1
+            self.stats["throttled"] += 1
+            self.stats["throttle_seconds"] += wait
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.queue_depth -= 1
+        self.stats["sent"] += 1
+        return await send_func()
+
+SENDER = ChannelSender()
+MESSAGES_COALESCED = METRICS.register(Counter("bot_messages_coalesced_total", "Pesan yang digabung ke pesan lain dari command yang sama"))
+METRICS.register(Gauge("bot_send_queue_depth", "Pesan yang menunggu pacing channel", func=lambda: SENDER.queue_depth))
+METRICS.register(Counter("bot_send_throttle_seconds_total", "Total waktu tunggu pacing channel", func=lambda: SENDER.stats["throttle_seconds"]))
+METRICS.register(Counter("bot_messages_sent_total", "Pesan yang dikirim lewat send layer", func=lambda: SENDER.stats["sent"]))
+
+class BufferedContext(commands.Context):
+    """Context yang menggabungkan pesan teks/embed satu command jadi satu pesan"""
+    
+    BUFFERABLE = {"embed", "embeds"}
+    
+    def __init__(self, **attrs):
+        super().__init__(**attrs)
+        self._buffering = False
+        self._content = []
+        self._embeds = []
+    
+    def start_buffering(self):
+        self._buffering = True
+    
+    def _fits(self, content, embeds):
+        """Cek apakah pesan masih muat digabung ke buffer"""
+        total_content = sum(len(text) + 1 for text in self._content) + len(content or "")
+        total_embeds = self._embeds + embeds
+        return (
+            total_content <= MESSAGE_MAX_CHARS
+            and len(total_embeds) <= MESSAGE_MAX_EMBEDS
+            and sum(len(embed) for embed in total_embeds) <= MESSAGE_MAX_EMBED_CHARS
+        )
+    
+    async def send(self, content=None, **kwargs):
+        embeds = ([kwargs["embed"]] if kwargs.get("embed") else []) + list(kwargs.get("embeds") or [])
+        if not self._buffering or not set(kwargs) <= self.BUFFERABLE:
+            await self.flush()
+            return await SENDER.send(self.channel.id, lambda: super(BufferedContext, self).send(content, **kwargs))
+        
+        if not self._fits(content, embeds):
+            await self.flush()
+            self._buffering = True
+        elif self._content or self._embeds:
+            MESSAGES_COALESCED.inc()
+        if content is not None:
+            self._content.append(str(content))
+        self._embeds += embeds
+        return None
+    
+    async def flush(self):
+        """Kirim isi buffer sebagai satu pesan, pesan berikutnya dikirim langsung"""
+        self._buffering = False
+        if not self._content and not self._embeds:
+            return None
+        content = "\n".join(self._content) or None
+        embeds = self._embeds
+        self._content = []
+        self._embeds = []
+        return await SENDER.send(self.channel.id, lambda: super(BufferedContext, self).send(content, embeds=embeds))
+
+# ========== NAMA USER ==========
+class NameResolver:
+    """Nama tampilan user: cache member/user discord.py dulu, lalu LRU+TTL, fetch REST terakhir"""
+    
+    def __init__(self, capacity=NAME_CACHE_SIZE, ttl=NAME_CACHE_TTL, concurrency=NAME_FETCH_CONCURRENCY):
+        self._names = OrderedDict()  # {user_id: (nama, waktu kedaluwarsa)}
+        self._capacity = capacity
+        self._ttl = ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+    
+    def _remember(self, user_id, name):
+        self._names[user_id] = (name, time.monotonic() + self._ttl)
+        self._names.move_to_end(user_id)
+        while len(self._names) > self._capacity:
+            self._names.popitem(last=False)
+    
+    def cached(self, guild, user_id):
+        """Nama tanpa request jaringan, None jika tidak ada di cache mana pun"""
+        member = guild.get_member(user_id) if guild else None
+        if member is not None:
+            NAME_RESOLUTIONS.inc(source="member")
+            return member.display_name
+        user = bot.get_user(user_id)
+        if user is not None:
+            NAME_RESOLUTIONS.inc(source="user")
+            return user.display_name
+        entry = self._names.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self._names.move_to_end(user_id)
+            NAME_RESOLUTIONS.inc(source="lru")
+            return entry[0]
+        return None
+    
+    async def _fetch(self, user_id):
+        """Fetch REST (dibatasi semaphore), user yang tidak ada juga di-cache"""
+        async with self._semaphore:
+            try:
+                user = await bot.fetch_user(user_id)
+            except discord.NotFound:
+                name = f"User {user_id}"
+            except discord.HTTPException:
+                NAME_RESOLUTIONS.inc(source="failed")
+                return f"User {user_id}"  # Gagal sementara, tidak di-cache
+            else:
+                name = user.display_name
+        NAME_RESOLUTIONS.inc(source="fetch")
+        self._remember(user_id, name)
+        return name
+    
+    async def resolve_many(self, guild, user_ids):
+        """{user_id: nama}, yang tidak ada di cache di-fetch bersamaan"""
+        names = {user_id: self.cached(guild, user_id) for user_id in user_ids}
+        missing = [user_id for user_id, name in names.items() if name is None]
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch(user_id) for user_id in missing))
+            names.update(zip(missing, fetched))
+        return names
+
+NAME_RESOLUTIONS = METRICS.register(Counter("bot_name_resolutions_total", "Resolusi nama user per sumber", ("source",)))
+NAMES = NameResolver()
+
+# ========== COOLDOWN ==========
+COOLDOWN_MAGIC = b"CDS1"
+COOLDOWN_HEADER = struct.Struct("<4sHI")  # magic, jumlah nama command, jumlah entry
+COOLDOWN_ENTRY = struct.Struct("<HqIH")  # index nama command, bucket key, deadline epoch, sisa token
+
+class CooldownStore:
+    """Deadline cooldown per (command, bucket): cek O(1), entry kedaluwarsa dibuang timing wheel"""
+    
+    def __init__(self, path=COOLDOWN_FILE):
+        self.path = path
+        self._entries = {}  # {(command, key): [deadline epoch, sisa token]}
+        self._wheel = [set() for _ in range(COOLDOWN_WHEEL_SLOTS)]  # Slot berdasarkan deadline
+        self._tick = int(time.time() // COOLDOWN_WHEEL_TICK)  # Tick yang belum diproses
+        self._persisted = set()  # Command dengan cooldown >= COOLDOWN_PERSIST_MIN
+        self._pending_save = False
+        self._dirty = False
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def register(self, command, per):
+        """Catat command; cooldown panjang ikut disimpan ke disk"""
+        if per >= COOLDOWN_PERSIST_MIN:
+            self._persisted.add(command)
+    
+    @staticmethod
+    def _slot(deadline):
+        return int(deadline // COOLDOWN_WHEEL_TICK) % COOLDOWN_WHEEL_SLOTS
+    
+    def _advance(self, now):
+        """Putar wheel sampai tick sekarang, buang entry di slot yang sudah lewat"""
+        tick = int(now // COOLDOWN_WHEEL_TICK)
+        for t in range(max(self._tick, tick - COOLDOWN_WHEEL_SLOTS), tick):
+            slot = self._wheel[t % COOLDOWN_WHEEL_SLOTS]
+            expired = [key for key in slot if self._entries[key][0] <= now]  # Sisanya putaran berikutnya
+            for key in expired:
+                slot.discard(key)
+                del self._entries[key]
+        self._tick = max(self._tick, tick)
+    
+    def _set(self, key, deadline, tokens):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._wheel[self._slot(entry[0])].discard(key)
+        self._entries[key] = [deadline, tokens]
+        self._wheel[self._slot(deadline)].add(key)
+    
+    def tokens(self, key, rate, now):
+        """Sisa token bucket saat ini"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            return rate
+        return entry[1]
+    
+    def retry_after(self, key, now):
+        """Sisa detik cooldown, 0.0 jika command bisa dipakai"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] > 0 or entry[0] <= now:
+            return 0.0
+        return entry[0] - now
+    
+    def hit(self, key, rate, per, now, tokens=1):
+        """Pakai token; None jika boleh, atau sisa detik cooldown"""
+        self._advance(now)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            if tokens > rate:
+                return float(per)
+            self._set(key, now + per, rate - tokens)
+        elif entry[1] >= tokens:
+            entry[1] -= tokens
+        else:
+            return entry[0] - now
+        self._mark_dirty(key[0])
+        return None
+    
+    def reset(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._wheel[self._slot(entry[0])].discard(key)
+            self._mark_dirty(key[0])
+    
+    def _mark_dirty(self, command):
+        if command in self._persisted:
+            self._dirty = True
+            if not self._pending_save:
+                self._pending_save = True
+                asyncio.create_task(self._delayed_save())
+    
+    async def _delayed_save(self):
+        await asyncio.sleep(COOLDOWN_SAVE_DELAY)
+        self._pending_save = False
+        await self.save()
+    
+    def encode(self, now=None):
+        """Snapshot biner: header, tabel nama command, entry 16 byte yang masih aktif"""
+        now = now or time.time()
+        names = sorted(self._persisted)
+        index = {name: i for i, name in enumerate(names)}
+        records = [
+            COOLDOWN_ENTRY.pack(index[command], key, math.ceil(deadline), tokens)
+            for (command, key), (deadline, tokens) in self._entries.items()
+            if command in index and isinstance(key, int) and deadline > now
+        ]
+        encoded_names = [name.encode() for name in names]
+        return b"".join([
+            COOLDOWN_HEADER.pack(COOLDOWN_MAGIC, len(names), len(records)),
+            *(struct.pack("<H", len(name)) + name for name in encoded_names),
+            *records
+        ])
+    
+    def load(self):
+        """Muat entry yang belum kedaluwarsa dari file"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, name_count, entry_count = COOLDOWN_HEADER.unpack_from(data, 0)
+            if magic != COOLDOWN_MAGIC:
+                raise ValueError("format file cooldown tidak dikenal")
+            offset = COOLDOWN_HEADER.size
+            names = []
+            for _ in range(name_count):
+                (length,) = struct.unpack_from("<H", data, offset)
+                names.append(data[offset + 2:offset + 2 + length].decode())
+                offset += 2 + length
+            now = time.time()
+            for index, key, deadline, tokens in COOLDOWN_ENTRY.iter_unpack(data[offset:offset + entry_count * COOLDOWN_ENTRY.size]):
+                if deadline > now:
+                    self._set((names[index], key), deadline, tokens)
+            print(f"✅ Cooldown dimuat: {len(self._entries)} entry aktif")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Gagal memuat cooldown, mulai kosong: {e}")
+    
+    def _write(self, data):
+        try:
+            atomic_write(self.path, data)
+        except OSError as e:
+            self._dirty = True
+            print(f"❌ Gagal save cooldown: {e}")
+    
+    async def save(self):
+        """Tulis file cooldown di worker thread jika ada perubahan"""
+        if self._dirty:
+            self._dirty = False
+            await asyncio.to_thread(self._write, self.encode())
     
     def _force_save(self):
-        """Save data langsung (digunakan saat bot shutdown)"""
-        with open(ECONOMY_FILE, 'w') as f:
-            json.dump(self.data, f, indent=4)
-        
-        with open(GACHA_FILE, 'w') as f:
-            json.dump(self.gacha_data, f, indent=4)
-            
-        with open(INVENTORY_FILE, 'w') as f:
-            json.dump(self.inventory_data, f, indent=4)
+        """Tulis file cooldown langsung (event loop sudah berhenti)"""
+        if self._dirty:
+            self._dirty = False
+            self._write(self.encode())
+
+class StoredCooldown(commands.Cooldown):
+    """Bucket cooldown discord.py yang state-nya ada di CooldownStore"""
+    __slots__ = ("store", "key")
     
-    def get_user_data(self, user_id):
-        """Dapatkan data user, buat jika belum ada"""
-        if str(user_id) not in self.data:
-            self.data[str(user_id)] = {
-                "balance": 1000,  # Saldo awal
-                "bank": 0,
-                "xp": 0,
-                "level": 1,
-                "total_earned": 0,
-                "total_spent": 0,
-                "daily_streak": 0,
-                "last_daily": None,
-                "achievements": [],
-                "transactions": [],
-                "last_collect": None
-            }
-        return self.data[str(user_id)]
+    def __init__(self, rate, per, store, key):
+        super().__init__(rate, per)
+        self.store = store
+        self.key = key
     
-    def get_inventory(self, user_id):
-        """Dapatkan inventory user"""
-        if str(user_id) not in self.inventory_data:
-            self.inventory_data[str(user_id)] = {
-                "items": {},
-                "gacha_items": [],
-                "badges": []
-            }
-        return self.inventory_data[str(user_id)]
-    
-    def add_money(self, user_id, amount, reason="Tidak diketahui"):
-        """Tambahkan uang ke user"""
-        user_data = self.get_user_data(user_id)
-        user_data["balance"] += amount
-        user_data["total_earned"] += amount
-        
-        # Record transaction
-        transaction = {
-            "type": "income",
-            "amount": amount,
-            "reason": reason,
-            "timestamp": datetime.now().isoformat()
-        }
-        user_data["transactions"].append(transaction)
-        
-        # Jadwalkan save
-        self.schedule_save()
-        return user_data["balance"]
+    def get_tokens(self, current=None):
+        return self.store.tokens(self.key, self.rate, current or time.time())
     
-    def remove_money(self, user_id, amount, reason="Tidak diketahui"):
-        """Kurangi uang dari user"""
-        user_data = self.get_user_data(user_id)
-        if user_data["balance"] < amount:
-            return False
-        
-        user_data["balance"] -= amount
-        user_data["total_spent"] += amount
-        
-        # Record transaction
-        transaction = {
-            "type": "expense",
-            "amount": amount,
-            "reason": reason,
-            "timestamp": datetime.now().isoformat()
-        }
-        user_data["transactions"].append(transaction)
-        
-        self.schedule_save()
-        return True
+    def get_retry_after(self, current=None):
+        return self.store.retry_after(self.key, current or time.time())
     
-    def transfer_money(self, from_id, to_id, amount):
-        """Transfer uang antar user"""
-        from_user = self.get_user_data(from_id)
-        to_user = self.get_user_data(to_id)
-        
-        if from_user["balance"] < amount:
-            return False, "Saldo tidak cukup"
-        
-        from_user["balance"] -= amount
-        to_user["balance"] += amount
-        
-        # Record transactions
-        transaction_out = {
-            "type": "transfer_out",
-            "amount": amount,
-            "to": str(to_id),
-            "timestamp": datetime.now().isoformat()
-        }
-        from_user["transactions"].append(transaction_out)
-        
-        transaction_in = {
-            "type": "transfer_in",
-            "amount": amount,
-            "from": str(from_id),
-            "timestamp": datetime.now().isoformat()
-        }
-        to_user["transactions"].append(transaction_in)
-        
-        self.schedule_save()
-        return True, "Transfer berhasil"
+    def update_rate_limit(self, current=None, *, tokens=1):
+        return self.store.hit(self.key, self.rate, self.per, current or time.time(), tokens)
     
-    def add_xp(self, user_id, xp_amount):
-        """Tambahkan XP ke user"""
-        user_data = self.get_user_data(user_id)
-        user_data["xp"] += xp_amount
-        
-        # Check level up
-        required_xp = user_data["level"] * 100
-        level_ups = 0
-        
-        while user_data["xp"] >= required_xp:
-            user_data["xp"] -= required_xp
-            user_data["level"] += 1
-            level_ups += 1
-            required_xp = user_data["level"] * 100
-            
-            # Beri bonus level up
-            bonus = user_data["level"] * 100
-            user_data["balance"] += bonus
-            user_data["total_earned"] += bonus
-        
-        self.schedule_save()
-        return level_ups
+    def reset(self):
+        self.store.reset(self.key)
     
-    def add_to_inventory(self, user_id, item_name, quantity=1):
-        """Tambahkan item ke inventory"""
-        inventory = self.get_inventory(user_id)
-        
-        if item_name in inventory["items"]:
-            inventory["items"][item_name] += quantity
-        else:
-            inventory["items"][item_name] = quantity
-        
-        self.schedule_save()
+    def copy(self):
+        return StoredCooldown(self.rate, self.per, self.store, self.key)
+
+class PersistentCooldownMapping(commands.CooldownMapping):
+    """CooldownMapping tanpa cache per bucket: semua bucket dibaca dari CooldownStore"""
     
-    def add_gacha_item(self, user_id, item_data):
-        """Tambahkan item gacha ke inventory"""
-        inventory = self.get_inventory(user_id)
-        inventory["gacha_items"].append({
-            "name": item_data["name"],
-            "rarity": item_data["rarity"],
-            "value": item_data["value"],
-            "timestamp": datetime.now().isoformat()
-        })
-        self.schedule_save()
+    def __init__(self, original, type, name, store):
+        super().__init__(original, type)
+        self.name = name
+        self.store = store
+        store.register(name, original.per)
     
-    def get_gacha_pool(self, gacha_type="normal"):
-        """Dapatkan pool gacha berdasarkan tipe"""
-        gacha_pools = {
-            "normal": [
-                {"name": "Koin Emas", "rarity": "common", "value": 50, "weight": 40},
-                {"name": "Permata Hijau", "rarity": "common", "value": 100, "weight": 30},
-                {"name": "Permata Biru", "rarity": "uncommon", "value": 250, "weight": 15},
-                {"name": "Permata Ungu", "rarity": "rare", "value": 500, "weight": 10},
-                {"name": "Permata Emas", "rarity": "epic", "value": 1000, "weight": 4},
-                {"name": "Kristal Legenda", "rarity": "legendary", "value": 5000, "weight": 1}
-            ],
-            "premium": [
-                {"name": "Sayap Malaikat", "rarity": "epic", "value": 2000, "weight": 20},
-                {"name": "Pedang Cahaya", "rarity": "epic", "value": 3000, "weight": 15},
-                {"name": "Mahkota Raja", "rarity": "legendary", "value": 10000, "weight": 10},
-                {"name": "Naga Api", "rarity": "mythic", "value": 50000, "weight": 5},
-                {"name": "Phoenix Abadi", "rarity": "mythic", "value": 75000, "weight": 5},
-                {"name": "Titan Essence", "rarity": "divine", "value": 150000, "weight": 1}
-            ]
-        }
-        
-        return gacha_pools.get(gacha_type, gacha_pools["normal"])
+    def copy(self):
+        return PersistentCooldownMapping(self._cooldown, self._type, self.name, self.store)
+    
+    def get_bucket(self, message, current=None):
+        return StoredCooldown(self._cooldown.rate, self._cooldown.per, self.store, (self.name, self._bucket_key(message)))
+
+def persistent_cooldown(rate, per, type=commands.BucketType.default):
+    """Pengganti @commands.cooldown yang bucket-nya disimpan di COOLDOWN_STORE"""
+    def decorator(func):
+        callback = func.callback if isinstance(func, commands.Command) else func
+        mapping = PersistentCooldownMapping(commands.Cooldown(rate, per), type, callback.__name__, COOLDOWN_STORE)
+        if isinstance(func, commands.Command):
+            func._buckets = mapping
+        else:
+            func.__commands_cooldown__ = mapping
+        return func
+    return decorator
 
-# Inisialisasi sistem ekonomi
-economy = EconomySystem()
+COOLDOWN_STORE = CooldownStore()
+COOLDOWN_STORE.load()
+METRICS.register(Gauge("bot_cooldown_entries", "Entry cooldown aktif di memori", func=lambda: len(COOLDOWN_STORE)))
 
 # ========== EVENT ==========
+@bot.event
+async def setup_hook():
+    await start_web_server()
+
+@bot.before_invoke
+async def track_command_start(ctx):
+    ctx.started_at = time.perf_counter()
+    if isinstance(ctx, BufferedContext):
+        ctx.start_buffering()
+
+@bot.after_invoke
+async def track_command_end(ctx):
+    if isinstance(ctx, BufferedContext):
+        await ctx.flush()
+    elapsed = time.perf_counter() - ctx.started_at
+    COMMAND_INVOCATIONS.inc(command=ctx.command.qualified_name)
+    COMMAND_LATENCY.observe(elapsed, command=ctx.command.qualified_name)
+    if PROFILER.active:
+        PROFILER.record(ctx.command.qualified_name, elapsed)
+
 @bot.event
 async def on_ready():
     print(f'✅ {bot.user} telah online!')
@@ -283,36 +3096,26 @@ async def on_ready():
     print(f'✅ Sistem Ekonomi: Ready!')
     print(f'✅ Optimasi: XP otomatis DIHAPUS, cooldown ditambahkan')
     await bot.change_presence(activity=discord.Game(name=f"{PREFIX}help | Shop & Games"))
-    check_daily_reset.start()
 
 @bot.event
 async def on_message(message):
     # TIDAK ADA XP OTOMATIS LAGI untuk menghindari rate limit
-    await bot.process_commands(message)
-
-# ========== TASK: RESET DAILY ==========
-@tasks.loop(hours=24)
-async def check_daily_reset():
-    """Reset daily streak jika lebih dari 2 hari"""
-    current_time = datetime.now()
-    for user_id_str in economy.data:
-        user_data = economy.data[user_id_str]
-        if user_data["last_daily"]:
-            last_daily = datetime.fromisoformat(user_data["last_daily"])
-            if (current_time - last_daily).days > 2:
-                user_data["daily_streak"] = 0
-    economy._force_save()
+    if message.author.bot:
+        return
+    ctx = await bot.get_context(message, cls=BufferedContext)
+    await bot.invoke(ctx)
 
 # ========== SISTEM XP MANUAL (AMAN DARI RATE LIMIT) ==========
 @bot.command(name='claimxp')
-@commands.cooldown(1, 300, commands.BucketType.user)  # 1x per 5 menit
+@persistent_cooldown(1, 300, commands.BucketType.user)  # 1x per 5 menit
 async def claim_xp(ctx):
     """Klaim XP secara manual (cooldown 5 menit)"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
     xp_gained = random.randint(5, 15)  # Lebih banyak dari sistem lama
-    level_ups = economy.add_xp(user_id, xp_gained)
+    level_ups = await economy.add_xp(user_id, xp_gained)
     
-    user_data = economy.get_user_data(user_id)
+    user_data = await economy.get_user_data(user_id)
     
     embed = discord.Embed(
         title="🎮 **XP DICLAIM!**",
@@ -320,36 +3123,35 @@ async def claim_xp(ctx):
     )
     
     embed.add_field(name="⚡ XP Didapat", value=f"**+{xp_gained}** XP", inline=True)
-    embed.add_field(name="📊 XP Total", value=f"**{user_data['xp']}**/{user_data['level'] * 100}", inline=True)
+    embed.add_field(name="📊 XP Total", value=f"**{user_data.xp}**/{user_data.level * 100}", inline=True)
     
     if level_ups > 0:
         embed.title = "🎉 **LEVEL UP!**"
         embed.color = discord.Color.gold()
         embed.add_field(
             name="✨ Level Baru",
-            value=f"**Level {user_data['level']}**! (+{level_ups * 100} koin bonus)",
+            value=f"**Level {user_data.level}**! (+{level_ups * 100} koin bonus)",
             inline=False
         )
     
     await ctx.send(embed=embed)
 
 @bot.command(name='collect')
-@commands.cooldown(1, 600, commands.BucketType.user)  # 1x per 10 menit
+@persistent_cooldown(1, 600, commands.BucketType.user)  # 1x per 10 menit
 async def collect_rewards(ctx):
     """Kumpulkan reward berkala (cooldown 10 menit)"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
-    user_data = economy.get_user_data(user_id)
-    
-    # Cek cooldown internal
-    current_time = datetime.now()
-    if user_data["last_collect"]:
-        last_collect = datetime.fromisoformat(user_data["last_collect"])
-        if (current_time - last_collect).seconds < 600:
-            time_left = 600 - (current_time - last_collect).seconds
-            minutes = time_left // 60
-            seconds = time_left % 60
-            await ctx.send(f"⏰ **Cooldown!** Tunggu **{minutes} menit {seconds} detik** lagi.")
-            return
+    user_data = await economy.get_user_data(user_id)
+    
+    # Fallback durable: file cooldown disimpan dengan debounce, last_collect ikut journal
+    current_time = int(time.time())
+    if user_data.last_collect and current_time - user_data.last_collect < 600:
+        ctx.command.reset_cooldown(ctx)  # Deadline dari last_collect, bukan dari percobaan ini
+        minutes, seconds = divmod(600 - (current_time - user_data.last_collect), 60)
+        await ctx.send(f"⏰ **Cooldown!** Tunggu **{minutes} menit {seconds} detik** lagi.")
+        return
+    await economy.update_user(user_id, last_collect=current_time)
     
     # Berikan reward acak
     rewards = [
@@ -364,25 +3166,21 @@ async def collect_rewards(ctx):
     
     if reward["type"] == "xp":
         xp = random.randint(reward["min"], reward["max"])
-        level_ups = economy.add_xp(user_id, xp)
+        level_ups = await economy.add_xp(user_id, xp)
         message = f"{reward['emoji']} **+{xp} XP**"
     
     elif reward["type"] == "money":
         money = random.randint(reward["min"], reward["max"])
-        economy.add_money(user_id, money, "Collect Reward")
+        await economy.add_money(user_id, money, "Collect Reward")
         message = f"{reward['emoji']} **+{money} koin**"
     
     else:  # both
         xp = random.randint(reward["xp_min"], reward["xp_max"])
         money = random.randint(reward["money_min"], reward["money_max"])
-        level_ups = economy.add_xp(user_id, xp)
-        economy.add_money(user_id, money, "Collect Reward")
+        level_ups = await economy.add_xp(user_id, xp)
+        await economy.add_money(user_id, money, "Collect Reward")
         message = f"{reward['emoji']} **+{xp} XP** dan **+{money} koin**"
     
-    # Update last collect time
-    user_data["last_collect"] = current_time.isoformat()
-    economy.schedule_save()
-    
     # Create embed
     embed = discord.Embed(
         title="🎁 **REWARD DICLAIM!**",
@@ -393,10 +3191,10 @@ async def collect_rewards(ctx):
     embed.add_field(name="📦 Hadiah", value=message, inline=False)
     
     if level_ups > 0:
-        user_data = economy.get_user_data(user_id)  # Refresh data
+        user_data = await economy.get_user_data(user_id)  # Refresh data
         embed.add_field(
             name="✨ LEVEL UP!",
-            value=f"**Level {user_data['level']}** tercapai! (+{level_ups * 100} koin bonus)",
+            value=f"**Level {user_data.level}** tercapai! (+{level_ups * 100} koin bonus)",
             inline=False
         )
         embed.color = discord.Color.gold()
@@ -409,64 +3207,62 @@ async def collect_rewards(ctx):
 @bot.command(name='balance', aliases=['bal', 'uang', 'saldo'])
 async def check_balance(ctx, member: discord.Member = None):
     """Cek saldo uang virtual"""
+    economy = economy_for(ctx)
     target = member or ctx.author
-    user_data = economy.get_user_data(target.id)
+    user_data = await economy.get_user_data(target.id)
     
     embed = discord.Embed(
         title=f"💰 **SALDO {target.name}**",
         color=discord.Color.gold()
     )
     
-    embed.add_field(name="💵 Dompet", value=f"**{user_data['balance']}** koin", inline=True)
-    embed.add_field(name="🏦 Bank", value=f"**{user_data['bank']}** koin", inline=True)
-    embed.add_field(name="📊 Total", value=f"**{user_data['balance'] + user_data['bank']}** koin", inline=True)
+    embed.add_field(name="💵 Dompet", value=f"**{user_data.balance}** koin", inline=True)
+    embed.add_field(name="🏦 Bank", value=f"**{user_data.bank}** koin", inline=True)
+    embed.add_field(name="📊 Total", value=f"**{user_data.wealth}** koin", inline=True)
     
-    embed.add_field(name="🎮 Level", value=f"**{user_data['level']}**", inline=True)
-    embed.add_field(name="⭐ XP", value=f"**{user_data['xp']}**/{user_data['level'] * 100}", inline=True)
-    embed.add_field(name="🔥 Daily Streak", value=f"**{user_data['daily_streak']}** hari", inline=True)
+    embed.add_field(name="🎮 Level", value=f"**{user_data.level}**", inline=True)
+    embed.add_field(name="⭐ XP", value=f"**{user_data.xp}**/{user_data.level * 100}", inline=True)
+    embed.add_field(name="🔥 Daily Streak", value=f"**{await economy.get_daily_streak(target.id)}** hari", inline=True)
     
     embed.set_thumbnail(url=target.avatar.url if target.avatar else target.default_avatar.url)
     
     await ctx.send(embed=embed)
 
 @bot.command(name='daily')
-@commands.cooldown(1, 86400, commands.BucketType.user)  # 1x per 24 jam
+@persistent_cooldown(1, 86400, commands.BucketType.user)  # 1x per 24 jam
 async def daily_reward(ctx):
     """Klaim reward harian"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
-    user_data = economy.get_user_data(user_id)
-    current_time = datetime.now()
-    
-    # Check if already claimed today
-    if user_data["last_daily"]:
-        last_daily = datetime.fromisoformat(user_data["last_daily"])
-        if (current_time - last_daily).days < 1:
-            time_left = timedelta(days=1) - (current_time - last_daily)
-            hours = time_left.seconds // 3600
-            minutes = (time_left.seconds % 3600) // 60
-            
-            embed = discord.Embed(
-                title="⏰ **DAILY REWARD**",
-                description=f"Anda sudah klaim daily hari ini!\nTunggu **{hours} jam {minutes} menit** lagi.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+    user_data = await economy.get_user_data(user_id)
+    current_time = int(time.time())
+    
+    # Fallback durable: file cooldown disimpan dengan debounce, last_daily ikut journal
+    if user_data.last_daily and current_time - user_data.last_daily < 86400:
+        ctx.command.reset_cooldown(ctx)  # Deadline dari last_daily, bukan dari percobaan ini
+        hours, remainder = divmod(86400 - (current_time - user_data.last_daily), 3600)
+        embed = discord.Embed(
+            title="⏰ **DAILY REWARD**",
+            description=f"Anda sudah klaim daily hari ini!\nTunggu **{hours} jam {remainder // 60} menit** lagi.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
     
-    # Calculate reward
-    streak = user_data["daily_streak"]
+    # Calculate reward (streak yang sudah hangus dihitung 0)
+    streak = await economy.get_daily_streak(user_id, current_time)
     base_reward = 100
     streak_bonus = min(streak * 10, 200)  # Max bonus 200
     total_reward = base_reward + streak_bonus
     
     # Update streak
-    if (current_time - last_daily).days == 1 if user_data["last_daily"] else True:
-        user_data["daily_streak"] += 1
+    if (current_time - user_data.last_daily) // 86400 == 1 if user_data.last_daily else True:
+        new_streak = streak + 1
     else:
-        user_data["daily_streak"] = 1
+        new_streak = 1
     
-    user_data["last_daily"] = current_time.isoformat()
-    economy.add_money(user_id, total_reward, "Daily Reward")
+    await economy.update_user(user_id, daily_streak=new_streak, last_daily=current_time)
+    await economy.add_money(user_id, total_reward, "Daily Reward")
     
     embed = discord.Embed(
         title="🎁 **DAILY REWARD BERHASIL!**",
@@ -477,20 +3273,21 @@ async def daily_reward(ctx):
     embed.add_field(name="💵 Reward Dasar", value=f"**{base_reward}** koin", inline=True)
     embed.add_field(name="🔥 Streak Bonus", value=f"**{streak_bonus}** koin", inline=True)
     embed.add_field(name="💰 Total", value=f"**{total_reward}** koin", inline=True)
-    embed.add_field(name="📅 Streak Saat Ini", value=f"**{user_data['daily_streak']}** hari berturut-turut", inline=False)
+    embed.add_field(name="📅 Streak Saat Ini", value=f"**{new_streak}** hari berturut-turut", inline=False)
     
     # Special bonus for 7-day streak
-    if user_data["daily_streak"] % 7 == 0:
+    if new_streak % 7 == 0:
         special_bonus = 500
-        economy.add_money(user_id, special_bonus, "7-Day Streak Bonus")
+        await economy.add_money(user_id, special_bonus, "7-Day Streak Bonus")
         embed.add_field(name="🎊 **BONUS 7 HARI!**", value=f"Bonus tambahan **{special_bonus}** koin!", inline=False)
     
     await ctx.send(embed=embed)
 
 @bot.command(name='work', aliases=['kerja'])
-@commands.cooldown(1, 3600, commands.BucketType.user)  # 1x per jam
+@persistent_cooldown(1, 3600, commands.BucketType.user)  # 1x per jam
 async def work_command(ctx):
     """Bekerja untuk mendapatkan uang (cooldown 1 jam)"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
     
     # Get random job and salary
@@ -507,7 +3304,7 @@ async def work_command(ctx):
     earnings = random.randint(job["min"], job["max"])
     
     # Give money
-    new_balance = economy.add_money(user_id, earnings, f"Work: {job['name']}")
+    new_balance = await economy.add_money(user_id, earnings, f"Work: {job['name']}")
     
     embed = discord.Embed(
         title="💼 **BEKERJA**",
@@ -522,9 +3319,10 @@ async def work_command(ctx):
     await ctx.send(embed=embed)
 
 @bot.command(name='crime', aliases=['kejahatan'])
-@commands.cooldown(1, 7200, commands.BucketType.user)  # 1x per 2 jam
+@persistent_cooldown(1, 7200, commands.BucketType.user)  # 1x per 2 jam
 async def crime_command(ctx):
     """Melakukan kejahatan untuk dapat uang cepat (risiko tinggi)"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
     
     # Crime outcomes
@@ -540,7 +3338,7 @@ async def crime_command(ctx):
     success = random.random() < crime["success_rate"]
     
     if success:
-        new_balance = economy.add_money(user_id, crime["success_pay"], f"Crime Success: {crime['name']}")
+        new_balance = await economy.add_money(user_id, crime["success_pay"], f"Crime Success: {crime['name']}")
         
         embed = discord.Embed(
             title="✅ **KEJAHATAN BERHASIL!**",
@@ -551,12 +3349,12 @@ async def crime_command(ctx):
         embed.add_field(name="💵 Saldo Baru", value=f"**{new_balance}** koin", inline=True)
     else:
         # Check if user has enough money
-        user_data = economy.get_user_data(user_id)
-        loss = min(crime["fail_loss"], user_data["balance"])
+        user_data = await economy.get_user_data(user_id)
+        loss = min(crime["fail_loss"], user_data.balance)
         
         if loss > 0:
-            economy.remove_money(user_id, loss, f"Crime Failed: {crime['name']}")
-            user_data = economy.get_user_data(user_id)
+            await economy.remove_money(user_id, loss, f"Crime Failed: {crime['name']}")
+            user_data = await economy.get_user_data(user_id)
         
         embed = discord.Embed(
             title="❌ **KEJAHATAN GAGAL!**",
@@ -564,16 +3362,17 @@ async def crime_command(ctx):
             color=discord.Color.red()
         )
         embed.add_field(name="💸 Denda", value=f"**-{loss}** koin", inline=True)
-        embed.add_field(name="💵 Saldo Baru", value=f"**{user_data['balance']}** koin", inline=True)
+        embed.add_field(name="💵 Saldo Baru", value=f"**{user_data.balance}** koin", inline=True)
         embed.add_field(name="⚠️ Hukuman", value="2 jam cooldown", inline=True)
     
     await ctx.send(embed=embed)
 
 # ========== SISTEM TRANSFER ==========
 @bot.command(name='transfer', aliases=['tf', 'kirim'])
-@commands.cooldown(3, 60, commands.BucketType.user)  # 3x per menit
+@persistent_cooldown(3, 60, commands.BucketType.user)  # 3x per menit
 async def transfer_money(ctx, member: discord.Member, amount: int):
     """Transfer uang ke member lain"""
+    economy = economy_for(ctx)
     if amount <= 0:
         await ctx.send("❌ **Jumlah transfer harus lebih dari 0!**")
         return
@@ -586,17 +3385,17 @@ async def transfer_money(ctx, member: discord.Member, amount: int):
         await ctx.send("❌ **Tidak bisa transfer ke diri sendiri!**")
         return
     
-    success, message = economy.transfer_money(ctx.author.id, member.id, amount)
+    success, message = await economy.transfer_money(ctx.author.id, member.id, amount)
     
     if success:
-        user_data = economy.get_user_data(ctx.author.id)
+        user_data = await economy.get_user_data(ctx.author.id)
         embed = discord.Embed(
             title="✅ **TRANSFER BERHASIL!**",
             description=f"{ctx.author.mention} mentransfer **{amount}** koin ke {member.mention}",
             color=discord.Color.green()
         )
         embed.add_field(name="💰 Jumlah", value=f"**{amount}** koin", inline=True)
-        embed.add_field(name="💵 Saldo Anda", value=f"**{user_data['balance']}** koin", inline=True)
+        embed.add_field(name="💵 Saldo Anda", value=f"**{user_data.balance}** koin", inline=True)
         embed.add_field(name="📝 Catatan", value="Transfer tercatat di riwayat transaksi", inline=False)
     else:
         embed = discord.Embed(
@@ -607,23 +3406,48 @@ async def transfer_money(ctx, member: discord.Member, amount: int):
     
     await ctx.send(embed=embed)
 
+@bot.command(name='history', aliases=['riwayat'])
+@persistent_cooldown(1, 5, commands.BucketType.user)  # 1x per 5 detik
+async def transaction_history(ctx, page: int = 1):
+    """Lihat riwayat transaksi (10 per halaman)"""
+    economy = economy_for(ctx)
+    page = max(page, 1)
+    transactions, total = await economy.get_transactions(ctx.author.id, (page - 1) * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
+    total_pages = max(1, math.ceil(total / HISTORY_PAGE_SIZE))
+    
+    embed = discord.Embed(
+        title="📜 **RIWAYAT TRANSAKSI**",
+        description=f"Transaksi {ctx.author.mention}",
+        color=discord.Color.blue()
+    )
+    
+    if not transactions:
+        embed.add_field(name="📭 Kosong", value="Tidak ada transaksi di halaman ini", inline=False)
+    
+    for transaction in transactions:
+        amount = transaction.amount
+        if transaction.type == "income":
+            line = f"💵 **+{amount}** koin • {transaction.detail}"
+        elif transaction.type == "expense":
+            line = f"💸 **-{amount}** koin • {transaction.detail}"
+        elif transaction.type == "transfer_out":
+            line = f"📤 **-{amount}** koin • ke <@{transaction.detail}>"
+        else:
+            line = f"📥 **+{amount}** koin • dari <@{transaction.detail}>"
+        
+        timestamp = datetime.fromtimestamp(transaction.timestamp).strftime("%d/%m/%Y %H:%M")
+        embed.add_field(name=timestamp, value=line, inline=False)
+    
+    embed.set_footer(text=f"Halaman {page}/{total_pages} • {total} transaksi • {PREFIX}history <halaman>")
+    
+    await ctx.send(embed=embed)
+
 @bot.command(name='rich', aliases=['top', 'leaderboard'])
-@commands.cooldown(1, 30, commands.BucketType.channel)  # 1x per 30 detik per channel
+@persistent_cooldown(1, 30, commands.BucketType.channel)  # 1x per 30 detik per channel
 async def rich_leaderboard(ctx):
     """Lihat leaderboard orang terkaya"""
-    # Get top 10 users
-    users = []
-    for user_id_str, data in economy.data.items():
-        try:
-            user = await bot.fetch_user(int(user_id_str))
-            total_wealth = data["balance"] + data["bank"]
-            users.append((user, total_wealth, data["level"]))
-        except:
-            continue
-    
-    # Sort by wealth
-    users.sort(key=lambda x: x[1], reverse=True)
-    top_10 = users[:10]
+    economy = economy_for(ctx)
+    top_10 = await economy.get_top_wealth(10)
     
     embed = discord.Embed(
         title="🏆 **LEADERBOARD KAYA RAYA**",
@@ -631,17 +3455,23 @@ async def rich_leaderboard(ctx):
         color=discord.Color.gold()
     )
     
-    for i, (user, wealth, level) in enumerate(top_10, 1):
+    # Resolve nama hanya untuk baris yang ditampilkan (maks 10, biasanya dari cache member)
+    names = await NAMES.resolve_many(ctx.guild, [user_id for user_id, _ in top_10])
+    accounts = await asyncio.gather(*(economy.get_user_data(user_id) for user_id, _ in top_10))
+    for i, ((user_id, wealth), account) in enumerate(zip(top_10, accounts), 1):
+        name = names[user_id]
+        level = account.level
+        
         medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
         embed.add_field(
-            name=f"{medal} {user.name}",
+            name=f"{medal} {name}",
             value=f"💵 **{wealth:,}** koin | 🎮 Level {level}",
             inline=False
         )
     
-    # Add author's rank if not in top 10
-    author_wealth = economy.get_user_data(ctx.author.id)["balance"] + economy.get_user_data(ctx.author.id)["bank"]
-    author_rank = next((i+1 for i, (user, wealth, _) in enumerate(users) if user.id == ctx.author.id), len(users)+1)
+    # Add author's rank
+    author_wealth = (await economy.get_user_data(ctx.author.id)).wealth
+    author_rank = await economy.get_wealth_rank(ctx.author.id)
     
     embed.set_footer(text=f"Peringkat Anda: #{author_rank} dengan {author_wealth:,} koin")
     
@@ -649,51 +3479,31 @@ async def rich_leaderboard(ctx):
 
 # ========== SISTEM GACHA ==========
 @bot.command(name='gacha', aliases=['gatcha'])
-@commands.cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
-async def gacha_command(ctx, gacha_type: str = "normal"):
-    """Buka gacha untuk mendapatkan item langka"""
+@persistent_cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
+async def gacha_command(ctx, gacha_type: str = "normal", count: int = 1):
+    """Buka gacha untuk mendapatkan item langka (bisa multi-pull, maks 10x)"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
-    user_data = economy.get_user_data(user_id)
     
     # Check gacha type
     gacha_type = gacha_type.lower()
-    if gacha_type not in ["normal", "premium"]:
+    if gacha_type not in GACHA_POOLS:
         await ctx.send("❌ **Tipe gacha tidak valid!** Gunakan: `normal` atau `premium`")
         return
     
-    # Check cost
-    costs = {"normal": 100, "premium": 500}
-    cost = costs[gacha_type]
-    
-    if user_data["balance"] < cost:
-        await ctx.send(f"❌ **Saldo tidak cukup!** Dibutuhkan **{cost}** koin untuk gacha {gacha_type}")
+    if not 1 <= count <= GACHA_MAX_PULLS:
+        await ctx.send(f"❌ **Jumlah tarikan harus 1 - {GACHA_MAX_PULLS}!**")
         return
     
-    # Deduct cost
-    economy.remove_money(user_id, cost, f"Gacha {gacha_type}")
-    
-    # Get gacha pool
-    pool = economy.get_gacha_pool(gacha_type)
-    
-    # Weighted random selection
-    total_weight = sum(item["weight"] for item in pool)
-    random_value = random.uniform(0, total_weight)
-    
-    current_weight = 0
-    selected_item = None
-    
-    for item in pool:
-        current_weight += item["weight"]
-        if random_value <= current_weight:
-            selected_item = item
-            break
-    
-    # Add item to inventory
-    economy.add_gacha_item(user_id, selected_item)
+    # Tarik semua sekaligus: satu mutasi ledger, satu save, satu embed
+    cost = GACHA_COSTS[gacha_type] * count
+    result = await economy.gacha_pull(user_id, gacha_type, count)
+    if result is None:
+        await ctx.send(f"❌ **Saldo tidak cukup!** Dibutuhkan **{cost}** koin untuk gacha {gacha_type} x{count}")
+        return
     
-    # Give item value as money (or special effect for premium)
-    item_value = selected_item["value"]
-    economy.add_money(user_id, item_value, f"Gacha Item Value: {selected_item['name']}")
+    items, new_balance = result
+    item_value = sum(item["value"] for item in items)
     
     # Create embed
     rarity_colors = {
@@ -706,14 +3516,6 @@ async def gacha_command(ctx, gacha_type: str = "normal"):
         "divine": discord.Color.red()
     }
     
-    color = rarity_colors.get(selected_item["rarity"], discord.Color.blue())
-    
-    embed = discord.Embed(
-        title="🎊 **GACHA RESULT**",
-        description=f"{ctx.author.mention} membuka **Gacha {gacha_type.title()}**!",
-        color=color
-    )
-    
     # Add sparkle effect for higher rarities
     rarity_emojis = {
         "common": "⚪",
@@ -725,13 +3527,39 @@ async def gacha_command(ctx, gacha_type: str = "normal"):
         "divine": "🔴"
     }
     
-    embed.add_field(
-        name=f"{rarity_emojis.get(selected_item['rarity'], '⚪')} **ITEM DIPEROLEH**",
-        value=f"**{selected_item['name']}**",
-        inline=False
+    # Item dengan rarity tertinggi menentukan warna embed
+    rarity_order = list(rarity_colors)
+    best_item = max(items, key=lambda item: rarity_order.index(item["rarity"]))
+    color = rarity_colors.get(best_item["rarity"], discord.Color.blue())
+    
+    embed = discord.Embed(
+        title="🎊 **GACHA RESULT**",
+        description=f"{ctx.author.mention} membuka **Gacha {gacha_type.title()}**" + (f" **x{count}**!" if count > 1 else "!"),
+        color=color
     )
     
-    embed.add_field(name="✨ Rarity", value=f"**{selected_item['rarity'].upper()}**", inline=True)
+    if count == 1:
+        embed.add_field(
+            name=f"{rarity_emojis.get(best_item['rarity'], '⚪')} **ITEM DIPEROLEH**",
+            value=f"**{best_item['name']}**",
+            inline=False
+        )
+        embed.add_field(name="✨ Rarity", value=f"**{best_item['rarity'].upper()}**", inline=True)
+    else:
+        # Ringkas per item, rarity tertinggi di atas
+        item_counts = {}
+        for item in sorted(items, key=lambda item: rarity_order.index(item["rarity"]), reverse=True):
+            item_counts[item["name"]] = item_counts.get(item["name"], 0) + 1
+        
+        items_by_name = {item["name"]: item for item in items}
+        items_text = ""
+        for name, amount in item_counts.items():
+            rarity = items_by_name[name]["rarity"]
+            items_text += f"{rarity_emojis.get(rarity, '⚪')} **{name}** x{amount} ({rarity.title()})\n"
+        
+        embed.add_field(name="🎁 **ITEM DIPEROLEH**", value=items_text, inline=False)
+        embed.add_field(name="✨ Rarity Terbaik", value=f"**{best_item['rarity'].upper()}**", inline=True)
+    
     embed.add_field(name="💰 Nilai Item", value=f"**+{item_value}** koin", inline=True)
     embed.add_field(name="💸 Biaya Gacha", value=f"**-{cost}** koin", inline=True)
     
@@ -742,67 +3570,59 @@ async def gacha_command(ctx, gacha_type: str = "normal"):
     else:
         embed.add_field(name="📉 Loss", value=f"**{profit}** koin", inline=True)
     
+    embed.add_field(name="💵 Saldo Baru", value=f"**{new_balance}** koin", inline=True)
+    
     # Add special message for divine items
-    if selected_item["rarity"] == "divine":
+    if best_item["rarity"] == "divine":
         embed.add_field(name="🎇 **LEGENDARY PULL!**", value="Anda mendapatkan item DIVINE! 🎉", inline=False)
     
     await ctx.send(embed=embed)
 
-@bot.command(name='gachainfo')
-@commands.cooldown(1, 60, commands.BucketType.channel)  # 1x per menit per channel
-async def gacha_info(ctx):
-    """Lihat informasi tentang sistem gacha"""
+def build_gacha_info_embed():
+    """Embed info gacha dari GACHA_POOLS/GACHA_COSTS (di-cache, lihat update_gacha_config)"""
     embed = discord.Embed(
         title="🎰 **SISTEM GACHA**",
         description="Informasi tentang sistem gacha dan drop rates",
         color=discord.Color.purple()
     )
     
-    # Normal Gacha info
-    normal_pool = economy.get_gacha_pool("normal")
-    embed.add_field(
-        name="🎪 **GACHA NORMAL** (100 koin)",
-        value="Drop Rates:",
-        inline=False
-    )
-    
-    normal_text = ""
-    for item in normal_pool:
-        rate = (item["weight"] / sum(i["weight"] for i in normal_pool)) * 100
-        normal_text += f"{item['rarity'].title()}: **{rate:.1f}%** - {item['name']} (💰{item['value']})\n"
-    
-    embed.add_field(name="📊 Rates", value=normal_text, inline=False)
-    
-    # Premium Gacha info
-    premium_pool = economy.get_gacha_pool("premium")
-    embed.add_field(
-        name="💎 **GACHA PREMIUM** (500 koin)",
-        value="Drop Rates:",
-        inline=False
-    )
-    
-    premium_text = ""
-    for item in premium_pool:
-        rate = (item["weight"] / sum(i["weight"] for i in premium_pool)) * 100
-        premium_text += f"{item['rarity'].title()}: **{rate:.1f}%** - {item['name']} (💰{item['value']})\n"
-    
-    embed.add_field(name="📊 Rates", value=premium_text, inline=False)
+    for gacha_type, title in (("normal", "🎪 **GACHA NORMAL**"), ("premium", "💎 **GACHA PREMIUM**")):
+        pool = GACHA_POOLS.get(gacha_type, GACHA_POOLS["normal"])
+        embed.add_field(
+            name=f"{title} ({GACHA_COSTS[gacha_type]} koin)",
+            value="Drop Rates:",
+            inline=False
+        )
+        
+        total_weight = sum(item["weight"] for item in pool)  # Sekali per pool, bukan per item
+        rates_text = ""
+        for item in pool:
+            rate = (item["weight"] / total_weight) * 100
+            rates_text += f"{item['rarity'].title()}: **{rate:.1f}%** - {item['name']} (💰{item['value']})\n"
+        
+        embed.add_field(name="📊 Rates", value=rates_text, inline=False)
     
     embed.add_field(
         name="💡 Tips",
-        value=f"• Gunakan `{PREFIX}gacha normal` untuk gacha normal\n• Gunakan `{PREFIX}gacha premium` untuk gacha premium\n• Item akan otomatis dijual dan uang ditambahkan ke saldo",
+        value=f"• Gunakan `{PREFIX}gacha normal` untuk gacha normal\n• Gunakan `{PREFIX}gacha premium` untuk gacha premium\n• Gunakan `{PREFIX}gacha premium 10` untuk 10x tarikan sekaligus\n• Item akan otomatis dijual dan uang ditambahkan ke saldo",
         inline=False
     )
-    
-    await ctx.send(embed=embed)
+    return embed
+
+@bot.command(name='gachainfo')
+@persistent_cooldown(1, 60, commands.BucketType.channel)  # 1x per menit per channel
+async def gacha_info(ctx):
+    """Lihat informasi tentang sistem gacha"""
+    await ctx.send(embed=EMBED_CACHE.get("gachainfo", build_gacha_info_embed))
 
 # ========== INVENTORY SYSTEM ==========
 @bot.command(name='inventory', aliases=['inv', 'items'])
-@commands.cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
+@persistent_cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
 async def show_inventory(ctx, member: discord.Member = None):
     """Lihat inventory user"""
+    economy = economy_for(ctx)
     target = member or ctx.author
-    inventory = economy.get_inventory(target.id)
+    inventory = await economy.get_inventory(target.id)
     
     embed = discord.Embed(
         title=f"🎒 **INVENTORY {target.name}**",
@@ -810,24 +3630,19 @@ async def show_inventory(ctx, member: discord.Member = None):
     )
     
     # Regular items
-    if inventory["items"]:
+    if inventory.items:
         items_text = ""
-        for item_name, quantity in inventory["items"].items():
+        for item_name, quantity in inventory.items.items():
             items_text += f"• {item_name}: **{quantity}**\n"
     else:
         items_text = "Tidak ada item"
     
     embed.add_field(name="📦 **Items**", value=items_text, inline=False)
     
-    # Gacha items count by rarity
-    if inventory["gacha_items"]:
-        rarity_counts = {}
-        for item in inventory["gacha_items"]:
-            rarity = item["rarity"]
-            rarity_counts[rarity] = rarity_counts.get(rarity, 0) + 1
-        
+    # Gacha items count by rarity (sudah teragregasi di inventory)
+    if inventory.gacha_rarity:
         gacha_text = ""
-        for rarity, count in rarity_counts.items():
+        for rarity, count in inventory.gacha_rarity.items():
             gacha_text += f"• {rarity.title()}: **{count}** item\n"
         
         embed.add_field(name="🎰 **Gacha Items**", value=gacha_text, inline=False)
@@ -835,25 +3650,25 @@ async def show_inventory(ctx, member: discord.Member = None):
         embed.add_field(name="🎰 **Gacha Items**", value="Belum ada item gacha", inline=False)
     
     # Badges
-    if inventory["badges"]:
-        badges_text = "\n".join([f"• {badge}" for badge in inventory["badges"]])
+    if inventory.badges:
+        badges_text = "\n".join([f"• {badge}" for badge in inventory.badges])
         embed.add_field(name="🏆 **Badges**", value=badges_text, inline=False)
     
     # Total gacha items value
-    total_value = sum(item["value"] for item in inventory["gacha_items"])
-    embed.set_footer(text=f"Total nilai gacha items: {total_value} koin")
+    embed.set_footer(text=f"Total nilai gacha items: {inventory.gacha_value} koin")
     
     await ctx.send(embed=embed)
 
 @bot.command(name='sell')
-@commands.cooldown(1, 5, commands.BucketType.user)  # 1x per 5 detik
+@persistent_cooldown(1, 5, commands.BucketType.user)  # 1x per 5 detik
 async def sell_item(ctx, item_name: str, quantity: int = 1):
     """Jual item dari inventory"""
+    economy = economy_for(ctx)
     user_id = ctx.author.id
-    inventory = economy.get_inventory(user_id)
+    inventory = await economy.get_inventory(user_id)
     
     # Check if item exists
-    if item_name not in inventory["items"] or inventory["items"][item_name] < quantity:
+    if inventory.items.get(item_name, 0) < quantity:
         await ctx.send(f"❌ **Item tidak ditemukan atau jumlah tidak cukup!**")
         return
     
@@ -870,13 +3685,13 @@ async def sell_item(ctx, item_name: str, quantity: int = 1):
     base_value = item_values.get(item_name, 10)
     sell_price = base_value * quantity // 2  # 50% value
     
-    # Update inventory
-    inventory["items"][item_name] -= quantity
-    if inventory["items"][item_name] == 0:
-        del inventory["items"][item_name]
+    # Update inventory (jumlah dicek ulang saat mutasi diterapkan)
+    if await economy.add_to_inventory(user_id, item_name, -quantity) is None:
+        await ctx.send(f"❌ **Item tidak ditemukan atau jumlah tidak cukup!**")
+        return
     
     # Add money
-    new_balance = economy.add_money(user_id, sell_price, f"Sell {item_name}")
+    new_balance = await economy.add_money(user_id, sell_price, f"Sell {item_name}")
     
     embed = discord.Embed(
         title="💰 **ITEM TERJUAL!**",
@@ -888,13 +3703,11 @@ async def sell_item(ctx, item_name: str, quantity: int = 1):
     embed.add_field(name="💵 Harga Jual", value=f"**{sell_price}** koin", inline=True)
     embed.add_field(name="💎 Saldo Baru", value=f"**{new_balance}** koin", inline=True)
     
-    economy.schedule_save()
     await ctx.send(embed=embed)
 
 # ========== PERBAIKAN HELP COMMAND (DENGAN EKONOMI) ==========
-@bot.command(name='help')
-@commands.cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
-async def bot_help(ctx):
+def build_help_embed():
+    """Embed bantuan (statis, di-cache)"""
     embed = discord.Embed(
         title="𖥔˚ BANTUAN BOT SHOP & GAMES",
         description=f"Prefix: `{PREFIX}`",
@@ -930,51 +3743,96 @@ async def bot_help(ctx):
     )
     
     embed.set_footer(text="✅ Sistem dioptimasi untuk menghindari rate limit Discord")
-    
-    await ctx.send(embed=embed)
+    return embed
+
+@bot.command(name='help')
+@persistent_cooldown(1, 10, commands.BucketType.user)  # 1x per 10 detik
+async def bot_help(ctx):
+    await ctx.send(embed=EMBED_CACHE.get("help", build_help_embed))
 
 # ========== ADMIN COMMANDS ==========
-@bot.command(name='addmoney')
-@commands.has_permissions(administrator=True)
-@commands.cooldown(1, 10, commands.BucketType.user)
-async def admin_add_money(ctx, member: discord.Member, amount: int):
-    """Admin: Tambahkan uang ke user (admin only)"""
-    new_balance = economy.add_money(member.id, amount, f"Admin Add by {ctx.author.name}")
-    
+ALL_MEMBERS_KEYWORDS = ("all", "semua", "everyone", "@everyone")
+
+def resolve_bulk_target(ctx, target):
+    """Member/role/"all" -> (daftar member non-bot, label untuk embed)"""
+    if isinstance(target, discord.Member):
+        return [target], target.mention
+    if isinstance(target, str):
+        if target.lower() not in ALL_MEMBERS_KEYWORDS or ctx.guild is None:
+            raise commands.BadArgument(f"Target tidak dikenal: {target}")
+        target = ctx.guild.default_role
+    label = "semua member" if target.is_default() else target.mention
+    return [member for member in target.members if not member.bot], label
+
+def build_bulk_embed(ctx, label, members, amount, unit):
+    """Embed ringkasan satu aksi admin untuk banyak user"""
     embed = discord.Embed(
         title="👑 **ADMIN ACTION**",
-        description=f"{ctx.author.mention} menambahkan **{amount}** koin ke {member.mention}",
+        description=f"{ctx.author.mention} menambahkan **{amount}** {unit} ke {label}",
         color=discord.Color.gold()
     )
-    embed.add_field(name="💰 Jumlah", value=f"**{amount}** koin", inline=True)
-    embed.add_field(name="💵 Saldo Baru", value=f"**{new_balance}** koin", inline=True)
+    embed.add_field(name="💰 Jumlah", value=f"**{amount}** {unit}", inline=True)
+    embed.add_field(name="👥 Penerima", value=f"**{len(members)}** user", inline=True)
+    embed.add_field(name="📊 Total", value=f"**{amount * len(members):,}** {unit}", inline=True)
+    return embed
+
+@bot.command(name='addmoney')
+@commands.has_permissions(administrator=True)
+@persistent_cooldown(1, 10, commands.BucketType.user)
+async def admin_add_money(ctx, target: typing.Union[discord.Member, discord.Role, str], amount: int):
+    """Admin: Tambahkan uang ke user, role, atau semua member (admin only)"""
+    economy = economy_for(ctx)
+    members, label = resolve_bulk_target(ctx, target)
+    if isinstance(target, discord.Member):
+        new_balance = await economy.add_money(target.id, amount, f"Admin Add by {ctx.author.name}")
+        
+        embed = discord.Embed(
+            title="👑 **ADMIN ACTION**",
+            description=f"{ctx.author.mention} menambahkan **{amount}** koin ke {target.mention}",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="💰 Jumlah", value=f"**{amount}** koin", inline=True)
+        embed.add_field(name="💵 Saldo Baru", value=f"**{new_balance}** koin", inline=True)
+        
+        await ctx.send(embed=embed)
+        return
+    
+    if not members:
+        await ctx.send(f"❌ Tidak ada member di {label}!")
+        return
+    
+    await economy.add_money_bulk((member.id for member in members), amount, f"Admin Add by {ctx.author.name}")
+    await ctx.send(embed=build_bulk_embed(ctx, label, members, amount, "koin"))
+
+@bot.command(name='addxp')
+@commands.has_permissions(administrator=True)
+@persistent_cooldown(1, 10, commands.BucketType.user)
+async def admin_add_xp(ctx, target: typing.Union[discord.Member, discord.Role, str], amount: int):
+    """Admin: Tambahkan XP ke user, role, atau semua member (admin only)"""
+    economy = economy_for(ctx)
+    members, label = resolve_bulk_target(ctx, target)
+    if not members:
+        await ctx.send(f"❌ Tidak ada member di {label}!")
+        return
+    
+    level_ups = await economy.add_xp_bulk((member.id for member in members), amount)
+    
+    embed = build_bulk_embed(ctx, label, members, amount, "XP")
+    leveled = sum(1 for count in level_ups.values() if count)
+    if leveled:
+        embed.add_field(name="✨ Level Up", value=f"**{leveled}** user naik level", inline=False)
     
     await ctx.send(embed=embed)
 
 @bot.command(name='reseteco')
 @commands.has_permissions(administrator=True)
-@commands.cooldown(1, 30, commands.BucketType.user)
+@persistent_cooldown(1, 30, commands.BucketType.user)
 async def reset_economy(ctx, member: discord.Member):
     """Admin: Reset ekonomi user (admin only)"""
-    user_id_str = str(member.id)
-    
-    if user_id_str in economy.data:
-        old_balance = economy.data[user_id_str]["balance"]
-        economy.data[user_id_str] = {
-            "balance": 1000,
-            "bank": 0,
-            "xp": 0,
-            "level": 1,
-            "total_earned": 0,
-            "total_spent": 0,
-            "daily_streak": 0,
-            "last_daily": None,
-            "achievements": [],
-            "transactions": [],
-            "last_collect": None
-        }
-        economy._force_save()
-        
+    economy = economy_for(ctx)
+    old_balance = await economy.reset_user(member.id)
+    
+    if old_balance is not None:
         embed = discord.Embed(
             title="🔄 **RESET EKONOMI**",
             description=f"Ekonomi {member.mention} telah direset!",
@@ -991,18 +3849,112 @@ async def reset_economy(ctx, member: discord.Member):
     
     await ctx.send(embed=embed)
 
+def parse_audit_time(text):
+    """"YYYY-MM-DD" (akhir hari itu) atau "YYYY-MM-DD HH:MM[:SS]" -> epoch detik"""
+    moment = datetime.fromisoformat(text.strip())
+    if len(text.strip()) == 10:
+        moment = moment.replace(hour=23, minute=59, second=59)
+    return int(moment.timestamp())
+
+@bot.command(name='audit')
+@commands.has_permissions(administrator=True)
+@persistent_cooldown(1, 5, commands.BucketType.user)
+async def audit_balance(ctx, member: discord.Member, *, when: str):
+    """Admin: Saldo user pada tanggal/waktu tertentu dari ledger event (admin only)"""
+    try:
+        timestamp = parse_audit_time(when)
+    except ValueError:
+        await ctx.send(f"❌ **Format waktu tidak valid!** Gunakan: `{PREFIX}audit @user YYYY-MM-DD [HH:MM]`")
+        return
+    
+    economy = economy_for(ctx)
+    result = await economy.balance_at(member.id, timestamp)
+    if result is None:
+        await ctx.send("❌ **Ledger tidak mencakup waktu itu!** Riwayat saldo dimulai sejak checkpoint tertua yang disimpan.")
+        return
+    
+    moment = datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S")
+    embed = discord.Embed(
+        title="🧾 **AUDIT SALDO**",
+        description=f"Saldo {member.mention} pada **{moment}**",
+        color=discord.Color.blue()
+    )
+    if result["balance"] is None:
+        embed.add_field(name="💰 Saldo", value="Belum punya akun", inline=True)
+    else:
+        embed.add_field(name="💰 Saldo", value=f"**{result['balance']:,}** koin", inline=True)
+    checkpoint = datetime.fromtimestamp(result["checkpoint_time"]).strftime("%d/%m/%Y %H:%M")
+    embed.add_field(name="📍 Checkpoint", value=checkpoint, inline=True)
+    embed.add_field(name="🔁 Event di-replay", value=f"**{result['replayed']:,}**", inline=True)
+    
+    await ctx.send(embed=embed)
+
+@bot.command(name='profile')
+@commands.has_permissions(administrator=True)
+async def profile_command(ctx, action: str = "dump"):
+    """Admin: Profiling bot (start | stop | dump)"""
+    action = action.lower()
+    if action == "start":
+        if PROFILER.start():
+            await ctx.send("🔬 **Profiling dimulai.** Gunakan `.profile dump` untuk melihat hasil.")
+        else:
+            await ctx.send("⚠️ **Profiling sudah berjalan!**")
+        return
+    
+    if action == "stop":
+        if PROFILER.stop():
+            await ctx.send("⏹️ **Profiling dihentikan.** Data masih bisa di-dump.")
+        else:
+            await ctx.send("⚠️ **Profiling tidak sedang berjalan!**")
+        return
+    
+    if action != "dump":
+        await ctx.send("❌ **Aksi tidak valid!** Gunakan: `start`, `stop`, atau `dump`")
+        return
+    
+    path = PROFILER.dump()
+    if path is None:
+        await ctx.send("❌ **Belum ada data profiling!** Jalankan `.profile start` dulu.")
+        return
+    
+    duration = time.time() - PROFILER.started_at
+    embed = discord.Embed(
+        title="🔬 **HASIL PROFILING**",
+        description=f"Durasi sesi: **{duration:.0f}** detik • Status: **{'aktif' if PROFILER.active else 'berhenti'}**",
+        color=discord.Color.purple()
+    )
+    
+    command_lines = [
+        f"{name[:16]:<16} {count:>5}x {total * 1000:>9.1f}ms {worst * 1000:>8.1f}ms"
+        for name, count, total, worst in PROFILER.top_commands(10)
+    ]
+    embed.add_field(
+        name="⏱️ Command (jumlah, total, maks)",
+        value="```\n" + ("\n".join(command_lines) or "Belum ada command") + "\n```",
+        inline=False
+    )
+    
+    function_lines = [
+        f"{cumulative * 1000:>8.1f}ms {calls:>7} {func[:40]}"
+        for cumulative, total, calls, func in PROFILER.top_functions(10, path)
+    ]
+    embed.add_field(
+        name="🧮 Fungsi teratas (kumulatif, panggilan)",
+        value="```\n" + "\n".join(function_lines)[:1000] + "\n```",
+        inline=False
+    )
+    embed.set_footer(text=f"File lengkap: {path}")
+    
+    await ctx.send(embed=embed, file=discord.File(path))
+
 # ========== TAMBAHKAN COMMAND-CCOMMAND LAIN YANG SUDAH ADA ==========
 @bot.command(name='done')
-@commands.cooldown(1, 10, commands.BucketType.user)
+@persistent_cooldown(1, 10, commands.BucketType.user)
 async def done_command(ctx):
     """Kirim link testimoni"""
     await ctx.send("**https://discord.com/channels/1452584833766129686/1452593189595648112\n\nmohon untuk share testi di sini ya mas, bebas record/ss**")
 
-@bot.command(name='pricelist')
-@commands.cooldown(1, 30, commands.BucketType.channel)
-async def pricelist_command(ctx):
-    """Tampilkan pricelist dalam format teks yang dipisah"""
-    pricelist_part1 = """
+PRICELIST_TEXT = """
 📋 **PRICELIST DISCSHOP** 📋
 ========================================
 
@@ -1018,29 +3970,23 @@ https://discord.com/channels/1452584833766129686/1452611090906091620/14530189056
 **J0KI ORBS**
 https://discord.com/channels/1452584833766129686/1453053305184849960
 """
-    await ctx.send(pricelist_part1)
+PAYMENT_QR_URL = "https://image2url.com/r2/bucket3/images/1766903385567-ce0ecef3-a493-4bd4-8b5c-ca5c68f3acc5.png"
 
-@bot.command(name='payment')
-@commands.cooldown(1, 30, commands.BucketType.channel)
-async def show_payment(ctx, invoice_id: str = None):
-    """Tampilkan gambar pembayaran QR Code"""
-    embed = discord.Embed(
-        title="💳 **METODE PEMBAYARAN**",
-        description="Pilih metode pembayaran di bawah:",
-        color=discord.Color.green()
+@bot.command(name='pricelist')
+@persistent_cooldown(1, 30, commands.BucketType.channel)
+async def pricelist_command(ctx):
+    """Tampilkan pricelist dalam format teks yang dipisah"""
+    await ctx.send(PRICELIST_TEXT)
+
+def build_payment_embed():
+    """Embed cara pembayaran (statis, di-cache)"""
+    instructions = discord.Embed(
+        title="📋 **CARA PEMBAYARAN**",
+        color=discord.Color.orange()
     )
-    
-    try:
-        await ctx.send("**🏦 QR CODE ALLPAY:**")
-        await ctx.send("https://image2url.com/r2/bucket3/images/1766903385567-ce0ecef3-a493-4bd4-8b5c-ca5c68f3acc5.png")
-        
-        instructions = discord.Embed(
-            title="📋 **CARA PEMBAYARAN**",
-            color=discord.Color.orange()
-        )
-        instructions.add_field(
-            name="LANGKAH-LANGKAH",
-            value="""
+    instructions.add_field(
+        name="LANGKAH-LANGKAH",
+        value="""
             1️⃣ **Pilih metode** transfer di atas
             2️⃣ **Scan QR** dengan aplikasi bank/e-wallet
             3️⃣ **Transfer** sesuai jumlah
@@ -1048,15 +3994,27 @@ async def show_payment(ctx, invoice_id: str = None):
             5️⃣ **Kirim** ke admin untuk konfirmasi
             
             """,
-            inline=False
-        )
+        inline=False
+    )
+    return instructions
+
+@bot.command(name='payment')
+@persistent_cooldown(1, 30, commands.BucketType.channel)
+async def show_payment(ctx, invoice_id: str = None):
+    """Tampilkan gambar pembayaran QR Code"""
+    try:
+        await ctx.send("**🏦 QR CODE ALLPAY:**")
+        await ctx.send(PAYMENT_QR_URL)
         
         if invoice_id:
+            instructions = build_payment_embed()  # Embed baru, embed di cache tidak boleh diubah
             instructions.add_field(
                 name="📄 **INVOICE ID**",
                 value=f"`{invoice_id}`",
                 inline=False
             )
+        else:
+            instructions = EMBED_CACHE.get("payment", build_payment_embed)
         
         await ctx.send(embed=instructions)
         
@@ -1064,24 +4022,37 @@ async def show_payment(ctx, invoice_id: str = None):
         await ctx.send(f"❌ Gagal menampilkan QR Code: {str(e)}")
 
 @bot.command(name='payimage')
-@commands.cooldown(1, 30, commands.BucketType.channel)
+@persistent_cooldown(1, 30, commands.BucketType.channel)
 async def send_payment_image(ctx):
     """Kirim gambar QR Code pembayaran langsung"""
     await ctx.send("**💳 GAMBAR PEMBAYARAN:**")
-    await ctx.send("https://image2url.com/r2/bucket3/images/1766903385567-ce0ecef3-a493-4bd4-8b5c-ca5c68f3acc5.png")
+    await ctx.send(PAYMENT_QR_URL)
     await ctx.send("**📋 INSTRUKSI:** Transfer sesuai nominal, lalu kirim bukti ke admin!")
 
 @bot.command(name='ping')
-@commands.cooldown(1, 5, commands.BucketType.user)
+@persistent_cooldown(1, 5, commands.BucketType.user)
 async def ping(ctx):
     """Cek koneksi bot"""
     latency = round(bot.latency * 1000)
-    await ctx.send(f"🏓 Pong! {latency}ms")
+    if not BOT_SHARDED:
+        await ctx.send(f"🏓 Pong! {latency}ms")
+        return
+    
+    current = ctx.guild.shard_id if ctx.guild else 0
+    lines = [
+        f"{'▶' if shard['shard'] == current else ' '} #{shard['shard']:<3} {shard['latency_ms'] if shard['latency_ms'] is not None else '-':>7}ms {shard['events_per_sec']:>8} ev/s"
+        for shard in SHARDS.snapshot()
+    ]
+    shard_count = len(lines)
+    if shard_count > 40:
+        lines = lines[:40] + [f"... +{shard_count - 40} shard lain (lihat /healthz)"]
+    await ctx.send(f"🏓 Pong! {latency}ms (rata-rata {shard_count} shard)\n```\n" + "\n".join(lines) + "\n```")
 
 # ========== COOLDOWN ERROR HANDLER ==========
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandOnCooldown):
+        COMMAND_COOLDOWN_REJECTIONS.inc(command=ctx.command.qualified_name)
         # Format waktu cooldown
         seconds = error.retry_after
         if seconds > 3600:
@@ -1120,17 +4091,28 @@ async def on_command_error(ctx, error):
 async def on_disconnect():
     """Save data saat bot disconnect"""
     print("⚠️ Bot disconnected, saving data...")
-    economy._force_save()
+    await economies.drain()
+    await economies.save()
+    await COOLDOWN_STORE.save()
 
 @bot.event
 async def close():
     """Save data saat bot shutdown"""
     print("🛑 Bot shutting down, saving data...")
-    economy._force_save()
+    await economies.drain()
+    await economies.save()
+    await COOLDOWN_STORE.save()
     await super().close()
 
 # ========== RUNNING BOT ==========
-if __name__ == "__main__":
+if __name__ == "__main__" and "--economy-service" in sys.argv:
+    # Proses layanan ekonomi terpisah: python bot_shop.py --economy-service
+    try:
+        asyncio.run(run_economy_service())
+    except KeyboardInterrupt:
+        print("\n🛑 Layanan ekonomi dihentikan")
+        economies._force_save()
+elif __name__ == "__main__":
     print("🚀 Starting Discord Shop Bot with Economy System...")
     print(f"✅ Economy features: Balance, Daily, Work, Crime, Transfer, Gacha")
     print(f"✅ Game features: Tebak Angka, Suit, Flip Coin, Dadu, Slot")
@@ -1138,13 +4120,17 @@ if __name__ == "__main__":
     print(f"✅ OPTIMIZATION: XP auto system REMOVED to prevent rate limits")
     print(f"✅ OPTIMIZATION: Cooldowns added to all commands")
     print(f"✅ OPTIMIZATION: Debounced file saving implemented")
+    if not ECONOMY_SOCKET:
+        economies.migrate_legacy()  # Dengan layanan ekonomi, data dimiliki proses layanan
     print("🔗 Connecting to Discord...")
     
     try:
         bot.run(TOKEN)
     except KeyboardInterrupt:
         print("\n🛑 Bot stopped by user")
-        economy._force_save()
+        economies._force_save()
+        COOLDOWN_STORE._force_save()
     except Exception as e:
         print(f"❌ Error: {e}")
-        economy._force_save()
\ No newline at end of file
+        economies._force_save()
+        COOLDOWN_STORE._force_save()
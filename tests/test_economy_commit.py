@@ -0,0 +1,109 @@
+"""Group commit: mutasi yang gagal di-commit tidak pernah muncul lagi (JSON + SQLite)
+
+Jalankan: python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi + cooldown dari cwd saat import
+import bot_shop
+
+def open_economy(root, backend):
+    storage = bot_shop.SqliteStorage(os.path.join(root, bot_shop.SQLITE_FILE)) if backend == "sqlite" else bot_shop.JsonStorage(root)
+    return bot_shop.EconomySystem(storage=storage, root=str(root))
+
+def fail(*args):
+    raise OSError("disk penuh")
+
+def break_commit(monkeypatch, economy, backend):
+    """Buat commit batch berikutnya gagal di titik durable-nya"""
+    if backend == "sqlite":
+        monkeypatch.setattr(economy.storage, "write", fail)
+    else:
+        monkeypatch.setattr(bot_shop.os, "fsync", fail)  # Journal sudah di-write, fsync gagal
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_failed_commit_is_rolled_back(tmp_path, monkeypatch, backend):
+    async def main():
+        economy = open_economy(tmp_path, backend)
+        assert await economy.add_money(7, 100, "ok") == 1100
+        with monkeypatch.context() as patch:
+            break_commit(patch, economy, backend)
+            with pytest.raises(Exception):
+                await economy.add_money(7, 500, "gagal")
+            with pytest.raises(Exception):
+                await economy.add_money(8, 500, "akun baru gagal")
+        assert economy.get_user_data(7).balance == 1100
+        assert economy.get_wealth_rank(7) == 1
+        assert 8 not in economy.data
+        assert await economy.add_money(7, 1, "sesudah") == 1101
+        await economy.drain()
+        await economy.save()
+        return economy
+    economy = asyncio.run(main())
+    economy.storage.close()
+    economy.event_ledger.close()
+    
+    reloaded = open_economy(tmp_path, backend)
+    assert reloaded.get_user_data(7).balance == 1101
+    assert 8 not in reloaded.data
+    assert reloaded.event_ledger.recent_balances() == {7: 1101}
+
+def test_rejected_record_leaves_no_account(tmp_path):
+    async def main():
+        economy = open_economy(tmp_path, "json")
+        with pytest.raises(bot_shop.MutationRejected):
+            await economy._submit({"op": "remove", "u": 9, "a": 10 ** 9, "r": "x", "t": 0})
+        await economy.drain()
+        return economy
+    economy = asyncio.run(main())
+    assert 9 not in economy.data
+    assert not economy._dirty["economy"]
+    assert economy.event_ledger.count == 0
+
+def test_archive_is_written_only_after_commit(tmp_path, monkeypatch):
+    threshold = bot_shop.TX_HOT_LIMIT + bot_shop.TX_ARCHIVE_BATCH
+    
+    async def main():
+        economy = open_economy(tmp_path, "json")
+        for amount in range(1, threshold):
+            await economy.add_money(7, amount, "gaji")
+        with monkeypatch.context() as patch:
+            break_commit(patch, economy, "json")
+            with pytest.raises(OSError):
+                await economy.add_money(7, 1000, "gagal")  # Akan memicu pengarsipan
+        assert not economy.tx_archive._read_index(7)
+        
+        # Arsip gagal setelah commit: pemanggil tetap sukses, segmen diulang di batch berikutnya
+        with monkeypatch.context() as patch:
+            patch.setattr(economy.tx_archive, "append", fail)
+            await economy.add_money(7, threshold, "gaji")
+        assert not economy.tx_archive._read_index(7)
+        history, total = economy.get_transactions(7, 0, threshold + 1)
+        await economy.add_money(7, threshold + 1, "gaji")
+        return economy, history, total
+    economy, history, total = asyncio.run(main())
+    assert total == threshold
+    assert [transaction.amount for transaction in history] == list(range(threshold, 0, -1))
+    assert economy.tx_archive._read_index(7)
+    history, total = economy.get_transactions(7, 0, threshold + 1)
+    assert [transaction.amount for transaction in history] == list(range(threshold + 1, 0, -1))
+
+def test_reads_do_not_create_records(tmp_path):
+    async def main():
+        economy = open_economy(tmp_path, "json")
+        assert economy.get_user_data(5).balance == 1000
+        assert economy.get_inventory(5).items == {}
+        assert 5 not in economy.data and 5 not in economy.inventory_data
+        assert not any(economy._dirty.values())
+        await economy.add_to_inventory(5, "Pedang", 2)
+        return economy
+    economy = asyncio.run(main())
+    assert economy.get_inventory(5).items == {"Pedang": 2}
+    assert economy._dirty["inventory"] == {5}
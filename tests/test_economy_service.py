@@ -0,0 +1,125 @@
+"""Layanan ekonomi lewat Unix socket lokal (tanpa jaringan / koneksi Discord)
+
+Jalankan: python -m pytest -q tests
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi + cooldown dari cwd saat import
+import bot_shop
+
+pytestmark = pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="butuh Unix socket")
+
+def run_with_service(tmp_path, scenario):
+    """Jalankan `scenario(service, client)` dengan layanan + client di event loop yang sama"""
+    async def main():
+        registry = bot_shop.GuildEconomies(directory=str(tmp_path / "guilds"))
+        service = bot_shop.EconomyService(str(tmp_path / "economy.sock"), registry)
+        await service.start()
+        client = bot_shop.EconomyClient(service.path)
+        try:
+            return await scenario(service, client)
+        finally:
+            await client.close()
+            await service.close()
+    return asyncio.run(main())
+
+def test_pipelined_add_money_shares_group_commit(tmp_path):
+    async def scenario(service, client):
+        balances = await asyncio.gather(*(client.call(1, "add_money", user_id % 10, 5, "ipc") for user_id in range(500)))
+        economy = service.registry.get(1)
+        return balances, economy.ledger_stats["batches"], economy.get_user_data(3).balance
+
+    balances, batches, balance = run_with_service(tmp_path, scenario)
+    assert len(balances) == 500
+    assert balance == 1000 + 50 * 5
+    assert batches < 500  # Request yang di-pipeline masuk batch yang sama
+
+def test_mutation_rejected_is_sent_as_error_frame(tmp_path):
+    async def scenario(service, client):
+        economy = service.registry.get(1)
+
+        async def remove_without_check(user_id, amount, reason):
+            # Tanpa cek saldo di depan: penolakan datang dari writer
+            return await economy._submit({"op": "remove", "u": user_id, "a": amount, "r": reason, "t": int(time.time())})
+
+        economy.remove_money = remove_without_check
+        with pytest.raises(bot_shop.MutationRejected):
+            await client.call(1, "remove_money", 7, 10 ** 9, "terlalu banyak")
+        with pytest.raises(bot_shop.EconomyServiceError):
+            await client.call(1, "_apply", {})
+        # Koneksi tetap bisa dipakai setelah error
+        return await client.call(1, "add_money", 7, 1, "ok")
+
+    assert run_with_service(tmp_path, scenario) == 1001
+
+def test_records_are_decoded(tmp_path):
+    async def scenario(service, client):
+        await client.call(1, "add_money", 7, 250, "Gaji")
+        await client.call(1, "transfer_money", 7, 8, 50)
+        account = await client.call(1, "get_user_data", 7)
+        transactions, total = await client.call(1, "get_transactions", 7, 0, 10)
+        return account, transactions, total
+
+    account, transactions, total = run_with_service(tmp_path, scenario)
+    assert isinstance(account, bot_shop.Account)
+    assert account.balance == 1200
+    assert total == 2
+    assert all(isinstance(transaction, bot_shop.Transaction) for transaction in transactions)
+    assert transactions[0].type == "transfer_out" and transactions[0].detail == 8
+    assert transactions[1].type == "income" and transactions[1].detail == "Gaji"
+
+def start_service_process(directory, socket_path):
+    """Proses `bot_shop.py --economy-service` di `directory`, tunggu sampai socket siap"""
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "bot_shop.py"), "--economy-service"],
+        cwd=directory, env={**os.environ, "ECONOMY_SOCKET": ""},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.time() > deadline:
+            process.kill()
+            raise RuntimeError("Layanan ekonomi gagal start")
+        time.sleep(0.05)
+    return process
+
+def test_client_reconnects_after_service_restart(tmp_path):
+    socket_path = str(tmp_path / "economy.sock")
+    process = start_service_process(tmp_path, socket_path)
+
+    async def main():
+        client = bot_shop.EconomyClient(socket_path)
+        try:
+            assert await client.call(1, "add_money", 7, 100, "sebelum") == 1100
+
+            # Proses layanan mati mendadak lalu dijalankan ulang
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+            await asyncio.sleep(0.1)
+            restarted = start_service_process(tmp_path, socket_path)
+            try:
+                # Mutasi yang sudah dijawab sudah durable di journal
+                return await client.call(1, "add_money", 7, 1, "sesudah")
+            finally:
+                restarted.send_signal(signal.SIGINT)
+                restarted.wait(timeout=30)
+        finally:
+            await client.close()
+
+    try:
+        assert asyncio.run(main()) == 1101
+    finally:
+        if process.poll() is None:
+            process.kill()
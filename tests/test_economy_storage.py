@@ -0,0 +1,210 @@
+"""Backend storage ekonomi: JsonStorage (shard biner + journal) dan SqliteStorage (+ HotRowCache)
+
+Jalankan: python -m pytest -q tests
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi + cooldown dari cwd saat import
+import bot_shop
+
+def open_economy(root, backend, **options):
+    if backend == "sqlite":
+        storage = bot_shop.SqliteStorage(os.path.join(root, bot_shop.SQLITE_FILE), **options)
+    else:
+        storage = bot_shop.JsonStorage(str(root))
+    return bot_shop.EconomySystem(storage=storage, root=str(root))
+
+def close(economy):
+    economy.storage.close()
+    economy.event_ledger.close()
+
+def run(economy, *calls):
+    """Jalankan `calls` berurutan di satu event loop (satu kali per instance), tunggu batch + ledger selesai"""
+    async def main():
+        results = [await call(economy) for call in calls]
+        await economy.drain()
+        return results
+    return asyncio.run(main())
+
+async def save(economy):
+    assert await economy.save()
+
+def balances(economy, user_ids):
+    return {user_id: economy.get_user_data(user_id).balance for user_id in user_ids}
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_save_reload_round_trip(tmp_path, backend):
+    economy = open_economy(tmp_path, backend)
+    economy.gacha_data["pity"] = {"1": 4}
+    run(
+        economy,
+        lambda e: e.add_money(1, 250, "gaji"),
+        lambda e: e.transfer_money(1, 2, 100),
+        lambda e: e.add_to_inventory(2, "Pedang", 3),
+        save
+    )
+    close(economy)
+    
+    reloaded = open_economy(tmp_path, backend)
+    assert balances(reloaded, [1, 2]) == {1: 1150, 2: 1100}
+    assert reloaded.get_inventory(2).items == {"Pedang": 3}
+    assert reloaded.gacha_data == {"pity": {"1": 4}}
+    transactions, total = reloaded.get_transactions(1)
+    assert total == 2 and transactions[0].type == "transfer_out"
+    close(reloaded)
+
+def test_json_snapshot_is_hydrated_lazily(tmp_path):
+    economy = open_economy(tmp_path, "json")
+    run(economy, lambda e: e.add_money_bulk(list(range(1, 101)), 5, "event"), save)
+    economy.event_ledger.checkpoint()  # Tanpa event sejak checkpoint: verifikasi ledger tidak menyentuh akun
+    close(economy)
+    
+    reloaded = open_economy(tmp_path, "json")
+    assert not reloaded.data.loaded  # Hanya di-mmap, belum ada yang di-decode
+    assert len(reloaded.data) == 100
+    assert reloaded.get_user_data(42).balance == 1005
+    assert list(reloaded.data.loaded) == [42]
+    close(reloaded)
+
+def test_json_torn_final_journal_line_is_ignored(tmp_path):
+    economy = open_economy(tmp_path, "json")
+    run(economy, lambda e: e.add_money(1, 100, "ok"), lambda e: e.add_money(1, 10, "ok"))
+    close(economy)
+    with open(tmp_path / bot_shop.JOURNAL_FILE, "a") as f:
+        f.write('{"op":"add","u":1,"a":5000,"r":"terpo')  # Crash di tengah write
+    
+    reloaded = open_economy(tmp_path, "json")
+    assert reloaded.get_user_data(1).balance == 1110
+    # Record berikutnya tidak boleh tersambung ke baris terpotong
+    run(reloaded, lambda e: e.add_money(1, 1, "sesudah"))
+    close(reloaded)
+    
+    again = open_economy(tmp_path, "json")
+    assert again.get_user_data(1).balance == 1111
+    close(again)
+
+def test_json_crash_during_save_replays_journal(tmp_path, monkeypatch):
+    real_write = bot_shop.atomic_write
+    def crash_on_manifest(path, text):
+        if path.endswith(bot_shop.MANIFEST_FILE):
+            raise OSError("crash sebelum manifest diganti")
+        real_write(path, text)
+    
+    async def failed_save(economy):
+        with monkeypatch.context() as patch:
+            patch.setattr(bot_shop, "atomic_write", crash_on_manifest)
+            assert not await economy.save()
+    
+    economy = open_economy(tmp_path, "json")
+    run(
+        economy,
+        lambda e: e.add_money(1, 100, "ok"),
+        save,
+        lambda e: e.add_money(1, 20, "sebelum crash"),
+        lambda e: e.add_money(3, 30, "akun baru"),
+        failed_save
+    )
+    close(economy)  # Proses mati tanpa save berikutnya
+    
+    shard_files = set(os.listdir(tmp_path / bot_shop.SHARD_DIR))
+    reloaded = open_economy(tmp_path, "json")
+    assert balances(reloaded, [1, 3]) == {1: 1120, 3: 1030}
+    # Shard dari save yang gagal tidak tercatat di manifest dan dibuang
+    assert set(os.listdir(tmp_path / bot_shop.SHARD_DIR)) < shard_files
+    assert reloaded.event_ledger.recent_balances() == {1: 1120, 3: 1030}
+    close(reloaded)
+
+def test_json_shards_grow_with_accounts(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_shop, "SHARD_TARGET_ACCOUNTS", 10)
+    monkeypatch.setattr(bot_shop, "SHARD_COUNT", 8)
+    shard_counts = []
+    
+    async def save_and_count(economy):
+        await save(economy)
+        shard_counts.append(economy.storage._shard_count)
+    
+    economy = open_economy(tmp_path, "json")
+    run(
+        economy,
+        lambda e: e.add_money_bulk(list(range(1, 16)), 1, "awal"),
+        save_and_count,
+        lambda e: e.add_money_bulk(list(range(16, 61)), 2, "gelombang 2"),
+        save_and_count
+    )
+    assert shard_counts == [2, 8]
+    close(economy)
+    
+    with open(tmp_path / bot_shop.MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    assert manifest["shards"] == 8 and len(manifest["files"]["economy"]) == 8
+    reloaded = open_economy(tmp_path, "json")
+    assert len(reloaded.data) == 60
+    assert balances(reloaded, [1, 15, 16, 60]) == {1: 1001, 15: 1001, 16: 1002, 60: 1002}
+    close(reloaded)
+
+def test_sqlite_failed_write_leaves_no_partial_rows(tmp_path):
+    economy = open_economy(tmp_path, "sqlite")
+    run(economy, lambda e: e.add_money(1, 100, "ok"))
+    snapshot = {
+        "accounts": [(1, 1, 0, json.dumps(bot_shop.Account(balance=1).to_dict())), (2, 2, 0, None)],  # Baris kedua melanggar NOT NULL
+        "inventories": [],
+        "gacha": None
+    }
+    with pytest.raises(Exception):
+        economy.storage.write(snapshot)
+    close(economy)
+    
+    reloaded = open_economy(tmp_path, "sqlite")
+    assert balances(reloaded, [1]) == {1: 1100}
+    assert 2 not in reloaded.data
+    close(reloaded)
+
+def test_sqlite_committed_batch_survives_crash(tmp_path):
+    economy = open_economy(tmp_path, "sqlite")
+    run(economy, lambda e: e.add_money(1, 100, "ok"), lambda e: e.add_to_inventory(1, "Perisai", 1))
+    # Tanpa save/close: batch sudah durable begitu pemanggil menerima hasilnya
+    reloaded = open_economy(tmp_path, "sqlite")
+    assert balances(reloaded, [1]) == {1: 1100}
+    assert reloaded.get_inventory(1).items == {"Perisai": 1}
+    close(reloaded)
+    close(economy)
+
+def test_sqlite_hot_row_cache_grows_past_capacity(tmp_path):
+    economy = open_economy(tmp_path, "sqlite", cache_size=5)
+    run(economy, *(lambda e, user_id=user_id: e.add_money(user_id, user_id, "gaji") for user_id in range(1, 41)))
+    assert len(economy.data._rows) <= 5  # Baris yang sudah tersimpan di-evict
+    assert balances(economy, range(1, 41)) == {user_id: 1000 + user_id for user_id in range(1, 41)}
+    
+    # Baris dirty tidak boleh di-evict sebelum tersimpan
+    economy._dirty["economy"].add(1)
+    economy.get_user_data(1)
+    for user_id in range(2, 41):
+        economy.get_user_data(user_id)
+    assert economy.data.peek(1) is not None
+    economy._dirty["economy"].clear()
+    close(economy)
+
+def test_legacy_data_needs_configured_owner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(bot_shop.ECONOMY_FILE, "w") as f:
+        json.dump({"7": bot_shop.Account(balance=4321).to_dict()}, f)
+    
+    with pytest.raises(RuntimeError):
+        bot_shop.GuildEconomies(directory="guilds", default_guild_id=None).migrate_legacy()
+    assert os.path.exists(bot_shop.ECONOMY_FILE)
+    
+    registry = bot_shop.GuildEconomies(directory="guilds", default_guild_id=55)
+    registry.migrate_legacy()
+    assert not os.path.exists(bot_shop.ECONOMY_FILE)
+    economy = registry.get(55)
+    assert economy.get_user_data(7).balance == 4321
+    assert registry.get(None) is economy  # DM memakai partisi pemilik data lama
+    close(economy)
@@ -0,0 +1,150 @@
+"""EventLedger: replay dari checkpoint, tail tanpa penanda commit, `balance_at` vs saldo materialized, `.audit`
+
+Jalankan: python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # bot_shop memuat data ekonomi + cooldown dari cwd saat import
+import bot_shop
+
+CODES = bot_shop.LEDGER_KIND_CODES
+
+def event(timestamp, user_id, delta, kind="income"):
+    return (timestamp, user_id, delta, CODES[kind])
+
+def new_ledger(tmp_path, balances):
+    """Ledger baru dengan checkpoint genesis, return (ledger, timestamp genesis)"""
+    ledger = bot_shop.EventLedger(str(tmp_path / "ledger"))
+    ledger.genesis(balances.items())
+    return ledger, ledger._checkpoints()[0][1]
+
+def test_balance_at_replays_from_nearest_checkpoint(tmp_path):
+    ledger, t0 = new_ledger(tmp_path, {1: 1000, 2: 500})
+    ledger.append([event(t0 + 10, 1, 100), event(t0 + 10, 2, -50, "expense")], 1)
+    ledger.append([event(t0 + 20, 1, -30, "expense")], 2)
+    assert ledger.checkpoint()
+    ledger.append([event(t0 + 30, 1, 5)], 3)
+    
+    assert ledger.balance_at(1, t0 - 100) is None  # Sebelum checkpoint tertua
+    assert ledger.balance_at(1, t0 + 15)["balance"] == 1100  # Checkpoint genesis + replay
+    at_checkpoint = ledger.balance_at(1, t0 + 25)
+    assert at_checkpoint["balance"] == 1070 and at_checkpoint["replayed"] == 0
+    assert ledger.balance_at(1, t0 + 35)["balance"] == 1075
+    assert ledger.balance_at(2, t0 + 35)["balance"] == 450
+    assert ledger.balance_at(3, t0 + 35)["balance"] is None  # Belum punya akun
+    assert ledger.recent_balances() == {1: 1075}
+    ledger.close()
+
+def test_uncommitted_tail_is_dropped_on_open(tmp_path):
+    ledger, t0 = new_ledger(tmp_path, {1: 1000})
+    ledger.append([event(t0 + 10, 1, 100)], 7)
+    ledger.close()
+    # Crash di tengah batch: event tertulis tanpa penanda commit (event terakhir terpotong)
+    with open(tmp_path / "ledger" / "events.bin", "ab") as f:
+        f.write(bot_shop.EventLedger.EVENT.pack(*event(t0 + 20, 1, 9999)))
+        f.write(bot_shop.EventLedger.EVENT.pack(*event(t0 + 20, 1, 1))[:5])
+    
+    reopened = bot_shop.EventLedger(str(tmp_path / "ledger"))
+    assert reopened.count == 2 and reopened.journal_seq == 7
+    assert reopened.balance_at(1, t0 + 60)["balance"] == 1100
+    # Batch berikutnya tidak ikut meng-commit sisa tail
+    reopened.append([event(t0 + 30, 1, 1)], 8)
+    assert reopened.balance_at(1, t0 + 60)["balance"] == 1101
+    reopened.close()
+
+def test_checkpoints_are_pruned_to_latest(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_shop, "LEDGER_CHECKPOINT_KEEP", 2)
+    ledger, t0 = new_ledger(tmp_path, {1: 1000})
+    for step in range(1, 5):
+        ledger.append([event(t0 + step * 10, 1, step)], step)
+        ledger.checkpoint()
+    
+    checkpoints = ledger._checkpoints()
+    assert [timestamp for _, timestamp, _ in checkpoints] == [t0 + 30, t0 + 40]
+    assert ledger.balance_at(1, t0 + 15) is None  # Checkpoint yang dibutuhkan sudah dipangkas
+    assert ledger.balance_at(1, t0 + 45)["balance"] == 1010
+    ledger.close()
+    
+    reopened = bot_shop.EventLedger(str(tmp_path / "ledger"))
+    assert not reopened.is_new and reopened.recent_balances() == {}
+    reopened.close()
+
+def open_economy(root):
+    return bot_shop.EconomySystem(storage=bot_shop.JsonStorage(str(root)), root=str(root))
+
+def test_balance_at_matches_materialized_balance(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_shop, "LEDGER_CHECKPOINT_EVERY", 8)
+    
+    async def main(economy):
+        for step in range(20):
+            await economy.add_money(step % 4, 10 + step, "gaji")
+            await economy.transfer_money(step % 4, 4, 3)
+        await economy.remove_money(4, 7, "beli")
+        await economy.reset_user(2)
+        await economy.drain()
+        if economy._checkpoint_task is not None:
+            await economy._checkpoint_task
+    
+    economy = open_economy(tmp_path)
+    asyncio.run(main(economy))
+    assert len(economy.event_ledger._checkpoints()) > 1  # Replay mulai dari checkpoint berkala
+    now = int(time.time()) + 1
+    for user_id in range(5):
+        assert economy.event_ledger.balance_at(user_id, now)["balance"] == economy.get_user_data(user_id).balance
+    economy.storage.close()
+    economy.event_ledger.close()
+
+def test_journal_replay_restores_events_missing_from_ledger(tmp_path, monkeypatch):
+    def fail(*args):
+        raise OSError("ledger penuh")
+    
+    async def main(economy):
+        await economy.add_money(1, 100, "ok")
+        await economy.drain()
+        with monkeypatch.context() as patch:
+            patch.setattr(economy.event_ledger, "append", fail)
+            await economy.add_money(1, 50, "journal saja")  # Commit sukses, event tertunda
+    
+    economy = open_economy(tmp_path)
+    asyncio.run(main(economy))
+    assert economy._unpublished
+    economy.storage.close()  # Crash sebelum event diulang
+    economy.event_ledger.close()
+    
+    reloaded = open_economy(tmp_path)
+    assert reloaded.get_user_data(1).balance == 1150
+    assert reloaded.event_ledger.balance_at(1, int(time.time()) + 1)["balance"] == 1150
+    assert reloaded.event_ledger.recent_balances() == {1: 1150}
+    reloaded.storage.close()
+    reloaded.event_ledger.close()
+
+def test_audit_command_reports_ledger_balance(tmp_path, monkeypatch):
+    registry = bot_shop.GuildEconomies(directory=str(tmp_path / "guilds"))
+    monkeypatch.setattr(bot_shop, "economy_backend", bot_shop.LocalEconomyBackend(registry))
+    sent = []
+    
+    async def send(content=None, embed=None):
+        sent.append(embed or content)
+    
+    ctx = SimpleNamespace(guild=SimpleNamespace(id=1), send=send)
+    member = SimpleNamespace(id=7, mention="<@7>")
+    
+    async def main():
+        await registry.get(1).add_money(7, 250, "gaji")
+        await registry.drain()
+        await bot_shop.audit_balance.callback(ctx, member, when="2999-01-01")
+        await bot_shop.audit_balance.callback(ctx, member, when="2000-01-01")
+        await bot_shop.audit_balance.callback(ctx, member, when="kemarin")
+    
+    asyncio.run(main())
+    fields = {field.name: field.value for field in sent[0].fields}
+    assert fields["💰 Saldo"] == "**1,250** koin"
+    assert "tidak mencakup" in sent[1]
+    assert "Format waktu tidak valid" in sent[2]